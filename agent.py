@@ -1,6 +1,19 @@
+import os
+import time
+
 from google.adk.agents import Agent
 from google.adk.tools import google_search
 
+from stub_llm import agent_model
+
+# Newer google-adk releases send `static_instruction` first and byte-for-byte
+# unchanged on every request, which is what model-side prefix caching keys on
+_HAS_STATIC_INSTRUCTION = "static_instruction" in getattr(Agent, "model_fields", {})
+
+def _instruction(text: str) -> dict:
+    """Agent keyword for a fixed instruction: static where supported."""
+    return {"static_instruction": text} if _HAS_STATIC_INSTRUCTION else {"instruction": text}
+
 
 # Agent instruction for accessibility-focused cooking assistance
 AGENT_INSTRUCTION = """
@@ -37,68 +50,471 @@ You are a helpful, patient, and encouraging cooking companion. Your primary goal
 Your role is to be a supportive kitchen partner who makes cooking approachable and enjoyable for everyone, regardless of their accessibility needs.
 """
 
+# Gemini model behind the agents; AGENT_MODEL_BACKEND=replay swaps in
+# recorded responses for offline testing and benchmarks (see stub_llm.py)
+AGENT_MODEL = os.environ.get("AGENT_MODEL", "gemini-2.0-flash-exp")
+
 # Create the root agent for Google ADK framework
 root_agent = Agent(
     name="gideon",
-    model="gemini-2.0-flash-exp",
+    model=agent_model(AGENT_MODEL),
     description="You are a helpful and friendly AI assistant that talks with people with certain accessibility issues, and your task is to guide them through recipes that will work around their accessibilities.",
-    instruction=AGENT_INSTRUCTION,
-    tools=[google_search]
+    tools=[google_search],
+    **_instruction(AGENT_INSTRUCTION)
+)
+
+# Instruction for folding old conversation turns into a rolling summary
+SUMMARY_INSTRUCTION = """
+You maintain a short running summary of a cooking conversation between a user and an accessible-cooking assistant.
+Given the previous summary and some older turns, return an updated summary in at most 8 short bullet points.
+Keep the user's accessibility needs, dietary needs, equipment, the recipe being made and progress through it, and any open questions.
+Return only the bullet points.
+"""
+
+# Tool-less agent used only to summarize conversation history
+summary_agent = Agent(
+    name="history_summarizer",
+    model=root_agent.model,
+    description="Summarizes older conversation turns so long conversations stay within a token budget.",
+    **_instruction(SUMMARY_INSTRUCTION)
 )
 
 # Import additional required modules
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
+from contextlib import aclosing, asynccontextmanager, contextmanager, nullcontext
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from typing import AsyncContextManager, AsyncIterator, Callable, Dict, Optional
 import asyncio
+import uuid
+
+from recipe_cache import normalize_url
+from json_extract import JSONObjectExtractor
+from recipe_parser import parse_recipe_from_url, merge_accessibility_alternatives, recipe_id, validate_recipe
+from single_flight import SingleFlight
+from semantic_cache import SemanticCache
+from metrics import REGISTRY
+from deadlines import Hedger, stream_with_deadline, with_deadline
+from structured_logging import get_logger
+import tracing
 
 # Configuration
 APP_NAME = "a11yum_recipe_agent"
+
+logger = get_logger("agent")
 USER_ID = "user"
 SESSION_ID = "recipe_session"
 
+# Explicit model context caching of the static prompt prefix (system
+# instruction, tools and earlier turns); needs a google-adk with App support
+AGENT_CONTEXT_CACHE = os.environ.get("AGENT_CONTEXT_CACHE", "false").lower() in ("1", "true", "yes")
+AGENT_CONTEXT_CACHE_TTL = int(os.environ.get("AGENT_CONTEXT_CACHE_TTL", "1800"))
+AGENT_CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get("AGENT_CONTEXT_CACHE_MIN_TOKENS", "0"))
+
+try:
+    from google.adk.apps import App
+    from google.adk.agents.context_cache_config import ContextCacheConfig
+except ImportError:  # older google-adk without explicit context caching
+    App = ContextCacheConfig = None
+
+# Returned when a run ends without a final response
+NO_RESPONSE = "No response received from agent."
+
+# Coalesces concurrent identical scrapes and queries into one agent run
+inflight_requests = SingleFlight("agent", public_prefixes=("scrape:",))
+
+# Near-duplicate questions answered recently are served from memory
+SEMANTIC_CACHE_ENABLED = os.environ.get("SEMANTIC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+SEMANTIC_CACHE_TTL = float(os.environ.get("SEMANTIC_CACHE_TTL", "3600"))
+
+response_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl=SEMANTIC_CACHE_TTL,
+    enabled=SEMANTIC_CACHE_ENABLED,
+)
+
+# Seconds a model call may run before it is cancelled (0 = no deadline)
+AGENT_TIMEOUT = float(os.environ.get("AGENT_TIMEOUT", "60"))
+# Stateless one-shot calls (alternatives, /recipe-assistance) can be hedged:
+# a second attempt starts once the first runs past the quantile of recent
+# latencies, and whichever answers first wins. Off by default, since a
+# hedged call can cost twice the tokens.
+AGENT_HEDGE = os.environ.get("AGENT_HEDGE", "false").lower() in ("1", "true", "yes")
+AGENT_HEDGE_QUANTILE = float(os.environ.get("AGENT_HEDGE_QUANTILE", "0.95"))
+AGENT_HEDGE_MIN_DELAY = float(os.environ.get("AGENT_HEDGE_MIN_DELAY", "0.5"))
+AGENT_HEDGE_MIN_SAMPLES = int(os.environ.get("AGENT_HEDGE_MIN_SAMPLES", "20"))
+
+model_hedger = Hedger(
+    enabled=AGENT_HEDGE,
+    quantile=AGENT_HEDGE_QUANTILE,
+    min_delay=AGENT_HEDGE_MIN_DELAY,
+    min_samples=AGENT_HEDGE_MIN_SAMPLES,
+)
+
+MODEL_TTFT_SECONDS = REGISTRY.histogram(
+    "a11yum_model_ttft_seconds", "Time from starting a model run to its first text", ["label"]
+)
+REQUEST_TTFT_SECONDS = REGISTRY.histogram(
+    "a11yum_request_ttft_seconds", "Time from receiving a request to its first answer text", ["label"]
+)
+MODEL_TOKENS = REGISTRY.counter(
+    "a11yum_model_tokens_total", "Model tokens by kind (input, cached_input, output)", ["label", "kind"]
+)
+TOOL_CALLS = REGISTRY.counter("a11yum_tool_calls_total", "Agent tool calls", ["tool"])
+
+# Process-wide runner pool, keyed by agent name. Each runner owns one
+# session service that is shared by every call routed through it.
+_runner_pool: Dict[str, Runner] = {}
+
+def runner_options(agent: Agent, app_name: str = APP_NAME) -> dict:
+    """
+    Runner keyword arguments for an agent. With AGENT_CONTEXT_CACHE on and an
+    ADK that supports it, the agent is wrapped in an App whose static prefix
+    is registered with the model's context cache.
+    """
+    if AGENT_CONTEXT_CACHE and App is not None:
+        cache_config = ContextCacheConfig(
+            ttl_seconds=AGENT_CONTEXT_CACHE_TTL,
+            min_tokens=AGENT_CONTEXT_CACHE_MIN_TOKENS,
+        )
+        return {
+            "app": App(name=APP_NAME, root_agent=agent, context_cache_config=cache_config),
+            "app_name": app_name,
+        }
+    return {"agent": agent, "app_name": app_name}
+
+def get_runner(agent: Agent = root_agent) -> Runner:
+    """Return the shared runner for an agent, creating it on first use."""
+    runner = _runner_pool.get(agent.name)
+    if runner is None:
+        runner = Runner(
+            session_service=InMemorySessionService(),
+            **runner_options(agent)
+        )
+        _runner_pool[agent.name] = runner
+    return runner
+
+class Conversation:
+    """Handle for a multi-turn conversation that reuses one agent session."""
+
+    def __init__(self, user_id: str, session_id: str, runner: Runner):
+        self.user_id = user_id
+        self.session_id = session_id
+        self.runner = runner
+
+    async def close(self):
+        """Drop the session backing this conversation."""
+        await self.runner.session_service.delete_session(
+            app_name=APP_NAME,
+            user_id=self.user_id,
+            session_id=self.session_id
+        )
+
+class TurnUsage:
+    """
+    Input tokens and time to first token of one agent request. Inside
+    model_run() the run is also traced: a "model.run" span with a
+    first_token event, and a child span per client-side tool call.
+    """
+
+    def __init__(self, label: str = "agent"):
+        self.label = label
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self.cached_response = False
+        self.span: Optional[tracing.Span] = None
+        self.model_started: Optional[float] = None
+        self.model_first_token_at: Optional[float] = None
+        self._tool_spans: Dict[str, tracing.Span] = {}
+
+    def mark_cached(self):
+        """The answer came from the response cache, without a model call."""
+        self.cached_response = True
+        self.first_token_at = time.perf_counter()
+
+    @contextmanager
+    def model_run(self):
+        """Trace the runner.run_async call made inside the block."""
+        self.span = tracing.start_span("model.run", label=self.label)
+        self.model_started = time.perf_counter()
+        self.model_first_token_at = None
+        try:
+            yield self.span
+        except (GeneratorExit, asyncio.CancelledError):
+            self.span.set(cancelled=True)
+            raise
+        except BaseException as exc:
+            self.span.fail(exc)
+            raise
+        finally:
+            self._end_model_run()
+
+    def observe(self, event):
+        """Record an event from runner.run_async."""
+        if event.content and event.content.parts and any(part.text for part in event.content.parts):
+            now = time.perf_counter()
+            if self.first_token_at is None:
+                self.first_token_at = now
+            if self.span is not None and self.model_first_token_at is None:
+                self.model_first_token_at = now
+                self.span.event("first_token")
+                MODEL_TTFT_SECONDS.observe(now - self.model_started, label=self.label)
+        # Partial events repeat the usage of the model call they belong to
+        usage = getattr(event, "usage_metadata", None)
+        if usage is not None and not event.partial:
+            self.input_tokens += usage.prompt_token_count or 0
+            self.cached_tokens += usage.cached_content_token_count or 0
+            self.output_tokens += usage.candidates_token_count or 0
+        if self.span is not None and not event.partial:
+            self._observe_tools(event)
+
+    def _observe_tools(self, event):
+        for call in event.get_function_calls():
+            TOOL_CALLS.inc(tool=call.name)
+            self._tool_spans[call.id or call.name] = tracing.start_span(
+                f"tool.{call.name}", parent=self.span, tool=call.name
+            )
+        for response in event.get_function_responses():
+            tool_span = self._tool_spans.pop(response.id or response.name, None)
+            if tool_span is not None:
+                tool_span.end()
+        # google_search runs inside the model, so there is no call to time;
+        # the queries it made come back as grounding metadata
+        grounding = getattr(event, "grounding_metadata", None)
+        queries = list(getattr(grounding, "web_search_queries", None) or [])
+        if queries:
+            TOOL_CALLS.inc(len(queries), tool="google_search")
+            self.span.event("tool.google_search", queries=len(queries))
+
+    def _end_model_run(self):
+        for tool_span in self._tool_spans.values():
+            tool_span.set(unfinished=True)
+            tool_span.end()
+        self._tool_spans.clear()
+        self.span.set(input_tokens=self.input_tokens, cached_input_tokens=self.cached_tokens,
+                      output_tokens=self.output_tokens)
+        if self.model_first_token_at is not None:
+            self.span.set(ttft_ms=round((self.model_first_token_at - self.model_started) * 1000, 1))
+        self.span.end()
+
+    def add(self, other: "TurnUsage"):
+        """Count another attempt at the same request (a hedge) into this one."""
+        self.input_tokens += other.input_tokens
+        self.cached_tokens += other.cached_tokens
+        self.output_tokens += other.output_tokens
+        if other.first_token_at is not None and (self.first_token_at is None or
+                                                 other.first_token_at < self.first_token_at):
+            self.first_token_at = other.first_token_at
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return round((self.first_token_at - self.started) * 1000, 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_tokens,
+            "output_tokens": self.output_tokens,
+            "ttft_ms": self.ttft_ms,
+            "cached_response": self.cached_response,
+        }
+
+    def report(self):
+        logger.info("Turn usage", extra={"label": self.label, **self.to_dict()})
+        if self.first_token_at is not None:
+            REQUEST_TTFT_SECONDS.observe(self.first_token_at - self.started, label=self.label)
+        MODEL_TOKENS.inc(self.input_tokens, label=self.label, kind="input")
+        MODEL_TOKENS.inc(self.cached_tokens, label=self.label, kind="cached_input")
+        MODEL_TOKENS.inc(self.output_tokens, label=self.label, kind="output")
+
 # Session and Runner setup
-async def setup_session_and_runner():
-    """Initialize session service and runner for the agent."""
-    session_service = InMemorySessionService()
-    session = await session_service.create_session(
-        app_name=APP_NAME, 
-        user_id=USER_ID, 
-        session_id=SESSION_ID
-    )
-    runner = Runner(
-        agent=root_agent, 
+async def setup_session_and_runner(user_id: str = USER_ID, session_id: Optional[str] = None):
+    """Create a fresh session on the shared runner for the agent."""
+    runner = get_runner()
+    session = await runner.session_service.create_session(
         app_name=APP_NAME, 
-        session_service=session_service
+        user_id=user_id, 
+        session_id=session_id or f"{SESSION_ID}_{uuid.uuid4().hex}"
     )
     return session, runner
 
+async def start_conversation(user_id: str = USER_ID) -> Conversation:
+    """Open a reusable conversation so follow-up queries share context."""
+    session, runner = await setup_session_and_runner(user_id)
+    return Conversation(user_id, session.id, runner)
+
+@asynccontextmanager
+async def _agent_session(conversation: Optional[Conversation] = None):
+    """
+    Yield `(runner, user_id, session_id)` for a query. Without a conversation
+    the query gets its own one-shot session that is removed afterwards, so
+    concurrent callers never share state.
+    """
+    if conversation is not None:
+        yield conversation.runner, conversation.user_id, conversation.session_id
+        return
+    session, runner = await setup_session_and_runner()
+    try:
+        yield runner, USER_ID, session.id
+    finally:
+        await runner.session_service.delete_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=session.id
+        )
+
 # Agent interaction function
-async def call_agent_async(query):
-    """Send a query to the agent and get the response."""
-    print(f"🍽️ User Query: {query}")
+async def call_agent_async(query, conversation: Optional[Conversation] = None,
+                           usage: Optional[TurnUsage] = None, timeout: float = AGENT_TIMEOUT):
+    """
+    Send a query to the agent and get the response. The call is cancelled
+    with AgentTimeout after `timeout` seconds. One-shot queries (no
+    conversation) are hedged when AGENT_HEDGE is on; a conversation's
+    session is stateful, so it is never run twice.
+    """
+    logger.info("Agent query", extra={"user_text": query})
+    usage = usage or TurnUsage("call_agent_async")
     
     content = types.Content(
         role='user', 
         parts=[types.Part(text=query)]
     )
     
-    session, runner = await setup_session_and_runner()
-    events = runner.run_async(
-        user_id=USER_ID, 
-        session_id=SESSION_ID, 
-        new_message=content
+    async def attempt(hedge: bool):
+        if not hedge:
+            return await _run_agent(content, conversation, usage)
+        # The hedge's tokens are spent too, so they count toward the request
+        hedge_usage = TurnUsage(usage.label)
+        hedge_usage.started = usage.started
+        try:
+            return await _run_agent(content, None, hedge_usage, hedge=True)
+        finally:
+            usage.add(hedge_usage)
+    
+    if conversation is None:
+        call = model_hedger.run(attempt, usage.label)
+    else:
+        call = attempt(False)
+    try:
+        return await with_deadline(call, timeout, usage.label)
+    finally:
+        usage.report()
+
+async def _run_agent(content: types.Content, conversation: Optional[Conversation],
+                     usage: TurnUsage, hedge: bool = False) -> str:
+    async with _agent_session(conversation) as (runner, user_id, session_id):
+        events = runner.run_async(
+            user_id=user_id, 
+            session_id=session_id, 
+            new_message=content
+        )
+
+        logger.debug("Agent is thinking", extra={"hedge": hedge})
+        
+        with usage.model_run() as span:
+            if hedge:
+                span.set(hedge=True)
+            async with aclosing(events):
+                async for event in events:
+                    usage.observe(event)
+                    if event.is_final_response():
+                        final_response = event.content.parts[0].text
+                        logger.debug("Agent response", extra={"response_text": final_response})
+                        break
+                else:
+                    final_response = NO_RESPONSE
+        
+        return final_response
+
+async def stream_agent_async(query, conversation: Optional[Conversation] = None,
+                             usage: Optional[TurnUsage] = None,
+                             timeout: Optional[float] = AGENT_TIMEOUT) -> AsyncIterator[str]:
+    """
+    Send a query to the agent and yield the response text as it is generated.
+    Closing the generator early stops the agent run, and so does AgentTimeout
+    once the stream has run for `timeout` seconds.
+    """
+    logger.info("Agent query", extra={"user_text": query, "streaming": True})
+    usage = usage or TurnUsage("stream_agent_async")
+    
+    content = types.Content(
+        role='user', 
+        parts=[types.Part(text=query)]
     )
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+    
+    async with _agent_session(conversation) as (runner, user_id, session_id):
+        events = stream_with_deadline(runner.run_async(
+            user_id=user_id, 
+            session_id=session_id, 
+            new_message=content,
+            run_config=run_config
+        ), timeout, usage.label)
+        
+        # Partial events carry text deltas; the aggregated event after them
+        # repeats the whole text, so it is only used when nothing was streamed
+        streamed = False
+        try:
+            with usage.model_run():
+                async with aclosing(events):
+                    async for event in events:
+                        usage.observe(event)
+                        text = ""
+                        if event.content and event.content.parts:
+                            text = "".join(part.text for part in event.content.parts if part.text)
+                        if event.partial:
+                            if text:
+                                streamed = True
+                                yield text
+                        else:
+                            if text and event.is_final_response() and not streamed:
+                                yield text
+                            streamed = False
+        finally:
+            usage.report()
 
-    print("🤖 Agent is thinking...")
+async def summarize_conversation(summary: str, turns) -> str:
+    """
+    Fold older turns into the rolling conversation summary. Runs on its own
+    one-shot session of the summary agent, so it never touches the user's session.
+    """
+    lines = [f"Previous summary:\n{summary or '(none)'}", "", "Older turns:"]
+    for turn in turns:
+        lines.append(f"User: {turn['user_input']}")
+        lines.append(f"Assistant: {turn['agent_response']}")
+    content = types.Content(role='user', parts=[types.Part(text="\n".join(lines))])
+    
+    runner = get_runner(summary_agent)
+    session = await runner.session_service.create_session(app_name=APP_NAME, user_id=USER_ID)
+    usage = TurnUsage("summarize")
     
-    async for event in events:
-        if event.is_final_response():
-            final_response = event.content.parts[0].text
-            print(f"🍳 Agent Response: {final_response}")
-            return final_response
+    async def run():
+        events = runner.run_async(user_id=USER_ID, session_id=session.id, new_message=content)
+        with usage.model_run():
+            async with aclosing(events):
+                async for event in events:
+                    usage.observe(event)
+                    if event.is_final_response() and event.content and event.content.parts:
+                        return "".join(part.text for part in event.content.parts if part.text)
+        return ""
     
-    return "No response received from agent."
+    try:
+        return await with_deadline(run(), AGENT_TIMEOUT, usage.label)
+    finally:
+        await runner.session_service.delete_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=session.id
+        )
 
 # Main function for testing
 async def main():
@@ -121,11 +537,38 @@ async def main():
         await asyncio.sleep(2)
 
 # Simplified function for external API calls
-async def process_recipe_query(user_input):
+async def process_recipe_query(user_input, user_id: Optional[str] = None, use_cache: bool = True):
     """
     Process a recipe-related query from external services.
     Returns a structured response that can be used by FastAPI.
+
+    A close enough query answered recently is served from the semantic
+    cache, unless `use_cache` is off or the user opted out. Concurrent calls
+    with the same query share a single agent run.
     """
+    if use_cache:
+        with tracing.span("semantic_cache.lookup") as lookup:
+            cached = response_cache.lookup(user_input, scope="recipe_query", user_id=user_id)
+            lookup.set(hit=cached is not None)
+        if cached is not None:
+            response, similarity = cached
+            logger.info("Semantic cache hit", extra={"similarity": round(similarity, 3), "user_text": user_input})
+            return {
+                "success": True,
+                "response": response,
+                "agent_name": "gideon",
+                "query": user_input,
+                "cached": True,
+                "similarity": similarity
+            }
+    
+    key = "query:" + " ".join(user_input.split()).lower()
+    result = await inflight_requests.do(key, lambda: _process_recipe_query(user_input))
+    if use_cache and result["success"] and result.get("response") != NO_RESPONSE:
+        response_cache.put(user_input, result["response"], scope="recipe_query", user_id=user_id)
+    return {**result, "query": user_input}
+
+async def _process_recipe_query(user_input):
     try:
         response = await call_agent_async(user_input)
         
@@ -143,145 +586,267 @@ async def process_recipe_query(user_input):
             "query": user_input
         }
 
-async def scrape_recipe_from_url(recipe_url: str):
+async def scrape_recipe_from_url(recipe_url: str,
+                                 admit: Optional[Callable[[], AsyncContextManager]] = None):
     """
     Scrape recipe data from a given URL using Google search tool and format it 
     according to the example-recipe-structure.json format.
+
+    Concurrent scrapes of the same (normalized) URL share a single agent run.
     
     Args:
         recipe_url: The URL of the recipe to scrape
+        admit: Returns the context (e.g. a scheduler slot) each model call of
+            the scrape runs in; only the call that does the work enters it
         
     Returns:
         dict: Structured recipe data matching the example format
     """
+    key = "scrape:" + normalize_url(recipe_url)
+    return await inflight_requests.do(key, lambda: _scrape_recipe_from_url(recipe_url, admit or nullcontext))
+
+# Static part of the accessibility-alternatives prompt, built once; the
+# recipe outline is appended per call
+ALTERNATIVES_PROMPT_PREFIX = """
+This recipe has already been extracted. Do NOT search the web. Suggest accessibility
+alternatives (for limited mobility, grip strength, vision, energy or standing time)
+for the ingredients, tools and steps of the recipe at the end of this message,
+referring to them by id.
+
+Return ONLY a valid JSON object in this exact format, including only items that
+benefit from an alternative:
+{
+  "accessibilityTags": ["No-Chop Options", "Alternative Cooking Methods"],
+  "ingredients": {
+    "ing-1": [{"name": "pre-chopped alternative", "amount": "amount", "unit": "unit", "reason": "No chopping required", "accessibilityBenefit": "Eliminates knife work"}]
+  },
+  "tools": {
+    "tool-1": [{"name": "alternative tool", "reason": "why this alternative", "accessibilityBenefit": "accessibility benefit"}]
+  },
+  "steps": {
+    "step-1": [{"instruction": "alternative way to do this step", "reason": "why this alternative", "accessibilityBenefit": "how this helps", "toolChanges": {"add": [], "remove": []}, "timeAdjustment": 0}]
+  }
+}
+
+"""
+
+async def add_accessibility_alternatives(recipe: dict):
+    """
+    Ask the agent for accessibility alternatives for a recipe that was already
+    parsed locally, and merge them in. The recipe is returned unchanged if the
+    agent's answer can't be used.
+    """
+    with tracing.span("prompt.build", prompt="alternatives"):
+        lines = [f"Recipe: {recipe['title']}", "", "Ingredients:"]
+        for ingredient in recipe["ingredients"]:
+            amount = " ".join(part for part in (ingredient["amount"], ingredient.get("unit", "")) if part)
+            lines.append(f"{ingredient['id']}: {amount} {ingredient['name']}".replace("  ", " "))
+        lines.append("")
+        lines.append("Tools:")
+        for tool in recipe["tools"]:
+            lines.append(f"{tool['id']}: {tool['name']}")
+        lines.append("")
+        lines.append("Steps:")
+        for step in recipe["steps"]:
+            lines.append(f"{step['id']}: {step['instruction']}")
+        recipe_outline = "\n".join(lines)
+
+        prompt = ALTERNATIVES_PROMPT_PREFIX + recipe_outline + "\n"
+
+    try:
+        response_text = await call_agent_async(prompt, usage=TurnUsage("alternatives"))
+        with tracing.span("json.extract", chars=len(response_text)):
+            extractor = JSONObjectExtractor()
+            found = extractor.feed(response_text) + extractor.close()
+            alternatives = next((obj for obj in found if isinstance(obj, dict)), None) or extractor.partial()
+        if alternatives:
+            return merge_accessibility_alternatives(recipe, alternatives)
+        logger.warning("No alternatives JSON found, returning parsed recipe as-is")
+    except Exception as e:
+        logger.warning("Could not add accessibility alternatives", exc_info=True)
+    return recipe
+
+# Static part of the scrape prompt, built once; the URL and recipe id are
+# appended per call (see _scrape_recipe_from_url)
+SCRAPE_PROMPT_PREFIX = """
+IMPORTANT: You must use the google_search tool to search for and retrieve the recipe content from the Recipe URL given at the end of this message.
+
+Step 1: Search for the recipe content at the URL using google_search
+Step 2: Extract the recipe information from the search results
+Step 3: Format as JSON exactly as shown below
+
+I need you to extract the recipe information and return ONLY a valid JSON object in this exact format:
+{
+  "id": "the Recipe id given at the end of this message",
+  "title": "Recipe Title From Website",
+  "description": "Recipe description from the website",
+  "estimatedTime": total_minutes,
+  "difficulty": "Easy/Medium/Hard",
+  "dietaryTags": ["tags", "from", "recipe"],
+  "accessibilityTags": ["No-Chop Options", "Alternative Cooking Methods"],
+  "servings": number_of_servings,
+  "sourceUrl": "the Recipe URL given at the end of this message",
+  "nutritionInfo": {
+    "calories": calories_per_serving,
+    "protein": "Xg",
+    "carbs": "Xg", 
+    "fat": "Xg"
+  },
+  "ingredients": [
+    {
+      "id": "ing-1",
+      "name": "ingredient name",
+      "amount": "amount",
+      "unit": "unit",
+      "notes": "any notes",
+      "alternatives": [
+        {
+          "id": "alt-1",
+          "name": "pre-chopped alternative",
+          "amount": "amount",
+          "unit": "unit",
+          "reason": "No chopping required",
+          "accessibilityBenefit": "Eliminates knife work for those with limited mobility"
+        }
+      ]
+    }
+  ],
+  "tools": [
+    {
+      "id": "tool-1",
+      "name": "tool name",
+      "required": true,
+      "safetyNotes": ["safety notes"],
+      "alternatives": [
+        {
+          "id": "tool-alt-1",
+          "name": "alternative tool",
+          "reason": "why this alternative",
+          "accessibilityBenefit": "accessibility benefit"
+        }
+      ]
+    }
+  ],
+  "steps": [
+    {
+      "id": "step-1",
+      "stepNumber": 1,
+      "instruction": "step instruction",
+      "estimatedTime": minutes,
+      "difficulty": "Easy/Medium/Hard",
+      "safetyWarnings": ["warnings if any"],
+      "requiredTools": ["tool-1"],
+      "alternatives": [
+        {
+          "id": "step-alt-1",
+          "instruction": "alternative way to do this step",
+          "reason": "why this alternative",
+          "accessibilityBenefit": "how this helps accessibility",
+          "toolChanges": {
+            "add": ["new-tools"],
+            "remove": ["old-tools"]
+          },
+          "timeAdjustment": 0
+        }
+      ],
+      "tips": ["helpful tips"]
+    }
+  ],
+  "createdAt": "2025-09-28T00:00:00Z",
+  "isFavorite": false
+}
+
+You MUST:
+1. Use google_search to get the actual recipe content from the Recipe URL
+2. Return ONLY the JSON object, no other text
+3. Include accessibility alternatives for ingredients, tools, and steps
+4. Make sure all JSON is valid and complete
+"""
+
+async def _scrape_recipe_from_url(recipe_url: str, admit: Callable[[], AsyncContextManager]):
+    # Fast path: pages with schema.org Recipe markup are parsed locally, and the
+    # agent is only asked for the accessibility alternatives
+    with tracing.span("recipe.parse_local"):
+        parsed = await parse_recipe_from_url(recipe_url)
+    if parsed is not None:
+        logger.info("Parsed schema.org recipe locally", extra={"url": recipe_url, "title": parsed["title"]})
+        async with admit():
+            return await add_accessibility_alternatives(parsed)
+    async with admit():
+        return await _scrape_with_agent(recipe_url)
+
+async def _scrape_with_agent(recipe_url: str):
     try:
-        # Create a comprehensive prompt for recipe extraction
-        extraction_prompt = f"""
-        IMPORTANT: You must use the google_search tool to search for and retrieve the recipe content from this URL: {recipe_url}
-
-        Step 1: Search for the recipe content at the URL using google_search
-        Step 2: Extract the recipe information from the search results
-        Step 3: Format as JSON exactly as shown below
-
-        I need you to extract the recipe information and return ONLY a valid JSON object in this exact format:
-        {{
-          "id": "recipe-{hash(recipe_url) % 10000}",
-          "title": "Recipe Title From Website",
-          "description": "Recipe description from the website",
-          "estimatedTime": total_minutes,
-          "difficulty": "Easy/Medium/Hard",
-          "dietaryTags": ["tags", "from", "recipe"],
-          "accessibilityTags": ["No-Chop Options", "Alternative Cooking Methods"],
-          "servings": number_of_servings,
-          "sourceUrl": "{recipe_url}",
-          "nutritionInfo": {{
-            "calories": calories_per_serving,
-            "protein": "Xg",
-            "carbs": "Xg", 
-            "fat": "Xg"
-          }},
-          "ingredients": [
-            {{
-              "id": "ing-1",
-              "name": "ingredient name",
-              "amount": "amount",
-              "unit": "unit",
-              "notes": "any notes",
-              "alternatives": [
-                {{
-                  "id": "alt-1",
-                  "name": "pre-chopped alternative",
-                  "amount": "amount",
-                  "unit": "unit",
-                  "reason": "No chopping required",
-                  "accessibilityBenefit": "Eliminates knife work for those with limited mobility"
-                }}
-              ]
-            }}
-          ],
-          "tools": [
-            {{
-              "id": "tool-1",
-              "name": "tool name",
-              "required": true,
-              "safetyNotes": ["safety notes"],
-              "alternatives": [
-                {{
-                  "id": "tool-alt-1",
-                  "name": "alternative tool",
-                  "reason": "why this alternative",
-                  "accessibilityBenefit": "accessibility benefit"
-                }}
-              ]
-            }}
-          ],
-          "steps": [
-            {{
-              "id": "step-1",
-              "stepNumber": 1,
-              "instruction": "step instruction",
-              "estimatedTime": minutes,
-              "difficulty": "Easy/Medium/Hard",
-              "safetyWarnings": ["warnings if any"],
-              "requiredTools": ["tool-1"],
-              "alternatives": [
-                {{
-                  "id": "step-alt-1",
-                  "instruction": "alternative way to do this step",
-                  "reason": "why this alternative",
-                  "accessibilityBenefit": "how this helps accessibility",
-                  "toolChanges": {{
-                    "add": ["new-tools"],
-                    "remove": ["old-tools"]
-                  }},
-                  "timeAdjustment": 0
-                }}
-              ],
-              "tips": ["helpful tips"]
-            }}
-          ],
-          "createdAt": "2025-09-28T00:00:00Z",
-          "isFavorite": false
-        }}
-
-        You MUST:
-        1. Use google_search to get the actual recipe content from {recipe_url}
-        2. Return ONLY the JSON object, no other text
-        3. Include accessibility alternatives for ingredients, tools, and steps
-        4. Make sure all JSON is valid and complete
-        """
-
-        # Use the call_agent_async function which handles session management properly
-        response_text = await call_agent_async(extraction_prompt)
-
-        print("🔍 Scraping recipe data...")
-        print("📄 Raw response received, processing...")
+        # Static instructions and template first, so every scrape shares the
+        # same prompt prefix; only the URL and id at the end change
+        extraction_prompt = (
+            f"{SCRAPE_PROMPT_PREFIX}\n"
+            f"Recipe URL: {recipe_url}\n"
+            f"Recipe id: {recipe_id(recipe_url)}\n"
+        )
+
+        logger.info("Scraping recipe with the agent", extra={"url": recipe_url})
+        
+        # Parse JSON objects out of the response while it streams in, and stop
+        # as soon as one of them is a valid recipe
+        # Parsing is interleaved with the model stream, so its time is summed
+        # into the scrape's json.extract span rather than timed as one block
+        extractor = JSONObjectExtractor()
+        response_parts = []
+        candidates = []
+        
+        async def read_stream():
+            extract_seconds = 0.0
+            # The deadline is applied once, around the whole read below
+            chunks = stream_agent_async(extraction_prompt, usage=TurnUsage("scrape"), timeout=None)
+            async with aclosing(chunks):
+                async for chunk in chunks:
+                    response_parts.append(chunk)
+                    extract_started = time.perf_counter()
+                    for candidate in extractor.feed(chunk):
+                        if not validate_recipe(candidate):
+                            return candidate, extract_seconds + time.perf_counter() - extract_started
+                        candidates.append(candidate)
+                    extract_seconds += time.perf_counter() - extract_started
+            return None, extract_seconds
         
-        # Try to extract JSON from the response
-        import json
-        import re
+        # The deadline covers the whole stream; cancelling it closes the model call
+        recipe_data, extract_seconds = await with_deadline(read_stream(), AGENT_TIMEOUT, "scrape")
+        response_text = "".join(response_parts)
         
-        recipe_data = None
+        with tracing.span("json.extract", chars=len(response_text), streamed_ms=round(extract_seconds * 1000, 2)):
+            if recipe_data is None:
+                # Recover what we can from an object the response cut off, before
+                # close() rescans it for smaller objects
+                partial = extractor.partial() if extractor.in_object else None
+                candidates.extend(extractor.close())
+                valid = [candidate for candidate in candidates if not validate_recipe(candidate)]
+                if valid:
+                    recipe_data = valid[0]
+                elif partial and partial.get("title") and (partial.get("ingredients") or partial.get("steps")):
+                    logger.warning("Recovered partial recipe JSON from a truncated response", extra={"url": recipe_url})
+                    recipe_data = {**partial, "incomplete": True}
         
-        # Look for JSON in the response
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            try:
-                recipe_data = json.loads(json_match.group())
-                print("✅ Successfully parsed JSON recipe data")
-            except json.JSONDecodeError as e:
-                print(f"❌ JSON parsing error: {e}")
-                # Fallback: return structured error response
-                recipe_data = {
-                    "error": "Failed to parse recipe JSON",
-                    "raw_response": response_text,
-                    "url": recipe_url
-                }
-        else:
+        if recipe_data is not None:
+            logger.info("Parsed recipe JSON", extra={"url": recipe_url})
+            # The model may echo the template's id and URL rather than these
+            recipe_data["id"] = recipe_id(recipe_url)
+            recipe_data["sourceUrl"] = recipe_url
+        
+        if recipe_data is None and candidates:
+            problems = validate_recipe(candidates[-1])
+            logger.warning("Recipe JSON failed validation", extra={"url": recipe_url, "problems": problems})
+            # Fallback: return structured error response
+            recipe_data = {
+                "error": f"Recipe JSON failed validation: {'; '.join(problems)}",
+                "raw_response": response_text,
+                "url": recipe_url
+            }
+        elif recipe_data is None and response_text:
             # No JSON found, create a structured response from text
-            print("⚠️ No JSON found, creating structured response from text")
+            logger.warning("No JSON found, creating structured response from text", extra={"url": recipe_url})
             recipe_data = {
-                "id": f"recipe-{hash(recipe_url) % 10000}",
+                "id": recipe_id(recipe_url),
                 "name": "Extracted Recipe",
                 "description": "Recipe extracted from URL",
                 "url": recipe_url,
@@ -301,7 +866,7 @@ async def scrape_recipe_from_url(recipe_url: str):
         return recipe_data
         
     except Exception as e:
-        print(f"❌ Error scraping recipe: {e}")
+        logger.exception("Error scraping recipe", extra={"url": recipe_url})
         return {
             "error": str(e),
             "url": recipe_url,
@@ -0,0 +1,239 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Admission control and priority queueing for agent (model) calls
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import tracing
+from metrics import REGISTRY
+
+# Priorities, most urgent first
+INTERACTIVE, BULK, BACKGROUND = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk", BACKGROUND: "background"}
+
+QUEUE_DEPTH = REGISTRY.gauge("a11yum_scheduler_queue_depth", "Agent calls waiting for a slot", ["priority"])
+RUNNING = REGISTRY.gauge("a11yum_scheduler_running", "Agent calls holding a slot", ["priority"])
+WAIT_SECONDS = REGISTRY.histogram("a11yum_scheduler_wait_seconds", "Time agent calls waited for a slot", ["priority"])
+ADMITTED = REGISTRY.counter("a11yum_scheduler_admitted_total", "Agent calls given a slot", ["priority"])
+REJECTED = REGISTRY.counter(
+    "a11yum_scheduler_rejected_total", "Agent calls turned away (user_rate, queue_full, queue_timeout)",
+    ["priority", "reason"]
+)
+
+
+class SchedulerRejected(Exception):
+    """An agent call was not admitted; the client may retry after `retry_after` seconds."""
+
+    def __init__(self, reason: str, retry_after: float, priority: int = INTERACTIVE):
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.priority = priority
+        super().__init__(f"Too many {PRIORITY_NAMES[priority]} agent requests ({reason}); "
+                         f"retry after {self.retry_after}s")
+
+
+class Ticket:
+    """A held slot; release() it when the agent call is done (idempotent)."""
+
+    __slots__ = ("scheduler", "priority", "started", "released")
+
+    def __init__(self, scheduler: "AgentScheduler", priority: int):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.scheduler._release(self)
+
+
+class AgentScheduler:
+    """
+    Single gate in front of every model call on one event loop.
+
+    At most `max_concurrency` calls run at once, and `reserved_interactive`
+    of those slots are kept for interactive calls, so long bulk scrapes
+    can't crowd out chat. Waiting calls are served by priority, then
+    arrival. Each user spends one token per call from a bucket refilled at
+    `user_rate` per second, up to `user_burst`.
+
+    Calls are shed with SchedulerRejected (HTTP 429 + Retry-After) when the
+    user's bucket is empty, when the queue for their priority is already
+    `max_queue` (interactive) or `max_bulk_queue` (bulk and background)
+    deep, or after waiting `queue_timeout` seconds.
+    """
+
+    def __init__(self, max_concurrency: int = 16, reserved_interactive: int = 4,
+                 max_queue: int = 100, max_bulk_queue: int = 50, queue_timeout: float = 30.0,
+                 user_rate: float = 1.0, user_burst: float = 10.0, max_users: int = 10000):
+        self.max_concurrency = max_concurrency
+        self.reserved_interactive = min(reserved_interactive, max_concurrency - 1)
+        self.max_queue = max_queue
+        self.max_bulk_queue = max_bulk_queue
+        self.queue_timeout = queue_timeout
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_users = max_users
+        self._running = {priority: 0 for priority in PRIORITY_NAMES}
+        self._queued = {priority: 0 for priority in PRIORITY_NAMES}
+        # (priority, arrival, enqueued_at, future)
+        self._waiting: List[tuple] = []
+        self._arrivals = itertools.count()
+        # user_id -> [tokens, last refill]
+        self._buckets: Dict[str, List[float]] = {}
+        # Moving average of how long a slot is held, for Retry-After estimates
+        self._service_seconds = 1.0
+
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    @property
+    def queued(self) -> int:
+        return sum(self._queued.values())
+
+    #
+    # Admission
+    #
+
+    async def acquire(self, priority: int = INTERACTIVE, user_id: Optional[str] = None,
+                      shed: bool = True) -> Ticket:
+        """
+        Wait for a slot. `user_id` is charged one token (None skips the rate
+        limit); `shed=False` waits however deep the queue is, for callers
+        that bound their own concurrency (batch scrapes, refreshes).
+        """
+        if user_id is not None and self.user_rate > 0:
+            self._take_token(user_id, priority)
+        if self._can_start(priority) and not self._waiting_ahead(priority):
+            return self._start(priority)
+        if shed and self._queue_full(priority):
+            self._reject("queue_full", priority)
+
+        with tracing.span("scheduler.wait", priority=PRIORITY_NAMES[priority]):
+            future = asyncio.get_running_loop().create_future()
+            entry = (priority, next(self._arrivals), time.monotonic(), future)
+            heapq.heappush(self._waiting, entry)
+            self._set_queued(priority, 1)
+            try:
+                return await asyncio.wait_for(future, self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._abandon(future, priority)
+                self._reject("queue_timeout", priority)
+            except BaseException:
+                self._abandon(future, priority)
+                raise
+
+    @asynccontextmanager
+    async def slot(self, priority: int = INTERACTIVE, user_id: Optional[str] = None, shed: bool = True):
+        """`async with scheduler.slot(...)`: acquire(), released on exit."""
+        ticket = await self.acquire(priority, user_id, shed)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _can_start(self, priority: int) -> bool:
+        if self.running >= self.max_concurrency:
+            return False
+        if priority == INTERACTIVE:
+            return True
+        return self.running - self._running[INTERACTIVE] < self.max_concurrency - self.reserved_interactive
+
+    def _waiting_ahead(self, priority: int) -> bool:
+        self._drop_abandoned()
+        return bool(self._waiting) and self._waiting[0][0] <= priority
+
+    def _queue_full(self, priority: int) -> bool:
+        if priority == INTERACTIVE:
+            return self._queued[INTERACTIVE] >= self.max_queue
+        return self.queued - self._queued[INTERACTIVE] >= self.max_bulk_queue
+
+    def _take_token(self, user_id: str, priority: int):
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_users:
+                self._prune_buckets(now)
+            bucket = self._buckets[user_id] = [self.user_burst, now]
+        tokens = min(self.user_burst, bucket[0] + (now - bucket[1]) * self.user_rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            self._reject("user_rate", priority, (1 - tokens) / self.user_rate)
+        bucket[0] = tokens - 1
+
+    def _prune_buckets(self, now: float):
+        """Forget users whose bucket has refilled; they start full again anyway."""
+        for user_id, (tokens, updated) in list(self._buckets.items()):
+            if tokens + (now - updated) * self.user_rate >= self.user_burst:
+                del self._buckets[user_id]
+
+    def _reject(self, reason: str, priority: int, retry_after: Optional[float] = None):
+        if retry_after is None:
+            # Time for the calls already queued at this priority or above to drain
+            ahead = sum(count for p, count in self._queued.items() if p <= priority)
+            retry_after = (ahead + 1) * self._service_seconds / self.max_concurrency
+        REJECTED.inc(priority=PRIORITY_NAMES[priority], reason=reason)
+        raise SchedulerRejected(reason, retry_after, priority)
+
+    #
+    # Slots
+    #
+
+    def _start(self, priority: int, waited: float = 0.0) -> Ticket:
+        self._running[priority] += 1
+        RUNNING.set(self._running[priority], priority=PRIORITY_NAMES[priority])
+        ADMITTED.inc(priority=PRIORITY_NAMES[priority])
+        WAIT_SECONDS.observe(waited, priority=PRIORITY_NAMES[priority])
+        return Ticket(self, priority)
+
+    def _release(self, ticket: Ticket):
+        self._running[ticket.priority] -= 1
+        RUNNING.set(self._running[ticket.priority], priority=PRIORITY_NAMES[ticket.priority])
+        self._service_seconds = 0.8 * self._service_seconds + 0.2 * (time.monotonic() - ticket.started)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to waiting calls, most urgent first."""
+        while True:
+            self._drop_abandoned()
+            if not self._waiting or not self._can_start(self._waiting[0][0]):
+                return
+            priority, _, enqueued_at, future = heapq.heappop(self._waiting)
+            self._set_queued(priority, -1)
+            future.set_result(self._start(priority, time.monotonic() - enqueued_at))
+
+    def _drop_abandoned(self):
+        while self._waiting and self._waiting[0][3].done():
+            heapq.heappop(self._waiting)
+
+    def _abandon(self, future: asyncio.Future, priority: int):
+        if future.done() and not future.cancelled():
+            # The slot was handed over just as the caller gave up
+            future.result().release()
+        else:
+            future.cancel()
+            self._set_queued(priority, -1)
+            # A cancelled head may have been blocking calls behind it
+            self._dispatch()
+
+    def _set_queued(self, priority: int, delta: int):
+        self._queued[priority] += delta
+        QUEUE_DEPTH.set(self._queued[priority], priority=PRIORITY_NAMES[priority])
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": {PRIORITY_NAMES[p]: count for p, count in self._running.items()},
+            "queued": {PRIORITY_NAMES[p]: count for p, count in self._queued.items()},
+            "tracked_users": len(self._buckets),
+            "avg_service_seconds": round(self._service_seconds, 3),
+        }
@@ -1,3 +1,10 @@
+import os
+
+# The Redis message queue listener and agent calls must yield to other clients
+if os.environ.get('SOCKETIO_ASYNC_MODE', 'eventlet') == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
 from backend import create_app
 
 app, socketio = create_app()
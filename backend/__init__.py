@@ -1,22 +1,46 @@
 from flask import Flask
 from flask_socketio import SocketIO
-from backend.routes import user_bp, agent_bp
+import tracing
+from backend.routes import user_bp, agent_bp, recipe_bp, metrics_bp
 from backend.models import db
+from backend.services import recipe_store
 from backend.config import Config
+from backend.sockets.message_queue import StickyNodeMiddleware, message_queue_options
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
-    # Initialize database
+    # Initialize database and load the bundled and scraped recipes into the
+    # recipe store; recipes already stored are skipped
     db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        if app.config['RECIPE_STORE_SEED']:
+            seeded = recipe_store.ingest_directory(app.config['RECIPE_SEED_DIR'])['inserted']
+            seeded += recipe_store.ingest_scrape_cache(app.config['RECIPE_CACHE_PATH'])['inserted']
+            if seeded:
+                print(f"📚 Stored {seeded} new recipes in the recipe store")
     
-    # Initialize SocketIO
-    socketio = SocketIO(app, cors_allowed_origins="*")
+    # Initialize SocketIO, sharing room emits with other nodes through the message queue
+    socketio = SocketIO(
+        app,
+        cors_allowed_origins="*",
+        async_mode=app.config['SOCKETIO_ASYNC_MODE'] or None,
+        **message_queue_options(app.config['SOCKETIO_MESSAGE_QUEUE'], app.config['SOCKETIO_CHANNEL'])
+    )
+    app.wsgi_app = StickyNodeMiddleware(
+        app.wsgi_app, app.config['NODE_ID'], app.config['SOCKETIO_STICKY_COOKIE']
+    )
     
     # Register blueprints
     app.register_blueprint(user_bp)
     app.register_blueprint(agent_bp)
+    app.register_blueprint(recipe_bp)
+    app.register_blueprint(metrics_bp)
+    
+    # Request spans and the HTTP duration histogram served at /metrics
+    tracing.instrument_flask(app, "flask")
     
     # Import and register socket events
     from backend.sockets import register_socket_events
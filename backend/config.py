@@ -1,6 +1,21 @@
 import os
+import socket
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'default_secret')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Recipe store: seeded at startup from the bundled corpus and the FastAPI scrape cache
+    RECIPE_STORE_SEED = os.environ.get('RECIPE_STORE_SEED', 'true').lower() == 'true'
+    RECIPE_SEED_DIR = os.environ.get('RECIPE_SEARCH_DIR', 'recipes')
+    RECIPE_CACHE_PATH = os.environ.get('RECIPE_CACHE_PATH', 'recipe_cache.db')
+
+    # Socket.IO across processes: '' (single process), local:// (in-process
+    # stand-in) or redis://host:6379/0 so room emits reach every node
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE', '')
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL', 'a11yum-socketio')
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'eventlet')
+    # Cookie the load balancer uses to keep long-polling clients on one node
+    SOCKETIO_STICKY_COOKIE = os.environ.get('SOCKETIO_STICKY_COOKIE', 'a11yum_node')
+    NODE_ID = os.environ.get('NODE_ID', f'{socket.gethostname()}-{os.getpid()}')
@@ -1,3 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
+
+# Imported after `db` exists so db.create_all() sees every table
+from backend.models.user_models import User  # noqa: E402
+from backend.models.recipe_models import (  # noqa: E402
+    RecipeRecord, IngredientRecord, ToolRecord, StepRecord, AlternativeRecord
+)
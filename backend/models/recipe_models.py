@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+
+from backend.models import db
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+class RecipeRecord(db.Model):
+    """A stored recipe; `external_id` is the recipe's own "id" field"""
+    __tablename__ = 'recipe'
+    __table_args__ = (
+        # Keyset pages for one difficulty walk (difficulty, id) in id order
+        db.Index('ix_recipe_difficulty_id', 'difficulty', 'id'),
+        # estimated_time is a range filter (<= max_time), so this only narrows
+        # the rows read; the page order still comes from the id
+        db.Index('ix_recipe_time_id', 'estimated_time', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    external_id = db.Column(db.String(64), nullable=False, unique=True)
+    # SHA-256 of the normalized source URL, so a page is only stored once
+    source_key = db.Column(db.String(64), unique=True)
+    source_url = db.Column(db.Text)
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text, nullable=False, default='')
+    estimated_time = db.Column(db.Integer, nullable=False, default=0)
+    difficulty = db.Column(db.String(20), nullable=False, default='Medium')
+    servings = db.Column(db.Integer, nullable=False, default=1)
+    dietary_tags = db.Column(db.JSON, nullable=False, default=list)
+    accessibility_tags = db.Column(db.JSON, nullable=False, default=list)
+    image_url = db.Column(db.Text)
+    nutrition_info = db.Column(db.JSON)
+    is_favorite = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.String(40), nullable=False, default='')
+    # Keys outside the schema (e.g. "incomplete")
+    extras = db.Column(db.JSON, nullable=False, default=dict)
+    ingested_at = db.Column(db.DateTime(timezone=True), nullable=False, default=_utcnow)
+
+class IngredientRecord(db.Model):
+    __tablename__ = 'recipe_ingredient'
+    __table_args__ = (
+        db.Index('ix_recipe_ingredient_recipe', 'recipe_id', 'position'),
+        db.Index('ix_recipe_ingredient_name', 'name'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipe.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    external_id = db.Column(db.String(64), nullable=False, default='')
+    name = db.Column(db.String(255), nullable=False)
+    amount = db.Column(db.String(64), nullable=False, default='')
+    unit = db.Column(db.String(64))
+    notes = db.Column(db.Text)
+
+class ToolRecord(db.Model):
+    __tablename__ = 'recipe_tool'
+    __table_args__ = (
+        db.Index('ix_recipe_tool_recipe', 'recipe_id', 'position'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipe.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    external_id = db.Column(db.String(64), nullable=False, default='')
+    name = db.Column(db.String(255), nullable=False)
+    required = db.Column(db.Boolean, nullable=False, default=True)
+    safety_notes = db.Column(db.JSON, nullable=False, default=list)
+
+class StepRecord(db.Model):
+    __tablename__ = 'recipe_step'
+    __table_args__ = (
+        db.Index('ix_recipe_step_recipe', 'recipe_id', 'position'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipe.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    external_id = db.Column(db.String(64), nullable=False, default='')
+    step_number = db.Column(db.Integer, nullable=False)
+    instruction = db.Column(db.Text, nullable=False)
+    estimated_time = db.Column(db.Integer)
+    difficulty = db.Column(db.String(20))
+    safety_warnings = db.Column(db.JSON, nullable=False, default=list)
+    required_tools = db.Column(db.JSON, nullable=False, default=list)
+    tips = db.Column(db.JSON, nullable=False, default=list)
+
+class AlternativeRecord(db.Model):
+    """
+    An accessible alternative for one ingredient, tool or step; exactly one
+    of the three parent columns is set
+    """
+    __tablename__ = 'recipe_alternative'
+    __table_args__ = (
+        db.Index('ix_recipe_alternative_recipe', 'recipe_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipe.id', ondelete='CASCADE'), nullable=False)
+    ingredient_id = db.Column(db.Integer, db.ForeignKey('recipe_ingredient.id', ondelete='CASCADE'))
+    tool_id = db.Column(db.Integer, db.ForeignKey('recipe_tool.id', ondelete='CASCADE'))
+    step_id = db.Column(db.Integer, db.ForeignKey('recipe_step.id', ondelete='CASCADE'))
+    position = db.Column(db.Integer, nullable=False)
+    external_id = db.Column(db.String(64), nullable=False, default='')
+    # Ingredient and tool alternatives have a name, step alternatives an instruction
+    name = db.Column(db.String(255))
+    instruction = db.Column(db.Text)
+    amount = db.Column(db.String(64))
+    unit = db.Column(db.String(64))
+    reason = db.Column(db.Text, nullable=False, default='')
+    accessibility_benefit = db.Column(db.Text)
+    tool_changes = db.Column(db.JSON)
+    time_adjustment = db.Column(db.Integer)
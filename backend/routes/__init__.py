@@ -1,2 +1,4 @@
 from .user_routes import user_bp
 from .agent_routes import agent_bp
+from .recipe_routes import recipe_bp
+from .metrics_routes import metrics_bp
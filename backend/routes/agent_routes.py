@@ -1,4 +1,5 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from backend.services import recipe_store
 from backend.services.ai_agent_service import AIAgentService
 
 agent_bp = Blueprint('agent_bp', __name__)
@@ -14,8 +15,12 @@ def run_agent():
     try:
         # Use AI service for recipe generation
         recipe = ai_service.generate_recipe(user_input, preferences)
+        recipe_store.save_generated_recipe(recipe)
         response = {"status": "success", "recipe": recipe}
         return jsonify(response), 200
+    except TimeoutError as e:
+        response = {"status": "error", "message": str(e)}
+        return jsonify(response), 504
     except Exception as e:
         response = {"status": "error", "message": str(e)}
         return jsonify(response), 500
@@ -31,19 +36,39 @@ def ask_question():
         answer = ai_service.ask_question(question, preferences)
         response = {"status": "success", "answer": answer}
         return jsonify(response), 200
+    except TimeoutError as e:
+        response = {"status": "error", "message": str(e)}
+        return jsonify(response), 504
     except Exception as e:
         response = {"status": "error", "message": str(e)}
         return jsonify(response), 500
 
+@agent_bp.route('/agent/ask/stream', methods=['POST'])
+def ask_question_stream():
+    """Stream the agent's answer as plain text while it is generated"""
+    payload = request.json or {}
+    question = payload.get('question', '')
+    preferences = payload.get('preferences', {})
+
+    def generate():
+        try:
+            for chunk in ai_service.stream_answer(question, preferences):
+                yield chunk
+        except Exception as e:
+            yield f"\n[error] {str(e)}"
+
+    return Response(stream_with_context(generate()), mimetype='text/plain')
+
 @agent_bp.route('/agent/suggestions', methods=['POST'])
 def get_suggestions():
     """Get recipe suggestions based on preferences"""
     payload = request.json or {}
     preferences = payload.get('preferences', {})
     limit = payload.get('limit', 5)
+    query = payload.get('query', '')
 
     try:
-        suggestions = ai_service.get_recipe_suggestions(preferences, limit)
+        suggestions = ai_service.get_recipe_suggestions(preferences, limit, query)
         response = {"status": "success", "suggestions": suggestions}
         return jsonify(response), 200
     except Exception as e:
@@ -60,6 +85,12 @@ def validate_recipe():
         validated_recipe = ai_service.validate_recipe(recipe)
         response = {"status": "success", "recipe": validated_recipe}
         return jsonify(response), 200
+    except ValueError as e:
+        response = {"status": "error", "message": str(e)}
+        return jsonify(response), 400
+    except TimeoutError as e:
+        response = {"status": "error", "message": str(e)}
+        return jsonify(response), 504
     except Exception as e:
         response = {"status": "error", "message": str(e)}
         return jsonify(response), 500
@@ -0,0 +1,10 @@
+from flask import Blueprint, Response
+
+from metrics import CONTENT_TYPE, render_latest
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: request, span, TTFT and token histograms"""
+    return Response(render_latest(), mimetype=CONTENT_TYPE)
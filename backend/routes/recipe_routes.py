@@ -0,0 +1,53 @@
+from flask import Blueprint, request, jsonify
+from backend.services import recipe_store
+
+recipe_bp = Blueprint('recipe_bp', __name__)
+
+@recipe_bp.route('/recipes', methods=['GET'])
+def list_recipes():
+    """List stored recipes, newest first, one keyset page at a time"""
+    source_url = request.args.get('source_url')
+    if source_url:
+        # Lets clients check for a stored copy before asking for a scrape
+        recipe = recipe_store.find_by_source_url(source_url)
+        return jsonify({"status": "success", "recipes": [recipe] if recipe else [], "next_cursor": None}), 200
+
+    try:
+        limit = request.args.get('limit', recipe_store.RECIPE_PAGE_SIZE, type=int)
+        cursor = request.args.get('cursor', type=int)
+        max_time = request.args.get('max_time', type=int)
+        recipes, next_cursor = recipe_store.list_recipes(
+            limit=limit,
+            cursor=cursor,
+            difficulty=request.args.get('difficulty'),
+            max_time=max_time,
+        )
+        response = {"status": "success", "recipes": recipes, "next_cursor": next_cursor}
+        return jsonify(response), 200
+    except Exception as e:
+        response = {"status": "error", "message": str(e)}
+        return jsonify(response), 500
+
+@recipe_bp.route('/recipes/<recipe_id>', methods=['GET'])
+def get_recipe(recipe_id):
+    """Get one stored recipe with its ingredients, tools, steps and alternatives"""
+    recipe = recipe_store.get_recipe(recipe_id)
+    if recipe is None:
+        return jsonify({"status": "error", "message": "Recipe not found"}), 404
+    return jsonify({"status": "success", "recipe": recipe}), 200
+
+@recipe_bp.route('/recipes', methods=['POST'])
+def ingest_recipes():
+    """Store one recipe or {"recipes": [...]}; recipes already stored are skipped"""
+    payload = request.json or {}
+    recipes = payload.get('recipes') if isinstance(payload, dict) and 'recipes' in payload else [payload]
+    if not isinstance(recipes, list):
+        return jsonify({"status": "error", "message": "recipes must be a list"}), 400
+
+    try:
+        counts = recipe_store.ingest_recipes(recipes)
+        response = {"status": "success", **counts}
+        return jsonify(response), 201 if counts["inserted"] else 200
+    except Exception as e:
+        response = {"status": "error", "message": str(e)}
+        return jsonify(response), 500
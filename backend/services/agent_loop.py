@@ -0,0 +1,137 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Iterator, Optional, Tuple
+
+import tracing
+
+# Marks the end of a stream in the queue returned by AgentLoop.start_stream
+STREAM_END = object()
+
+
+class AgentLoop:
+    """
+    One long-lived asyncio event loop on a daemon thread, shared by every
+    ADK call made from sync code (Flask routes, Socket.IO handlers).
+
+    Coroutines are handed over with `run_coroutine_threadsafe`, so there is
+    no `asyncio.run` per request. The ADK runner, its session service and the
+    genai HTTP client all live on this loop and keep their connections
+    between calls. At most `max_concurrency` calls run at once.
+    """
+
+    def __init__(self, name: str = "adk-agent-loop", max_concurrency: int = 8):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The background loop, started on first use."""
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                ready = threading.Event()
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._run_loop, args=(self._loop, ready), name=self.name, daemon=True
+                )
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def _run_loop(self, loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    async def _limited(self, coro: Awaitable, timeout: Optional[float]) -> Any:
+        async with self._semaphore:
+            return await asyncio.wait_for(coro, timeout)
+
+    def submit(self, coro: Awaitable, timeout: Optional[float] = None) -> Future:
+        """
+        Schedule a coroutine on the loop and return a concurrent Future.
+        The timeout is enforced on the loop, so a slow call is cancelled
+        there instead of left running. The caller's current span stays the
+        parent of the spans the coroutine starts.
+        """
+        coro = tracing.bind(coro, tracing.current_span())
+        return asyncio.run_coroutine_threadsafe(self._limited(coro, timeout), self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block until it finishes."""
+        future = self.submit(coro, timeout)
+        try:
+            # A little slack so the loop side raises the timeout first
+            return future.result(None if timeout is None else timeout + 1)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Agent call timed out after {timeout}s")
+
+    async def run_async(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Await a coroutine on the agent loop from a different event loop."""
+        try:
+            return await asyncio.wrap_future(self.submit(coro, timeout))
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Agent call timed out after {timeout}s")
+
+    def start_stream(self, agen: AsyncIterator, timeout: Optional[float] = None) -> Tuple[Future, queue.Queue]:
+        """
+        Pump an async generator on the loop into a thread-safe queue. Items
+        arrive as they are produced, followed by `(STREAM_END, error)`.
+        Cancelling the returned future stops the generator.
+        """
+        items: queue.Queue = queue.Queue()
+
+        async def pump():
+            try:
+                async with aclosing(agen):
+                    async for item in agen:
+                        items.put((item, None))
+            except asyncio.CancelledError:
+                items.put((STREAM_END, TimeoutError(f"Agent stream timed out after {timeout}s")))
+                raise
+            except Exception as e:
+                items.put((STREAM_END, e))
+            else:
+                items.put((STREAM_END, None))
+
+        return self.submit(pump(), timeout), items
+
+    def iterate(self, agen: AsyncIterator, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Iterate an async generator from sync code. `timeout` bounds the whole
+        stream; closing the iterator early stops the generator.
+        """
+        future, items = self.start_stream(agen, timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout + 1
+        try:
+            while True:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    item, error = items.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError(f"Agent stream timed out after {timeout}s")
+                if item is STREAM_END:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            future.cancel()
+
+    def stop(self):
+        """Stop the loop thread; it restarts on next use."""
+        with self._lock:
+            if self._loop is not None and self._thread.is_alive():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=5)
+            self._loop = None
+            self._thread = None
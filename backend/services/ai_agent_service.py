@@ -1,34 +1,93 @@
 import asyncio
 import json
+import os
+import queue
+import threading
 import time
-from typing import Dict, Any, Callable, Optional
+import uuid
+from concurrent.futures import Future
+from contextlib import aclosing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+
+import agent
+import tracing
+from backend.services.agent_loop import AgentLoop
+from json_extract import JSONObjectExtractor
+from recipe_model import Recipe
+from recipe_parser import validate_recipe
+from recipe_search import RecipeSearchIndex, build_default_index
+from structured_logging import get_logger
+
+logger = get_logger("ai_agent_service")
+
+# Agent calls running at once on the shared loop, and the default per-call timeout
+AI_AGENT_WORKERS = int(os.environ.get("AI_AGENT_WORKERS", "8"))
+AI_AGENT_TIMEOUT = float(os.environ.get("AI_AGENT_TIMEOUT", "60"))
+
+# Recipe search: bundled corpus plus recipes scraped by the FastAPI server
+RECIPE_SEARCH_DIR = os.environ.get("RECIPE_SEARCH_DIR", "recipes")
+RECIPE_CACHE_PATH = os.environ.get("RECIPE_CACHE_PATH", "recipe_cache.db")
+RECIPE_SEARCH_SYNC_INTERVAL = float(os.environ.get("RECIPE_SEARCH_SYNC_INTERVAL", "60"))
+
+# Energy level -> (max minutes, allowed difficulties) for suggestions
+ENERGY_LEVEL_FILTERS = {
+    "low": (30, ["Easy"]),
+    "medium": (60, ["Easy", "Medium"]),
+}
+
+# The recipe format the frontend expects, shown to the agent when generating
+RECIPE_FORMAT = (Path(__file__).resolve().parents[2] / "example-recipe-structure.json").read_text(encoding="utf-8")
+
+# Static start of every generation prompt, so requests share a cacheable prefix
+RECIPE_PROMPT_PREFIX = (
+    "Include accessible alternatives for ingredients, tools and steps that suit my needs. "
+    "Return ONLY a valid JSON object in exactly this format:\n"
+    f"{RECIPE_FORMAT}\n\n"
+)
+
+# One background event loop for every AIAgentService instance
+agent_loop = AgentLoop(max_concurrency=AI_AGENT_WORKERS)
+
+def _with_preferences(text: str, preferences: Dict[str, Any]) -> str:
+    if not preferences:
+        return text
+    return f"My cooking preferences and accessibility needs: {json.dumps(preferences)}\n\n{text}"
 
 class AIAgentService:
     """
     Service for handling AI agent interactions for recipe generation and cooking assistance.
-    This is a placeholder implementation that can be replaced with actual AI agent integration.
+    Calls go to the ADK `root_agent` from agent.py on a shared background event loop,
+    with sync, asyncio and streaming entry points.
     """
     
-    def __init__(self):
+    def __init__(self, loop: AgentLoop = agent_loop):
         self.agent_initialized = False
+        self.loop = loop
+        self._search_index: Optional[RecipeSearchIndex] = None
+        self._search_lock = threading.Lock()
+        self._search_synced_at = 0.0
         self.initialize_agent()
     
     def initialize_agent(self):
-        """Initialize the AI agent (placeholder for actual agent setup)"""
-        # TODO: Replace with actual AI agent initialization
-        # Example: agent = create_or_load_adk_agent(...)
+        """Initialize the ADK agent and its shared runner"""
+        self.agent = agent.root_agent
+        agent.get_runner(self.agent)
         self.agent_initialized = True
-        print("AI Agent initialized (placeholder)")
+        logger.info("AI Agent initialized", extra={"agent": self.agent.name})
     
     def generate_recipe(self, user_input: str, preferences: Dict[str, Any], 
-                       progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
+                       progress_callback: Optional[Callable] = None,
+                       timeout: float = AI_AGENT_TIMEOUT) -> Dict[str, Any]:
         """
         Generate a recipe based on user input and preferences
         
         Args:
             user_input: User's recipe request
             preferences: User's dietary and cooking preferences
-            progress_callback: Function to call with progress updates
+            progress_callback: Function to call with progress updates (runs on the agent loop thread)
+            timeout: Seconds before the agent call is cancelled
             
         Returns:
             Generated recipe dictionary
@@ -36,63 +95,120 @@ class AIAgentService:
         if not self.agent_initialized:
             raise Exception("AI agent not initialized")
         
-        # Simulate progress updates
-        if progress_callback:
-            progress_callback(20, "Understanding your request...")
-            time.sleep(0.5)
-            
-            progress_callback(40, "Analyzing dietary preferences...")
-            time.sleep(0.5)
-            
-            progress_callback(60, "Generating recipe suggestions...")
-            time.sleep(0.5)
-            
-            progress_callback(80, "Finalizing recipe details...")
-            time.sleep(0.5)
-        
-        # TODO: Replace with actual AI agent call
-        # Example: response = agent.run(user_input, preferences=preferences)
-        
-        # Placeholder recipe response
-        recipe = {
-            "id": f"recipe_{int(time.time())}",
-            "title": f"Custom Recipe for: {user_input}",
-            "description": f"A delicious recipe tailored to your request: {user_input}",
-            "ingredients": [
-                {"name": "Ingredient 1", "amount": "1 cup", "notes": "Fresh if possible"},
-                {"name": "Ingredient 2", "amount": "2 tbsp", "notes": "Optional"},
-                {"name": "Ingredient 3", "amount": "1 tsp", "notes": "To taste"}
-            ],
-            "instructions": [
-                "Step 1: Prepare your ingredients according to your preferences",
-                "Step 2: Follow the cooking method that suits your energy level",
-                "Step 3: Adjust seasoning to your taste",
-                "Step 4: Serve and enjoy!"
-            ],
-            "cooking_time": "30 minutes",
-            "difficulty": "Easy",
-            "servings": 4,
-            "dietary_tags": preferences.get('dietary_needs', []),
-            "cooking_method": preferences.get('cooking_preference', 'stovetop'),
-            "energy_level": preferences.get('energy_level', 'medium'),
-            "accessibility_notes": [
-                "This recipe can be adapted for different mobility needs",
-                "Consider using pre-cut ingredients if needed",
-                "Use kitchen tools that work best for you"
-            ],
-            "created_at": time.time(),
-            "user_preferences_applied": preferences
-        }
-        
-        return recipe
+        return self.loop.run(self._generate_recipe(user_input, preferences, progress_callback), timeout)
     
-    def ask_question(self, question: str, preferences: Dict[str, Any]) -> str:
+    def generate_recipe_async(self, user_input: str, preferences: Dict[str, Any],
+                              timeout: float = AI_AGENT_TIMEOUT) -> Tuple[Future, queue.Queue]:
+        """
+        Start recipe generation without blocking
+        
+        Returns:
+            The future for the recipe and a queue of updates that the caller
+            drains from its own thread or greenlet:
+            {"type": "progress", "progress", "message"} and
+            {"type": "partial", "section", "index", "item", "offset"}
+        """
+        if not self.agent_initialized:
+            raise Exception("AI agent not initialized")
+        
+        updates: queue.Queue = queue.Queue()
+        future = self.loop.submit(
+            self._generate_recipe(
+                user_input, preferences,
+                lambda percent, message: updates.put({"type": "progress", "progress": percent, "message": message}),
+                lambda section, index, item, offset: updates.put({
+                    "type": "partial", "section": section, "index": index, "item": item, "offset": offset
+                })
+            ),
+            timeout
+        )
+        return future, updates
+    
+    async def agenerate_recipe(self, user_input: str, preferences: Dict[str, Any],
+                               timeout: float = AI_AGENT_TIMEOUT) -> Dict[str, Any]:
+        """Generate a recipe from asyncio code running on another event loop"""
+        return await self.loop.run_async(self._generate_recipe(user_input, preferences, None), timeout)
+    
+    async def _generate_recipe(self, user_input: str, preferences: Dict[str, Any],
+                               progress_callback: Optional[Callable],
+                               partial_callback: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        Stream the agent's recipe JSON. `partial_callback(section, index, item, offset)`
+        gets each ingredient, tool and step as soon as it has been generated,
+        preceded by a "meta" section with the top-level fields seen so far.
+        """
+        report = progress_callback or (lambda percent, message: None)
+        report(20, "Understanding your request...")
+        
+        with tracing.span("prompt.build", prompt="generate_recipe"):
+            prompt = RECIPE_PROMPT_PREFIX + _with_preferences(
+                f"Create a recipe for this request: {user_input}", preferences
+            )
+        extractor = JSONObjectExtractor()
+        chunks = []
+        recipe = None
+        sent_meta = False
+        extract_seconds = 0.0
+        stream = agent.stream_agent_async(prompt, usage=agent.TurnUsage("generate_recipe"))
+        async with aclosing(stream):
+            async for chunk in stream:
+                if not chunks:
+                    report(40, "Analyzing dietary preferences...")
+                chunks.append(chunk)
+                extract_started = time.perf_counter()
+                was_in_object = extractor.in_object
+                for candidate in extractor.feed(chunk):
+                    if isinstance(candidate, dict) and not validate_recipe(candidate):
+                        recipe = candidate
+                        break
+                if partial_callback:
+                    for section, index, item in extractor.drain_items():
+                        if not sent_meta:
+                            current = extractor.partial() or recipe or {}
+                            meta = {key: value for key, value in current.items() if not isinstance(value, list)}
+                            partial_callback("meta", 0, meta, extractor.offset)
+                            sent_meta = True
+                        partial_callback(section, index, item, extractor.offset)
+                extract_seconds += time.perf_counter() - extract_started
+                if recipe is not None:
+                    break
+                if extractor.in_object and not was_in_object:
+                    report(60, "Generating recipe suggestions...")
+        
+        report(80, "Finalizing recipe details...")
+        with tracing.span("json.extract", chars=sum(map(len, chunks)),
+                          streamed_ms=round(extract_seconds * 1000, 2)):
+            if recipe is None:
+                partial = extractor.partial()
+                found = [candidate for candidate in extractor.close() if isinstance(candidate, dict)]
+                recipe = next((candidate for candidate in found if not validate_recipe(candidate)), None)
+                if recipe is None and partial and partial.get("title"):
+                    recipe = {**partial, "incomplete": True}
+        if recipe is None:
+            return {
+                "id": f"recipe-{uuid.uuid4().hex[:12]}",
+                "title": f"Custom Recipe for: {user_input}",
+                "raw_content": "".join(chunks),
+                "user_preferences_applied": preferences,
+            }
+        
+        # The prompt's example recipe has an id and source URL the model tends
+        # to copy, so a generated recipe always gets a fresh id and no source
+        recipe["id"] = f"recipe-{uuid.uuid4().hex[:12]}"
+        recipe.pop("sourceUrl", None)
+        recipe.setdefault("createdAt", datetime.now(timezone.utc).isoformat())
+        with tracing.span("serialize"):
+            return Recipe.from_dict(recipe).to_dict()
+    
+    def ask_question(self, question: str, preferences: Dict[str, Any],
+                     timeout: float = AI_AGENT_TIMEOUT) -> str:
         """
         Answer cooking-related questions
         
         Args:
             question: User's cooking question
             preferences: User's preferences for context
+            timeout: Seconds before the agent call is cancelled
             
         Returns:
             AI agent's answer
@@ -100,68 +216,121 @@ class AIAgentService:
         if not self.agent_initialized:
             raise Exception("AI agent not initialized")
         
-        # TODO: Replace with actual AI agent call
-        # Example: response = agent.run(question, context=preferences)
+        return self.loop.run(agent.call_agent_async(_with_preferences(question, preferences)), timeout)
+    
+    def ask_question_future(self, question: str, preferences: Dict[str, Any],
+                            timeout: float = AI_AGENT_TIMEOUT) -> Future:
+        """Start answering a question without blocking"""
+        if not self.agent_initialized:
+            raise Exception("AI agent not initialized")
         
-        # Placeholder response
-        answer = f"Based on your preferences and the question '{question}', here's my advice: "
-        answer += "This is a placeholder response. The actual AI agent will provide detailed, "
-        answer += "personalized cooking advice based on your specific needs and preferences."
+        return self.loop.submit(agent.call_agent_async(_with_preferences(question, preferences)), timeout)
+    
+    async def aask_question(self, question: str, preferences: Dict[str, Any],
+                            timeout: float = AI_AGENT_TIMEOUT) -> str:
+        """Answer a question from asyncio code running on another event loop"""
+        return await self.loop.run_async(agent.call_agent_async(_with_preferences(question, preferences)), timeout)
+    
+    def stream_answer(self, question: str, preferences: Dict[str, Any],
+                      timeout: float = AI_AGENT_TIMEOUT) -> Iterator[str]:
+        """Yield the answer text as the agent generates it"""
+        if not self.agent_initialized:
+            raise Exception("AI agent not initialized")
         
-        return answer
+        return self.loop.iterate(agent.stream_agent_async(_with_preferences(question, preferences)), timeout)
+    
+    @property
+    def search_index(self) -> RecipeSearchIndex:
+        """Recipe search index, built on first use and synced with the scrape cache"""
+        with self._search_lock:
+            if self._search_index is None:
+                self._search_index = build_default_index(RECIPE_SEARCH_DIR, RECIPE_CACHE_PATH)
+                self._search_synced_at = time.time()
+            elif time.time() - self._search_synced_at > RECIPE_SEARCH_SYNC_INTERVAL:
+                self._search_index.sync_cache(RECIPE_CACHE_PATH)
+                self._search_synced_at = time.time()
+        return self._search_index
     
-    def get_recipe_suggestions(self, preferences: Dict[str, Any], limit: int = 5) -> list:
+    def get_recipe_suggestions(self, preferences: Dict[str, Any], limit: int = 5,
+                               query: str = "") -> list:
         """
         Get recipe suggestions based on preferences
         
         Args:
-            preferences: User's preferences
+            preferences: User's preferences (dietary_needs, accessibility_needs,
+                energy_level, max_time, difficulty)
             limit: Maximum number of suggestions
+            query: Optional free-text search over titles, descriptions and ingredients
             
         Returns:
-            List of recipe suggestions
+            List of recipe suggestions, best match first
         """
         if not self.agent_initialized:
             raise Exception("AI agent not initialized")
         
-        # TODO: Replace with actual AI agent call
-        # Example: suggestions = agent.get_suggestions(preferences, limit)
+        max_time, difficulty = ENERGY_LEVEL_FILTERS.get(preferences.get('energy_level'), (None, None))
+        if preferences.get('max_time'):
+            max_time = int(preferences['max_time'])
+        if preferences.get('difficulty'):
+            difficulty = preferences['difficulty']
+            difficulty = [difficulty] if isinstance(difficulty, str) else difficulty
         
-        # Placeholder suggestions
+        results = self.search_index.search(
+            query,
+            limit=limit,
+            dietary_tags=preferences.get('dietary_needs') or None,
+            accessibility_tags=preferences.get('accessibility_needs') or None,
+            difficulty=difficulty,
+            max_time=max_time,
+        )
+        
+        top_score = results[0]["score"] if results else 0
         suggestions = []
-        for i in range(min(limit, 3)):
+        for result in results:
             suggestions.append({
-                "id": f"suggestion_{i+1}",
-                "title": f"Suggested Recipe {i+1}",
-                "description": f"A great recipe that matches your preferences",
-                "match_score": 0.9 - (i * 0.1),
-                "dietary_tags": preferences.get('dietary_needs', [])
+                **result,
+                "match_score": round(result["score"] / top_score, 3) if top_score else 1.0,
+                "dietary_tags": result.get("dietaryTags") or [],
             })
         
         return suggestions
     
-    def validate_recipe(self, recipe: Dict[str, Any]) -> Dict[str, Any]:
+    def validate_recipe(self, recipe: Dict[str, Any],
+                        timeout: float = AI_AGENT_TIMEOUT) -> Dict[str, Any]:
         """
-        Validate and improve a recipe for accessibility
+        Validate a recipe and have the agent add accessibility alternatives
         
         Args:
             recipe: Recipe to validate
+            timeout: Seconds before the agent call is cancelled
             
         Returns:
-            Validated and improved recipe
+            The recipe in the app's format with the agent's alternatives merged
+            in, and `accessibility_improvements` describing what was added
+            
+        Raises:
+            ValueError: The recipe is missing a title, ingredients or steps
         """
         if not self.agent_initialized:
             raise Exception("AI agent not initialized")
         
-        # TODO: Replace with actual AI agent validation
-        # Example: validated_recipe = agent.validate_recipe(recipe)
+        problems = validate_recipe(recipe)
+        if problems:
+            raise ValueError(f"Recipe is not valid: {'; '.join(problems)}")
         
-        # Placeholder validation
-        validated_recipe = recipe.copy()
-        validated_recipe['accessibility_improvements'] = [
-            "Added alternative cooking methods",
-            "Included timing suggestions for different energy levels",
-            "Added ingredient substitution options"
-        ]
+        normalized = Recipe.from_dict(recipe).to_dict()
+        before = {}
+        for section, prefix in (("ingredients", "ing"), ("tools", "tool"), ("steps", "step")):
+            # Alternatives are matched to items by id, so every item needs one
+            for position, item in enumerate(normalized[section], 1):
+                item["id"] = item["id"] or f"{prefix}-{position}"
+            before[section] = sum(len(item["alternatives"]) for item in normalized[section])
         
+        validated_recipe = self.loop.run(agent.add_accessibility_alternatives(normalized), timeout)
+        improvements = []
+        for section, label in (("ingredients", "ingredient"), ("tools", "tool"), ("steps", "step")):
+            added = sum(len(item["alternatives"]) for item in validated_recipe[section]) - before[section]
+            if added:
+                improvements.append(f"Added {added} {label} alternative{'s' if added != 1 else ''}")
+        validated_recipe["accessibility_improvements"] = improvements
         return validated_recipe
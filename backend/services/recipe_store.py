@@ -0,0 +1,370 @@
+import json
+import os
+import sqlite3
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+import tracing
+from backend.models import db
+from backend.models.recipe_models import (
+    RecipeRecord, IngredientRecord, ToolRecord, StepRecord, AlternativeRecord
+)
+from recipe_cache import cache_key
+from recipe_model import (
+    Recipe, Ingredient, IngredientAlternative, NutritionInfo, RecipeStep,
+    StepAlternative, Tool, ToolAlternative
+)
+from recipe_parser import scraper_json_to_recipe
+from structured_logging import get_logger
+
+logger = get_logger("recipe_store")
+
+# Recipes written per executemany batch, and the page sizes for listing
+RECIPE_INGEST_BATCH = int(os.environ.get("RECIPE_INGEST_BATCH", "500"))
+RECIPE_PAGE_SIZE = int(os.environ.get("RECIPE_PAGE_SIZE", "20"))
+RECIPE_MAX_PAGE_SIZE = int(os.environ.get("RECIPE_MAX_PAGE_SIZE", "100"))
+# Longest recipe id the external_id columns hold; longer item ids are clipped
+RECIPE_ID_MAX_LENGTH = 64
+
+# Fields of a list entry; the full recipe comes from get_recipe()
+SUMMARY_COLUMNS = (
+    RecipeRecord.id, RecipeRecord.external_id, RecipeRecord.title, RecipeRecord.description,
+    RecipeRecord.estimated_time, RecipeRecord.difficulty, RecipeRecord.servings,
+    RecipeRecord.dietary_tags, RecipeRecord.accessibility_tags, RecipeRecord.image_url,
+    RecipeRecord.source_url, RecipeRecord.created_at,
+)
+
+def source_key(url: Optional[str]) -> Optional[str]:
+    return cache_key(url) if url else None
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+#
+# Ingest
+#
+
+def _recipe_row(recipe: Recipe) -> Dict[str, Any]:
+    return {
+        "external_id": recipe.id,
+        "source_key": source_key(recipe.sourceUrl),
+        "source_url": recipe.sourceUrl,
+        "title": recipe.title[:255],
+        "description": recipe.description,
+        "estimated_time": recipe.estimatedTime,
+        "difficulty": recipe.difficulty[:20],
+        "servings": recipe.servings,
+        "dietary_tags": list(recipe.dietaryTags),
+        "accessibility_tags": list(recipe.accessibilityTags),
+        "image_url": recipe.imageUrl,
+        "nutrition_info": recipe.nutritionInfo.to_dict() if recipe.nutritionInfo else None,
+        "is_favorite": recipe.isFavorite,
+        "created_at": recipe.createdAt,
+        "extras": recipe.extras,
+    }
+
+def _alternative_row(recipe_id: int, position: int, alt: Any, **parent) -> Dict[str, Any]:
+    return {
+        "recipe_id": recipe_id,
+        "ingredient_id": parent.get("ingredient_id"),
+        "tool_id": parent.get("tool_id"),
+        "step_id": parent.get("step_id"),
+        "position": position,
+        "external_id": alt.id[:RECIPE_ID_MAX_LENGTH],
+        "name": getattr(alt, "name", None),
+        "instruction": getattr(alt, "instruction", None),
+        "amount": getattr(alt, "amount", None),
+        "unit": getattr(alt, "unit", None),
+        "reason": alt.reason,
+        "accessibility_benefit": alt.accessibilityBenefit,
+        "tool_changes": getattr(alt, "toolChanges", None),
+        "time_adjustment": getattr(alt, "timeAdjustment", None),
+    }
+
+def _child_ids(model, recipe_ids: List[int]) -> Dict[Tuple[int, int], int]:
+    """(recipe_id, position) -> primary key for the rows just inserted"""
+    rows = db.session.execute(
+        select(model.id, model.recipe_id, model.position).where(model.recipe_id.in_(recipe_ids))
+    )
+    return {(recipe_id, position): row_id for row_id, recipe_id, position in rows}
+
+def _existing(recipes: List[Recipe]) -> Tuple[set, set]:
+    external_ids = [recipe.id for recipe in recipes]
+    keys = [key for key in (source_key(recipe.sourceUrl) for recipe in recipes) if key]
+    ids = set(db.session.scalars(
+        select(RecipeRecord.external_id).where(RecipeRecord.external_id.in_(external_ids))
+    ))
+    found_keys = set(db.session.scalars(
+        select(RecipeRecord.source_key).where(RecipeRecord.source_key.in_(keys))
+    )) if keys else set()
+    return ids, found_keys
+
+def _insert_batch(recipes: List[Recipe]) -> int:
+    """Insert recipes not stored yet, one executemany per table. Returns how many were new."""
+    stored_ids, stored_keys = _existing(recipes)
+    batch = []
+    for recipe in recipes:
+        key = source_key(recipe.sourceUrl)
+        if recipe.id in stored_ids or (key and key in stored_keys):
+            continue
+        stored_ids.add(recipe.id)
+        if key:
+            stored_keys.add(key)
+        batch.append(recipe)
+    if not batch:
+        return 0
+
+    db.session.execute(insert(RecipeRecord), [_recipe_row(recipe) for recipe in batch])
+    recipe_ids = dict(db.session.execute(
+        select(RecipeRecord.external_id, RecipeRecord.id)
+        .where(RecipeRecord.external_id.in_([recipe.id for recipe in batch]))
+    ).all())
+
+    ingredients, tools, steps = [], [], []
+    for recipe in batch:
+        recipe_id = recipe_ids[recipe.id]
+        ingredients += [{
+            "recipe_id": recipe_id, "position": position, "external_id": item.id[:RECIPE_ID_MAX_LENGTH],
+            "name": item.name[:255], "amount": item.amount[:64], "unit": item.unit, "notes": item.notes,
+        } for position, item in enumerate(recipe.ingredients)]
+        tools += [{
+            "recipe_id": recipe_id, "position": position, "external_id": item.id[:RECIPE_ID_MAX_LENGTH],
+            "name": item.name[:255], "required": item.required, "safety_notes": list(item.safetyNotes),
+        } for position, item in enumerate(recipe.tools)]
+        steps += [{
+            "recipe_id": recipe_id, "position": position, "external_id": item.id[:RECIPE_ID_MAX_LENGTH],
+            "step_number": item.stepNumber, "instruction": item.instruction,
+            "estimated_time": item.estimatedTime, "difficulty": item.difficulty,
+            "safety_warnings": list(item.safetyWarnings), "required_tools": list(item.requiredTools),
+            "tips": list(item.tips),
+        } for position, item in enumerate(recipe.steps)]
+    for model, rows in ((IngredientRecord, ingredients), (ToolRecord, tools), (StepRecord, steps)):
+        if rows:
+            db.session.execute(insert(model), rows)
+
+    # Alternatives point at the ingredient/tool/step rows inserted above
+    ids = list(recipe_ids.values())
+    ingredient_ids = _child_ids(IngredientRecord, ids) if ingredients else {}
+    tool_ids = _child_ids(ToolRecord, ids) if tools else {}
+    step_ids = _child_ids(StepRecord, ids) if steps else {}
+    alternatives = []
+    for recipe in batch:
+        recipe_id = recipe_ids[recipe.id]
+        for parent, items, parent_ids in (("ingredient_id", recipe.ingredients, ingredient_ids),
+                                          ("tool_id", recipe.tools, tool_ids),
+                                          ("step_id", recipe.steps, step_ids)):
+            for position, item in enumerate(items):
+                alternatives += [
+                    _alternative_row(recipe_id, alt_position, alt, **{parent: parent_ids[(recipe_id, position)]})
+                    for alt_position, alt in enumerate(item.alternatives)
+                ]
+    if alternatives:
+        db.session.execute(insert(AlternativeRecord), alternatives)
+    return len(batch)
+
+@tracing.traced("recipe_store.ingest")
+def ingest_recipes(recipes: Iterable[Dict[str, Any]], batch_size: int = RECIPE_INGEST_BATCH) -> Dict[str, int]:
+    """
+    Store recipes in bulk, skipping any whose id or source URL is already
+    stored; recipes with ids longer than RECIPE_ID_MAX_LENGTH are invalid. Each batch is one transaction with one INSERT executemany per
+    table. Returns counts of inserted, skipped and invalid recipes.
+    """
+    parsed, invalid = [], 0
+    for data in recipes:
+        try:
+            recipe = Recipe.from_dict(data)
+        except ValueError:
+            invalid += 1
+            continue
+        if not recipe.id:
+            recipe.id = f"recipe-{uuid.uuid4().hex[:12]}"
+        elif len(recipe.id) > RECIPE_ID_MAX_LENGTH:
+            invalid += 1
+            continue
+        parsed.append(recipe)
+
+    inserted = 0
+    for batch in _chunks(parsed, max(1, batch_size)):
+        for attempt in range(2):
+            try:
+                added = _insert_batch(batch)
+                db.session.commit()
+                inserted += added
+                break
+            except IntegrityError:
+                # Another worker stored some of these first; check again
+                db.session.rollback()
+                if attempt:
+                    raise
+    return {"inserted": inserted, "skipped": len(parsed) - inserted, "invalid": invalid}
+
+def save_recipe(recipe: Dict[str, Any]) -> bool:
+    """Store one recipe unless it is already stored; True if it was new."""
+    return ingest_recipes([recipe])["inserted"] == 1
+
+def save_generated_recipe(recipe: Dict[str, Any]) -> bool:
+    """
+    Keep a recipe the agent generated. Raw text fallbacks and truncated
+    recipes are not stored; a storage failure never fails the request.
+    """
+    if "raw_content" in recipe or recipe.get("incomplete"):
+        return False
+    try:
+        return save_recipe(recipe)
+    except Exception:
+        db.session.rollback()
+        logger.warning("Could not store generated recipe", extra={"recipe_id": recipe.get("id")}, exc_info=True)
+        return False
+
+def ingest_directory(path: str) -> Dict[str, int]:
+    """Store the recipe-scrapers records in `path` (recipes/*.json)."""
+    recipes = []
+    for file_path in sorted(Path(path).glob("*.json")):
+        try:
+            recipes.append(scraper_json_to_recipe(json.loads(file_path.read_text(encoding="utf-8"))))
+        except (OSError, ValueError, TypeError, AttributeError):
+            logger.warning("Skipping unreadable recipe", extra={"file": file_path.name}, exc_info=True)
+    return ingest_recipes(recipes)
+
+def ingest_scrape_cache(path: str) -> Dict[str, int]:
+    """Store recipes scraped by the FastAPI server (recipe_cache.py)."""
+    if not Path(path).exists():
+        return {"inserted": 0, "skipped": 0, "invalid": 0}
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute("SELECT data FROM recipes").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        logger.warning("Could not read recipe cache", extra={"path": path}, exc_info=True)
+        return {"inserted": 0, "skipped": 0, "invalid": 0}
+    recipes = []
+    for (data,) in rows:
+        try:
+            recipes.append(json.loads(data))
+        except ValueError:
+            pass
+    return ingest_recipes(recipes)
+
+#
+# Reading
+#
+
+def _summary(row) -> Dict[str, Any]:
+    data = {
+        "id": row.external_id,
+        "title": row.title,
+        "description": row.description,
+        "estimatedTime": row.estimated_time,
+        "difficulty": row.difficulty,
+        "dietaryTags": row.dietary_tags or [],
+        "accessibilityTags": row.accessibility_tags or [],
+        "servings": row.servings,
+        "createdAt": row.created_at,
+    }
+    if row.image_url is not None:
+        data["imageUrl"] = row.image_url
+    if row.source_url is not None:
+        data["sourceUrl"] = row.source_url
+    return data
+
+def _load(record: RecipeRecord) -> Dict[str, Any]:
+    """Assemble a full recipe with one query per child table."""
+    def rows(model):
+        return db.session.scalars(
+            select(model).where(model.recipe_id == record.id).order_by(model.position)
+        ).all()
+
+    alternatives: Dict[Tuple[str, int], List[AlternativeRecord]] = {}
+    for alt in rows(AlternativeRecord):
+        parent = (("ingredient", alt.ingredient_id) if alt.ingredient_id is not None else
+                  ("tool", alt.tool_id) if alt.tool_id is not None else ("step", alt.step_id))
+        alternatives.setdefault(parent, []).append(alt)
+
+    recipe = Recipe(
+        id=record.external_id,
+        title=record.title,
+        description=record.description,
+        estimatedTime=record.estimated_time,
+        difficulty=record.difficulty,
+        dietaryTags=list(record.dietary_tags or []),
+        accessibilityTags=list(record.accessibility_tags or []),
+        servings=record.servings,
+        createdAt=record.created_at,
+        isFavorite=record.is_favorite,
+        imageUrl=record.image_url,
+        sourceUrl=record.source_url,
+        nutritionInfo=NutritionInfo.from_dict(record.nutrition_info) if record.nutrition_info else None,
+        extras=dict(record.extras or {}),
+        ingredients=[Ingredient(
+            id=item.external_id, name=item.name, amount=item.amount, unit=item.unit, notes=item.notes,
+            alternatives=[IngredientAlternative(
+                id=alt.external_id, name=alt.name or "", amount=alt.amount or "", reason=alt.reason,
+                unit=alt.unit, accessibilityBenefit=alt.accessibility_benefit,
+            ) for alt in alternatives.get(("ingredient", item.id), [])],
+        ) for item in rows(IngredientRecord)],
+        tools=[Tool(
+            id=item.external_id, name=item.name, required=item.required,
+            safetyNotes=list(item.safety_notes or []),
+            alternatives=[ToolAlternative(
+                id=alt.external_id, name=alt.name or "", reason=alt.reason,
+                accessibilityBenefit=alt.accessibility_benefit,
+            ) for alt in alternatives.get(("tool", item.id), [])],
+        ) for item in rows(ToolRecord)],
+        steps=[RecipeStep(
+            id=item.external_id, stepNumber=item.step_number, instruction=item.instruction,
+            estimatedTime=item.estimated_time, difficulty=item.difficulty,
+            safetyWarnings=list(item.safety_warnings or []),
+            requiredTools=list(item.required_tools or []), tips=list(item.tips or []),
+            alternatives=[StepAlternative(
+                id=alt.external_id, instruction=alt.instruction or "", reason=alt.reason,
+                accessibilityBenefit=alt.accessibility_benefit, toolChanges=alt.tool_changes,
+                timeAdjustment=alt.time_adjustment,
+            ) for alt in alternatives.get(("step", item.id), [])],
+        ) for item in rows(StepRecord)],
+    )
+    return recipe.to_dict()
+
+@tracing.traced("recipe_store.get")
+def get_recipe(external_id: str) -> Optional[Dict[str, Any]]:
+    record = db.session.scalars(
+        select(RecipeRecord).where(RecipeRecord.external_id == external_id)
+    ).first()
+    return _load(record) if record is not None else None
+
+def find_by_source_url(url: str) -> Optional[Dict[str, Any]]:
+    """The stored recipe scraped from `url` (after normalization), if any."""
+    record = db.session.scalars(
+        select(RecipeRecord).where(RecipeRecord.source_key == source_key(url))
+    ).first()
+    return _load(record) if record is not None else None
+
+@tracing.traced("recipe_store.list")
+def list_recipes(limit: int = RECIPE_PAGE_SIZE, cursor: Optional[int] = None,
+                 difficulty: Optional[str] = None,
+                 max_time: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    One page of recipe summaries, newest first. Keyset pagination: `cursor`
+    is the `next_cursor` of the previous page (the last row's key), so every
+    page is an index range scan instead of an OFFSET over earlier pages.
+    """
+    limit = max(1, min(limit, RECIPE_MAX_PAGE_SIZE))
+    query = select(*SUMMARY_COLUMNS).order_by(RecipeRecord.id.desc()).limit(limit + 1)
+    if cursor is not None:
+        query = query.where(RecipeRecord.id < cursor)
+    if difficulty:
+        query = query.where(RecipeRecord.difficulty == difficulty)
+    if max_time is not None:
+        query = query.where(RecipeRecord.estimated_time <= max_time)
+    rows = db.session.execute(query).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return [_summary(row) for row in rows[:limit]], next_cursor
+
+def recipe_count() -> int:
+    return db.session.scalar(select(db.func.count(RecipeRecord.id)))
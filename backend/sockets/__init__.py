@@ -3,6 +3,7 @@ from .agent_sockets import agent_handler
 
 def register_socket_events(socketio):
     """Register all SocketIO event handlers"""
+    agent_handler.init_socketio(socketio)
     
     @socketio.on('connect')
     def handle_connect(data=None):
@@ -16,6 +17,10 @@ def register_socket_events(socketio):
     def handle_generate_recipe(data):
         agent_handler.handle_generate_recipe(data)
     
+    @socketio.on('resume_recipe')
+    def handle_resume_recipe(data):
+        agent_handler.handle_resume_recipe(data)
+    
     @socketio.on('ask_question')
     def handle_ask_question(data):
         agent_handler.handle_ask_question(data)
@@ -1,32 +1,98 @@
+from flask import current_app
 from flask_socketio import emit, join_room, leave_room
 import json
+import os
+import queue
+import uuid
 import asyncio
+from backend.services import recipe_store
 from backend.services.ai_agent_service import AIAgentService
+from session_backends import create_session_backend
+
+# Seconds between checks for updates from the agent
+PROGRESS_POLL_INTERVAL = float(os.environ.get("AI_AGENT_PROGRESS_POLL_INTERVAL", "0.05"))
+# Socket sessions and recipe streams live here so every worker sees them
+SESSION_BACKEND_URL = os.environ.get("SESSION_BACKEND_URL", "memory://")
+SESSION_BACKEND_TTL = float(os.environ.get("SESSION_BACKEND_TTL", "86400"))
+# Seconds a recipe stream is kept so reconnecting clients can resume it
+RECIPE_STREAM_TTL = float(os.environ.get("RECIPE_STREAM_TTL", "3600"))
+
+class RecipeStream:
+    """
+    The recipe_partial events of one generate_recipe call, kept in the
+    session backend so a client can resume on any worker
+    """
+
+    def __init__(self, backend, stream_id, session_id):
+        self.backend = backend
+        self.stream_id = stream_id
+        self.session_id = session_id
+        self.seq = 0
+        backend.set(f"stream:{stream_id}", {'session_id': session_id}, RECIPE_STREAM_TTL)
+
+    def add(self, section, index, item, offset):
+        event = {
+            'stream_id': self.stream_id,
+            'offset': offset,
+            'section': section,
+            'index': index,
+            'item': item
+        }
+        # The list length after the append is the event's sequence number
+        self.seq = self.backend.append(f"stream:{self.stream_id}:events", event, RECIPE_STREAM_TTL)
+        return {**event, 'seq': self.seq}
+
+    def finish(self, event, payload):
+        """Store recipe_complete or recipe_error for clients that resume later"""
+        self.backend.set(f"stream:{self.stream_id}:final", [event, payload], RECIPE_STREAM_TTL)
+
+    @staticmethod
+    def load(backend, stream_id, last_seq=0):
+        """(session_id, events after last_seq, final or None) in one round trip"""
+        meta, events, final = (
+            backend.pipeline()
+            .get(f"stream:{stream_id}")
+            .list_range(f"stream:{stream_id}:events", max(last_seq, 0))
+            .get(f"stream:{stream_id}:final")
+            .execute()
+        )
+        if meta is None:
+            return None, [], None
+        events = [{**event, 'seq': last_seq + i + 1} for i, event in enumerate(events)]
+        return meta['session_id'], events, final
 
 class AgentSocketHandler:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.ai_service = AIAgentService()
-        self.active_sessions = {}
+        self.sessions = backend or create_session_backend(SESSION_BACKEND_URL, "a11yum:socket")
+        self.socketio = None
+
+    def init_socketio(self, socketio):
+        """Keep the server so background tasks can emit outside a request"""
+        self.socketio = socketio
 
     def handle_connect(self, data=None):
         """Handle client connection"""
         session_id = data.get('session_id') if data else None
         if session_id:
             join_room(session_id)
-            self.active_sessions[session_id] = {
+            self.sessions.set(f"session:{session_id}", {
                 'status': 'connected',
                 'user_preferences': None
-            }
-            emit('connected', {'message': 'Connected to AI agent', 'session_id': session_id})
+            }, SESSION_BACKEND_TTL)
+            emit('connected', {
+                'message': 'Connected to AI agent',
+                'session_id': session_id,
+                'node_id': current_app.config.get('NODE_ID')
+            })
         else:
             emit('error', {'message': 'Session ID required'})
 
     def handle_disconnect(self, data=None):
         """Handle client disconnection"""
         session_id = data.get('session_id') if data else None
-        if session_id and session_id in self.active_sessions:
+        if session_id and self.sessions.delete(f"session:{session_id}"):
             leave_room(session_id)
-            del self.active_sessions[session_id]
             emit('disconnected', {'message': 'Disconnected from AI agent'})
 
     def handle_generate_recipe(self, data):
@@ -40,40 +106,112 @@ class AgentSocketHandler:
             return
 
         # Update user preferences for this session
-        if session_id in self.active_sessions:
-            self.active_sessions[session_id]['user_preferences'] = user_preferences
+        self._set_preferences(session_id, user_preferences)
+
+        stream = RecipeStream(self.sessions, data.get('stream_id') or uuid.uuid4().hex, session_id)
 
         # Emit progress updates
         emit('recipe_progress', {
             'status': 'processing',
             'message': 'Analyzing your request...',
-            'progress': 10
+            'progress': 10,
+            'stream_id': stream.stream_id
         }, room=session_id)
 
+        # Generation runs on the agent's event loop thread; a background task
+        # relays its progress and partial results so this handler returns immediately
+        self.socketio.start_background_task(
+            self._run_generate_recipe, current_app._get_current_object(), stream, user_input, user_preferences
+        )
+
+    def _run_generate_recipe(self, app, stream, user_input, user_preferences):
         try:
-            # Generate recipe using AI agent
-            recipe = self.ai_service.generate_recipe(
-                user_input=user_input,
-                preferences=user_preferences,
-                progress_callback=lambda progress, message: emit('recipe_progress', {
-                    'status': 'processing',
-                    'message': message,
-                    'progress': progress
-                }, room=session_id)
-            )
+            future, updates = self.ai_service.generate_recipe_async(user_input, user_preferences)
+            while not future.done():
+                self._emit_updates(updates, stream)
+                self.socketio.sleep(PROGRESS_POLL_INTERVAL)
+            self._emit_updates(updates, stream)
+            recipe = future.result()
+            with app.app_context():
+                recipe_store.save_generated_recipe(recipe)
 
             # Send final recipe
-            emit('recipe_complete', {
+            final = ('recipe_complete', {
                 'status': 'success',
                 'recipe': recipe,
-                'message': 'Recipe generated successfully!'
-            }, room=session_id)
+                'message': 'Recipe generated successfully!',
+                'stream_id': stream.stream_id,
+                'seq': stream.seq
+            })
 
         except Exception as e:
+            final = ('recipe_error', {
+                'status': 'error',
+                'message': f'Failed to generate recipe: {str(e)}',
+                'stream_id': stream.stream_id,
+                'seq': stream.seq
+            })
+        stream.finish(*final)
+        self.socketio.emit(*final, room=stream.session_id)
+
+    def _emit_updates(self, updates, stream):
+        """
+        Forward queued agent updates to the session's room: progress as
+        recipe_progress, and each parsed ingredient, tool or step as a
+        recipe_partial with a per-stream sequence number
+        """
+        while True:
+            try:
+                update = updates.get_nowait()
+            except queue.Empty:
+                return
+            if update['type'] == 'partial':
+                event = stream.add(update['section'], update['index'], update['item'], update['offset'])
+                self.socketio.emit('recipe_partial', event, room=stream.session_id)
+            else:
+                self.socketio.emit('recipe_progress', {
+                    'status': 'processing',
+                    'message': update['message'],
+                    'progress': update['progress'],
+                    'stream_id': stream.stream_id
+                }, room=stream.session_id)
+
+    def _set_preferences(self, session_id, preferences):
+        """Store preferences on a connected session; False if it does not exist"""
+        key = f"session:{session_id}"
+        session = self.sessions.get(key)
+        if session is None:
+            return False
+        session['user_preferences'] = preferences
+        self.sessions.set(key, session, SESSION_BACKEND_TTL)
+        return True
+
+    def handle_resume_recipe(self, data):
+        """
+        Replay a recipe stream after a reconnect: every recipe_partial with a
+        seq above `last_seq`, then recipe_complete/recipe_error if it has
+        finished. Live events keep arriving through the session room, so
+        clients should ignore any seq they already have.
+        """
+        session_id = data.get('session_id')
+        try:
+            last_seq = int(data.get('last_seq') or 0)
+        except (TypeError, ValueError):
+            emit('error', {'message': 'last_seq must be an integer'})
+            return
+        owner, events, final = RecipeStream.load(self.sessions, data.get('stream_id'), last_seq)
+        if not session_id or owner != session_id:
             emit('recipe_error', {
                 'status': 'error',
-                'message': f'Failed to generate recipe: {str(e)}'
-            }, room=session_id)
+                'message': 'Recipe stream not found',
+                'stream_id': data.get('stream_id')
+            })
+            return
+
+        for event in events:
+            emit('recipe_partial', event)
+        if final is not None:
+            emit(*final)
 
     def handle_ask_question(self, data):
         """Handle cooking questions"""
@@ -84,24 +222,26 @@ class AgentSocketHandler:
             emit('error', {'message': 'Session ID required'})
             return
 
+        # Get user preferences for context
+        preferences = (self.sessions.get(f"session:{session_id}") or {}).get('user_preferences') or {}
+        self.socketio.start_background_task(self._run_ask_question, session_id, question, preferences)
+
+    def _run_ask_question(self, session_id, question, preferences):
         try:
-            # Get user preferences for context
-            preferences = self.active_sessions.get(session_id, {}).get('user_preferences', {})
-            
-            # Ask AI agent
-            answer = self.ai_service.ask_question(
-                question=question,
-                preferences=preferences
-            )
-
-            emit('question_answer', {
+            # Ask AI agent on its background event loop
+            future = self.ai_service.ask_question_future(question=question, preferences=preferences)
+            while not future.done():
+                self.socketio.sleep(PROGRESS_POLL_INTERVAL)
+            answer = future.result()
+
+            self.socketio.emit('question_answer', {
                 'status': 'success',
                 'question': question,
                 'answer': answer
             }, room=session_id)
 
         except Exception as e:
-            emit('question_error', {
+            self.socketio.emit('question_error', {
                 'status': 'error',
                 'message': f'Failed to answer question: {str(e)}'
             }, room=session_id)
@@ -115,8 +255,7 @@ class AgentSocketHandler:
             emit('error', {'message': 'Session ID required'})
             return
 
-        if session_id in self.active_sessions:
-            self.active_sessions[session_id]['user_preferences'] = preferences
+        if self._set_preferences(session_id, preferences):
             emit('preferences_updated', {
                 'status': 'success',
                 'message': 'Preferences updated successfully'
@@ -0,0 +1,93 @@
+import queue
+import threading
+from http.cookies import SimpleCookie
+
+import socketio
+
+from structured_logging import get_logger
+
+logger = get_logger('message_queue')
+
+# Seconds the local stand-in's listener waits between checks for messages
+LOCAL_QUEUE_POLL_INTERVAL = 0.01
+
+class LocalQueueManager(socketio.PubSubManager):
+    """
+    In-process stand-in for the Redis message queue. Every server created
+    with the same channel in this process shares room broadcasts through the
+    same pub/sub code path as Redis, which is enough for local development
+    and tests with several Socket.IO servers.
+    """
+    name = 'local'
+    _subscribers = {}
+    _lock = threading.Lock()
+
+    def __init__(self, channel='socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self._queue = queue.Queue()
+
+    def initialize(self):
+        if not self.write_only:
+            with self._lock:
+                self._subscribers.setdefault(self.channel, []).append(self._queue)
+        super().initialize()
+
+    def _publish(self, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(self.channel, []))
+        for subscriber in subscribers:
+            subscriber.put(data)
+
+    def _listen(self):
+        # Poll so the listener never blocks an eventlet hub that is not monkey-patched
+        while True:
+            try:
+                yield self._queue.get_nowait()
+            except queue.Empty:
+                self.server.sleep(LOCAL_QUEUE_POLL_INTERVAL)
+
+def message_queue_options(url, channel):
+    """
+    SocketIO keyword arguments for SOCKETIO_MESSAGE_QUEUE: nothing for a
+    single process, the local stand-in for local://, or a Redis (or any
+    kombu) URL that Flask-SocketIO connects to itself
+    """
+    if not url:
+        return {}
+    if url.startswith('local://'):
+        return {'client_manager': LocalQueueManager(channel=channel)}
+    return {'message_queue': url, 'channel': channel}
+
+class StickyNodeMiddleware:
+    """
+    Tag Socket.IO responses with a cookie naming the node that served them.
+    Long-polling clients must keep reaching the node that holds their
+    Engine.IO session, so the load balancer routes on this cookie
+    (e.g. nginx `hash $cookie_a11yum_node` or HAProxy `cookie a11yum_node`).
+    """
+
+    def __init__(self, wsgi_app, node_id, cookie_name='a11yum_node', path='socket.io'):
+        self.wsgi_app = wsgi_app
+        self.node_id = node_id
+        self.cookie_name = cookie_name
+        self.path = '/' + path.strip('/')
+
+    def __call__(self, environ, start_response):
+        if not environ.get('PATH_INFO', '').startswith(self.path):
+            return self.wsgi_app(environ, start_response)
+
+        cookies = SimpleCookie(environ.get('HTTP_COOKIE', ''))
+        routed_to = cookies[self.cookie_name].value if self.cookie_name in cookies else None
+        if routed_to and routed_to != self.node_id and 'sid=' in environ.get('QUERY_STRING', ''):
+            logger.warning('Socket.IO request reached the wrong node; check sticky routing',
+                           extra={'routed_to': routed_to, 'node_id': self.node_id})
+        if routed_to == self.node_id:
+            return self.wsgi_app(environ, start_response)
+
+        def sticky_start_response(status, headers, exc_info=None):
+            headers = list(headers) + [
+                ('Set-Cookie', f'{self.cookie_name}={self.node_id}; Path=/; HttpOnly; SameSite=Lax')
+            ]
+            return start_response(status, headers, exc_info)
+
+        return self.wsgi_app(environ, sticky_start_response)
@@ -0,0 +1,209 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Bounded-concurrency batch scraping with per-host rate limits
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from recipe_cache import normalize_url
+from recipe_parser import is_usable_scrape
+
+# (recipe_data, cache_status) for a URL
+ScrapeResult = Tuple[Dict[str, Any], str]
+
+
+class HostRateLimiter:
+    """Caps concurrent requests per host and spaces out request starts."""
+
+    def __init__(self, max_per_host: int = 2, min_interval: float = 0.5):
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    async def acquire(self, host: str):
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        await semaphore.acquire()
+        now = time.monotonic()
+        start = max(now, self._next_start.get(host, now))
+        self._next_start[host] = start + self.min_interval
+        if start > now:
+            try:
+                await asyncio.sleep(start - now)
+            except BaseException:
+                # Cancelled while waiting our turn: the caller never gets the slot
+                semaphore.release()
+                raise
+
+    def release(self, host: str):
+        self._semaphores[host].release()
+
+
+class BatchScraper:
+    """
+    Scrapes many URLs with at most `max_concurrency` in flight overall and
+    per-host limits from a HostRateLimiter.
+
+    `scrape(url)` does the real work. If `peek(url)` is given it is tried first
+    and, when it returns a result (e.g. a cache hit), the URL skips the
+    concurrency and rate limits entirely.
+    """
+
+    def __init__(self, scrape: Callable[[str], Awaitable[ScrapeResult]],
+                 peek: Optional[Callable[[str], Awaitable[Optional[ScrapeResult]]]] = None,
+                 max_concurrency: int = 8, max_per_host: int = 2,
+                 per_host_interval: float = 0.5):
+        self.scrape = scrape
+        self.peek = peek
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.per_host_interval = per_host_interval
+
+    @staticmethod
+    def dedupe(urls: List[str]) -> List[str]:
+        """Unique URLs by normalized form, keeping first-seen order."""
+        unique: "OrderedDict[str, str]" = OrderedDict()
+        for url in urls:
+            unique.setdefault(normalize_url(url), url)
+        return list(unique.values())
+
+    async def run(self, urls: List[str], max_concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield one result per unique URL, in completion order. Closing the
+        generator early cancels the scrapes that are still pending.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        limiter = HostRateLimiter(self.max_per_host, self.per_host_interval)
+        results: asyncio.Queue = asyncio.Queue()
+        unique_urls = self.dedupe(urls)
+
+        async def worker(url: str):
+            start_time = time.time()
+            try:
+                found = await self.peek(url) if self.peek else None
+                if found is None:
+                    host = urlsplit(normalize_url(url)).hostname or ""
+                    async with semaphore:
+                        await limiter.acquire(host)
+                        try:
+                            found = await self.scrape(url)
+                        finally:
+                            limiter.release(host)
+                recipe_data, cache_status = found
+                success = is_usable_scrape(recipe_data)
+                error = recipe_data.get("error")
+                if error is None and not success:
+                    error = "No complete recipe found at this URL"
+                result = {
+                    "url": url,
+                    "success": success,
+                    "recipe_data": None if "error" in recipe_data else recipe_data,
+                    "error": error,
+                    "cache_status": cache_status,
+                }
+            except Exception as e:
+                result = {
+                    "url": url,
+                    "success": False,
+                    "recipe_data": None,
+                    "error": f"Failed to scrape recipe: {str(e)}",
+                    "cache_status": None,
+                }
+            result["processing_time"] = time.time() - start_time
+            await results.put(result)
+
+        tasks = [asyncio.create_task(worker(url)) for url in unique_urls]
+        try:
+            for _ in range(len(tasks)):
+                yield await results.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class BatchJob:
+    """A batch scrape running in the background, polled by job id."""
+
+    def __init__(self, urls: List[str]):
+        self.job_id = uuid.uuid4().hex
+        self.total = len(urls)
+        self.urls = urls
+        self.results: List[Dict[str, Any]] = []
+        self.status = "pending"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def to_dict(self, offset: int = 0) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": self.total,
+            "completed": len(self.results),
+            "succeeded": sum(1 for result in self.results if result["success"]),
+            "offset": offset,
+            "results": self.results[offset:],
+        }
+
+
+class TooManyBatchJobs(Exception):
+    """Every job slot is taken by a job that is still running."""
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        super().__init__(f"{max_jobs} batch jobs are already running; try again later")
+
+
+class BatchJobRegistry:
+    """
+    Keeps the most recent `max_jobs` batch jobs; oldest finished jobs go
+    first. When all of them are still running, start() raises
+    TooManyBatchJobs rather than growing past the limit.
+    """
+
+    def __init__(self, scraper: BatchScraper, max_jobs: int = 100):
+        self.scraper = scraper
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+
+    def start(self, urls: List[str], max_concurrency: Optional[int] = None) -> BatchJob:
+        # Make room for the new job first
+        self._prune(self.max_jobs - 1)
+        if len(self._jobs) >= self.max_jobs:
+            raise TooManyBatchJobs(self.max_jobs)
+        job = BatchJob(BatchScraper.dedupe(urls))
+        job.task = asyncio.create_task(self._run(job, max_concurrency))
+        self._jobs[job.job_id] = job
+        return job
+
+    async def _run(self, job: BatchJob, max_concurrency: Optional[int]):
+        job.status = "running"
+        try:
+            async for result in self.scraper.run(job.urls, max_concurrency):
+                job.results.append(result)
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception:
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self._jobs.get(job_id)
+
+    def _prune(self, limit: int):
+        for job_id in list(self._jobs.keys()):
+            if len(self._jobs) <= limit:
+                break
+            if self._jobs[job_id].finished_at is not None:
+                del self._jobs[job_id]
+
+    def cancel_all(self):
+        for job in self._jobs.values():
+            if job.task and not job.task.done():
+                job.task.cancel()
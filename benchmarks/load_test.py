@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Load test every HTTP and Socket.IO server against a deterministic replayed model.
+
+Drives main.py, main_simple.py and fastapi_backend.py in process through
+httpx's ASGI transport, and the Flask-SocketIO app (backend/) through its
+WSGI and Socket.IO test clients. Each scenario runs at every concurrency
+level and reports p50/p95/p99 latency, requests per second and process
+memory. The agents run on stub_llm.ReplayLlm (AGENT_MODEL_BACKEND=replay)
+with benchmarks/recordings/agent_replay.json, so results measure the servers
+and the ADK pipeline rather than Gemini. Recipe pages for /scrape-recipe
+come from recipes/html instead of the network.
+
+--output writes the results as JSON. --baseline compares them with an
+earlier run and exits with status 1 when a scenario's p95 latency or
+throughput regressed by more than --max-regression, for use before deploys.
+
+Usage: python benchmarks/load_test.py [--targets main,main_simple,fastapi_backend,flask]
+           [--concurrency 1,8,32] [--requests 200] [--latency 0.05] [--tokens-per-sec 0]
+           [--recording agent_replay.json] [--verbose]
+           [--output results.json] [--baseline previous.json] [--max-regression 0.25]
+           [--min-delta-ms 1]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+TARGETS = ("main", "main_simple", "fastapi_backend", "flask")
+# Seconds a Socket.IO scenario waits for its reply event
+SOCKET_REPLY_TIMEOUT = 30.0
+# Seconds to wait for background work (history summaries) before exiting
+DRAIN_TIMEOUT = 30.0
+QUESTIONS = [
+    "What can I cook with very little energy?",
+    "How do I make pasta sitting down?",
+    "Which knives are easiest to hold with arthritis?",
+    "Give me a one-pot dinner idea",
+]
+
+
+@dataclass
+class Scenario:
+    target: str
+    name: str
+    # ASGI: async request(client, worker, n); WSGI: request(state, worker, n) in a thread
+    request: Callable
+    asgi: bool = True
+
+
+def configure_environment(workdir: Path, args: argparse.Namespace):
+    """Replay the model and keep every store in a scratch directory; must run before the apps are imported."""
+    os.environ.setdefault("GOOGLE_API_KEY", "replay")
+    os.environ["AGENT_MODEL_BACKEND"] = "replay"
+    os.environ["AGENT_REPLAY_FIRST_TOKEN_MS"] = str(args.latency * 1000)
+    os.environ["AGENT_REPLAY_TOKENS_PER_SEC"] = str(args.tokens_per_sec)
+    if args.recording:
+        os.environ["AGENT_REPLAY_FILE"] = str(Path(args.recording).resolve())
+    os.environ["RECIPE_CACHE_PATH"] = str(workdir / "recipe_cache.db")
+    os.environ["RECIPE_SEARCH_DIR"] = str(ROOT / "recipes")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'app.db'}"
+    os.environ["SESSION_BACKEND_URL"] = "memory://"
+    os.environ["SOCKETIO_MESSAGE_QUEUE"] = ""
+    os.environ["SOCKETIO_ASYNC_MODE"] = "threading"
+    # Every request should reach the agent unless asked otherwise
+    os.environ.setdefault("SEMANTIC_CACHE_ENABLED", "false")
+    # A few bench users send every request; per-user rate limits would only measure themselves
+    os.environ.setdefault("AGENT_USER_RATE", "0")
+
+# Host whose pages are served from recipes/html (see serve_recipe_pages)
+RECIPE_HOST = "recipes.bench"
+
+def serve_recipe_pages():
+    """Answer recipe page fetches from recipes/html, so scraping needs no network."""
+    import recipe_parser
+
+    async def fetch_recipe_html(url: str, timeout: float = recipe_parser.FETCH_TIMEOUT) -> str:
+        parts = urlsplit(url)
+        page = ROOT / "recipes" / "html" / f"{parts.path.strip('/').split('/')[0]}.html"
+        if parts.hostname != RECIPE_HOST or not page.exists():
+            raise OSError(f"{url} is not a bundled recipe page")
+        return page.read_text(encoding="utf-8")
+
+    recipe_parser.fetch_recipe_html = fetch_recipe_html
+
+def question(n: int) -> str:
+    return f"{QUESTIONS[n % len(QUESTIONS)]} (#{n})"
+
+#
+# Statistics
+#
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def memory_mb() -> float:
+    """Current resident set size, or the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return peak_memory_mb()
+
+def peak_memory_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+def summarize(scenario: Scenario, concurrency: int, latencies: List[float],
+              errors: int, wall: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    return {
+        "target": scenario.target,
+        "scenario": scenario.name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "rss_mb": round(memory_mb(), 1),
+        "peak_rss_mb": round(peak_memory_mb(), 1),
+    }
+
+def print_result(result: Dict[str, Any]):
+    name = f"{result['target']}/{result['scenario']}"
+    print(f"  {name:<30} c={result['concurrency']:<4} {result['rps']:8.1f} req/s  "
+          f"p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+          f"errors {result['errors']:<3} rss {result['rss_mb']:.0f}MB", file=sys.__stdout__, flush=True)
+
+#
+# ASGI targets (main.py, main_simple.py, fastapi_backend.py)
+#
+
+async def _chat(client, path: str, worker: int, n: int) -> bool:
+    response = await client.post(path, json={
+        "user_input": question(n), "session_id": f"bench-{worker}", "user_id": f"bench-user-{worker}",
+    })
+    return response.status_code == 200 and response.json().get("success") is True
+
+async def _chat_stream(client, worker: int, n: int) -> bool:
+    body = {"user_input": question(n), "session_id": f"bench-stream-{worker}", "user_id": f"bench-user-{worker}"}
+    last = None
+    async with client.stream("POST", "/chat/stream?format=ndjson", json=body) as response:
+        async for line in response.aiter_lines():
+            if line:
+                last = json.loads(line)
+    return response.status_code == 200 and last is not None and last.get("type") == "done"
+
+async def _scrape(client, page: str, n: int) -> bool:
+    # A distinct URL per request, so neither the cache nor coalescing answers it
+    response = await client.post("/scrape-recipe", json={"url": f"https://{RECIPE_HOST}/{page}/{n}", "force_refresh": True})
+    return response.status_code == 200 and response.json().get("success") is True
+
+async def _get(client, path: str) -> bool:
+    return (await client.get(path)).status_code == 200
+
+async def _recipe_assistance(client, worker: int, n: int) -> bool:
+    response = await client.post("/recipe-assistance", json={"user_input": question(n), "user_id": f"bench-user-{worker}"})
+    return response.status_code == 200 and response.json().get("success") is True
+
+ASGI_SCENARIOS = {
+    "main": [
+        Scenario("main", "chat", lambda client, w, n: _chat(client, "/chat", w, n)),
+        Scenario("main", "chat_stream", _chat_stream),
+        Scenario("main", "health", lambda client, w, n: _get(client, "/health")),
+        # Page with schema.org markup: local parse plus one alternatives call
+        Scenario("main", "scrape_parsed", lambda client, w, n: _scrape(client, "shrimp-scampi-with-pasta", n)),
+        # Page without markup: the agent extracts the whole recipe
+        Scenario("main", "scrape_agent", lambda client, w, n: _scrape(client, "no-recipe-markup", n)),
+    ],
+    "main_simple": [
+        Scenario("main_simple", "chat", lambda client, w, n: _chat(client, "/chat", w, n)),
+        Scenario("main_simple", "test_query", lambda client, w, n: _chat(client, "/test-query", w, n)),
+    ],
+    "fastapi_backend": [
+        Scenario("fastapi_backend", "recipe_assistance", _recipe_assistance),
+        Scenario("fastapi_backend", "health", lambda client, w, n: _get(client, "/health")),
+    ],
+}
+
+async def run_asgi_scenario(app, scenario: Scenario, concurrency: int, total: int) -> Dict[str, Any]:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await scenario.request(client, concurrency, 0)  # warm up
+        counter = itertools.count()
+        latencies: List[float] = []
+        errors = 0
+
+        async def worker(w: int):
+            nonlocal errors
+            while (n := next(counter)) < total:
+                start = time.perf_counter()
+                try:
+                    ok = await scenario.request(client, w, n)
+                except Exception:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(concurrency)))
+        return summarize(scenario, concurrency, latencies, errors, time.perf_counter() - start)
+
+async def run_asgi(targets: List[str], levels: List[int], total: int) -> List[Dict[str, Any]]:
+    # One event loop for every ASGI app, as in production
+    results = []
+    for target in targets:
+        app = __import__(target).app
+        for scenario in ASGI_SCENARIOS[target]:
+            for concurrency in levels:
+                result = await run_asgi_scenario(app, scenario, concurrency, total)
+                print_result(result)
+                results.append(result)
+    # Let background work the requests started (history summaries) finish
+    pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    if pending:
+        await asyncio.wait(pending, timeout=DRAIN_TIMEOUT)
+    return results
+
+#
+# Flask-SocketIO app (backend/)
+#
+
+def _wait_for(socket_client, event: str, error_event: str) -> bool:
+    deadline = time.monotonic() + SOCKET_REPLY_TIMEOUT
+    while time.monotonic() < deadline:
+        for received in socket_client.get_received():
+            if received["name"] == event:
+                return True
+            if received["name"] == error_event:
+                return False
+        time.sleep(0.002)
+    return False
+
+def _socket_ask(state, worker: int, n: int) -> bool:
+    client = state["socket"]()
+    client.emit("ask_question", {"session_id": state["session_id"], "question": question(n)})
+    return _wait_for(client, "question_answer", "question_error")
+
+def _socket_generate(state, worker: int, n: int) -> bool:
+    client = state["socket"]()
+    client.emit("generate_recipe", {"session_id": state["session_id"], "input": question(n)})
+    return _wait_for(client, "recipe_complete", "recipe_error")
+
+def _flask_post(path: str, body: Callable[[int], Dict[str, Any]]) -> Callable:
+    def request(state, worker: int, n: int) -> bool:
+        response = state["http"].post(path, json=body(n))
+        return response.status_code == 200
+    return request
+
+FLASK_SCENARIOS = [
+    Scenario("flask", "agent_ask", _flask_post("/agent/ask", lambda n: {"question": question(n)}), asgi=False),
+    Scenario("flask", "agent_suggestions", _flask_post(
+        "/agent/suggestions", lambda n: {"query": "soup", "preferences": {"energy_level": "low"}}
+    ), asgi=False),
+    Scenario("flask", "recipes_page",
+             lambda state, w, n: state["http"].get("/recipes?limit=20").status_code == 200, asgi=False),
+    Scenario("flask", "socket_ask_question", _socket_ask, asgi=False),
+    Scenario("flask", "socket_generate_recipe", _socket_generate, asgi=False),
+]
+
+def run_wsgi_scenario(app, socketio, scenario: Scenario, concurrency: int, total: int) -> Dict[str, Any]:
+    sockets = []
+
+    def new_state(worker: int) -> Dict[str, Any]:
+        session_id = f"bench-{scenario.name}-{worker}"
+        state: Dict[str, Any] = {"http": app.test_client(), "session_id": session_id}
+
+        def socket():
+            # Connected on first use so HTTP scenarios don't open sockets
+            if "socket_client" not in state:
+                state["socket_client"] = socketio.test_client(app, auth={"session_id": session_id})
+                state["socket_client"].get_received()
+                sockets.append(state["socket_client"])
+            return state["socket_client"]
+        state["socket"] = socket
+        return state
+
+    scenario.request(new_state(concurrency), concurrency, 0)  # warm up
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies: List[float] = []
+    errors = 0
+
+    def worker(w: int):
+        nonlocal errors
+        state = new_state(w)
+        while True:
+            with lock:
+                n = next(counter)
+            if n >= total:
+                return
+            start = time.perf_counter()
+            try:
+                ok = scenario.request(state, w, n)
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - start
+    for client in sockets:
+        client.disconnect()
+    return summarize(scenario, concurrency, latencies, errors, wall)
+
+def run_flask(levels: List[int], total: int) -> List[Dict[str, Any]]:
+    from backend import create_app
+
+    app, socketio = create_app()
+    results = []
+    for scenario in FLASK_SCENARIOS:
+        for concurrency in levels:
+            result = run_wsgi_scenario(app, socketio, scenario, concurrency, total)
+            print_result(result)
+            results.append(result)
+    return results
+
+#
+# Baseline comparison
+#
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], max_regression: float,
+            min_delta_ms: float = 1.0) -> List[str]:
+    """
+    Scenarios whose p95 grew or throughput fell by more than `max_regression`.
+    Sub-millisecond endpoints are noisy, so latency changes smaller than
+    `min_delta_ms` never count.
+    """
+    previous = {(r["target"], r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result["target"], result["scenario"], result["concurrency"]))
+        if before is None:
+            continue
+        name = f"{result['target']}/{result['scenario']} c={result['concurrency']}"
+        if result["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {result['errors']}")
+        if result["p95_ms"] - before["p95_ms"] < min_delta_ms and result["mean_ms"] - before["mean_ms"] < min_delta_ms:
+            continue
+        if before["p95_ms"] and result["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.2f}ms -> {result['p95_ms']:.2f}ms")
+        if before["rps"] and result["rps"] < before["rps"] * (1 - max_regression):
+            regressions.append(f"{name}: {before['rps']:.1f} -> {result['rps']:.1f} req/s")
+    return regressions
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the a11Yum servers against a replayed model")
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help=f"comma-separated subset of {', '.join(TARGETS)}")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--latency", type=float, default=0.05, help="replayed model first-token latency in seconds")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0,
+                        help="replayed model output speed after the first token (0 = instant)")
+    parser.add_argument("--recording", help="recorded model responses to replay (default: AGENT_REPLAY_FILE)")
+    parser.add_argument("--verbose", action="store_true", help="keep the servers' own request logging")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed p95/throughput regression against the baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore latency changes smaller than this many milliseconds")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        print(f"❌ Unknown targets: {', '.join(sorted(unknown))}")
+        return 2
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    configure_environment(Path(tempfile.mkdtemp(prefix="a11yum-bench-")), args)
+    serve_recipe_pages()
+
+    print(f"📊 {args.requests} requests per scenario at concurrency {levels}, "
+          f"model latency {args.latency * 1000:.0f}ms")
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            # Per-request prints and logs would dominate both the output and the timings
+            stack.enter_context(contextlib.redirect_stdout(open(os.devnull, "w")))
+            logging.disable(logging.INFO)
+        results = asyncio.run(run_asgi([t for t in targets if t != "flask"], levels, args.requests))
+        if "flask" in targets:
+            results += run_flask(levels, args.requests)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": levels,
+            "model_latency": args.latency,
+            "model_tokens_per_sec": args.tokens_per_sec,
+            "recording": os.environ.get("AGENT_REPLAY_FILE"),
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"💾 Wrote {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.max_regression, args.min_delta_ms)
+        for regression in regressions:
+            print(f"❌ Regression {regression}")
+        if regressions:
+            return 1
+        print(f"✅ No regressions beyond {args.max_regression:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
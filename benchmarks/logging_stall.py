@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark how much request logging stalls the event loop.
+
+Simulates concurrent /chat requests on one event loop, each logging the
+query, the turn usage and the start of the response, as main.py and
+agent.py do. A heartbeat task measures how late the loop wakes it. Runs once
+with print() and once with the queue-based structured logger, both writing
+to the same output: by default a stream whose writes take --write-ms (a
+terminal, or a stdout pipe under back-pressure from a log collector).
+
+Usage: python benchmarks/logging_stall.py [--requests N] [--concurrency C] [--write-ms MS] [--sink slow|devnull]
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import structured_logging
+from structured_logging import configure_logging, flush_logs, get_logger
+
+QUERY = "I have arthritis in both hands, what can I cook for dinner without chopping anything?"
+RESPONSE = "Here is a sheet-pan salmon with pre-cut vegetables: everything goes on one tray, no knife needed. " * 4
+
+
+class SlowStream(io.TextIOBase):
+    """Output whose every write blocks for a while, then is discarded."""
+
+    def __init__(self, write_seconds: float):
+        self.write_seconds = write_seconds
+
+    def write(self, text: str) -> int:
+        time.sleep(self.write_seconds)
+        return len(text)
+
+
+def open_sink(kind: str, write_ms: float):
+    if kind == "devnull":
+        return open(os.devnull, "w")
+    return SlowStream(write_ms / 1000)
+
+
+async def heartbeat(lags: list, stop: asyncio.Event, interval: float = 0.001):
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(time.perf_counter() - expected, 0.0))
+
+
+async def request_with_print(i: int, sink, model_seconds: float):
+    print(f"📥 Received query from user{i}/default: {QUERY}", file=sink)
+    print(f"🍽️ User Query: {QUERY}", file=sink)
+    await asyncio.sleep(model_seconds)
+    print("📊 chat: 1800 input tokens (0 cached), 120 output, first token after 300 ms", file=sink)
+    print(f"✅ Agent response: {RESPONSE[:100]}...", file=sink)
+
+
+async def request_with_logger(i: int, logger, model_seconds: float):
+    logger.info("Received query", extra={"user_id": f"user{i}", "session_id": "default", "user_text": QUERY})
+    logger.info("Agent query", extra={"user_text": QUERY})
+    await asyncio.sleep(model_seconds)
+    logger.info("Turn usage", extra={"label": "chat", "input_tokens": 1800, "cached_input_tokens": 0,
+                                     "output_tokens": 120, "ttft_ms": 300.0, "cached_response": False})
+    logger.info("Agent response", extra={"response_text": RESPONSE[:100], "chars": len(RESPONSE)})
+
+
+async def run(make_request, requests: int, concurrency: int, model_seconds: float):
+    lags: list = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await make_request(i, model_seconds)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    return elapsed, sorted(lags)
+
+
+def report(label: str, elapsed: float, lags: list, requests: int):
+    p99 = lags[int(len(lags) * 0.99)] * 1000 if lags else 0.0
+    worst = lags[-1] * 1000 if lags else 0.0
+    print(f"  {label:<12} {requests / elapsed:8.1f} req/s  loop lag p99 {p99:7.2f}ms  max {worst:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--model-ms", type=float, default=20, help="Simulated model time per request")
+    parser.add_argument("--write-ms", type=float, default=0.5, help="Time each write to the slow sink blocks")
+    parser.add_argument("--sink", choices=("slow", "devnull"), default="slow")
+    args = parser.parse_args()
+    model_seconds = args.model_ms / 1000
+
+    print(f"📊 {args.requests} requests at concurrency {args.concurrency}, sink {args.sink}"
+          + (f" ({args.write_ms}ms per write)" if args.sink == "slow" else ""))
+
+    sink = open_sink(args.sink, args.write_ms)
+    elapsed, lags = asyncio.run(run(lambda i, m: request_with_print(i, sink, m),
+                                    args.requests, args.concurrency, model_seconds))
+    report("print", elapsed, lags, args.requests)
+
+    structured_logging.LOG_QUEUE_SIZE = args.requests * 4
+    sink = open_sink(args.sink, args.write_ms)
+    configure_logging(sink)
+    logger = get_logger("bench")
+    elapsed, lags = asyncio.run(run(lambda i, m: request_with_logger(i, logger, m),
+                                    args.requests, args.concurrency, model_seconds))
+    report("structured", elapsed, lags, args.requests)
+    started = time.perf_counter()
+    flush_logs()
+    print(f"  (writer thread finished the backlog {time.perf_counter() - started:.2f}s after the last request)")
+
+
+if __name__ == "__main__":
+    main()
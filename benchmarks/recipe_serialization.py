@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark recipe serialization for /scrape-recipe responses.
+
+Compares the old pydantic path (validate a free-form dict into
+RecipeScrapingResponse, then jsonable_encoder + json.dumps as FastAPI does)
+with main.scraping_response, the function /scrape-recipe calls: a valid
+recipe is checked with validate_recipe and encoded to bytes directly. The
+Recipe model round trip it uses for partial recipes is timed as well. The
+corpus is the recipe-scrapers records in recipes/*.json, converted to the
+app format.
+
+Usage: python benchmarks/recipe_serialization.py [iterations]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from recipe_model import Recipe, decode_recipe, encode_json, orjson
+from recipe_parser import scraper_json_to_recipe, validate_recipe
+# The response function the server ships (importing main sets up the app)
+from main import scraping_response
+
+RECIPES_DIR = Path(__file__).resolve().parent.parent / "recipes"
+
+
+class RecipeScrapingResponse(BaseModel):
+    """Same shape as the response model in main.py"""
+    success: bool
+    recipe_data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    url: str
+    processing_time: Optional[float] = None
+    cache_hit: Optional[bool] = None
+    cache_status: Optional[str] = None
+
+
+def load_corpus():
+    return [
+        scraper_json_to_recipe(json.loads(path.read_text(encoding="utf-8")))
+        for path in sorted(RECIPES_DIR.glob("*.json"))
+    ]
+
+def pydantic_response(recipe: Dict[str, Any]) -> bytes:
+    response = RecipeScrapingResponse(success=True, recipe_data=recipe, url=recipe["sourceUrl"] or "",
+                                      processing_time=0.1, cache_hit=True, cache_status="hit")
+    return json.dumps(jsonable_encoder(response)).encode("utf-8")
+
+def shipped_response(recipe: Dict[str, Any]) -> bytes:
+    return scraping_response(success=True, recipe_data=recipe, url=recipe["sourceUrl"] or "",
+                             processing_time=0.1, cache_hit=True, cache_status="hit").body
+
+def model_response(recipe: Dict[str, Any]) -> bytes:
+    return encode_json({
+        "success": True,
+        "recipe_data": Recipe.from_dict(recipe).to_dict(),
+        "error": None,
+        "url": recipe["sourceUrl"] or "",
+        "processing_time": 0.1,
+        "cache_hit": True,
+        "cache_status": "hit",
+    })
+
+def timed(label: str, fn, corpus, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for recipe in corpus:
+            fn(recipe)
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / (iterations * len(corpus)) * 1e6
+    print(f"  {label:<28} {per_call:8.1f} µs/recipe")
+    return per_call
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    corpus = load_corpus()
+    assert not any(validate_recipe(recipe) for recipe in corpus), "the corpus should be valid recipes"
+    encoded = [encode_json(recipe) for recipe in corpus]
+    print(f"📊 {len(corpus)} recipes x {iterations} iterations (orjson: {'yes' if orjson else 'no'})")
+
+    print("Encode response:")
+    old = timed("pydantic + json.dumps", pydantic_response, corpus, iterations)
+    new = timed("scraping_response", shipped_response, corpus, iterations)
+    print(f"  speedup: {old / new:.1f}x")
+    partial = timed("Recipe model round trip", model_response, corpus, iterations)
+    print(f"  partial recipes: {old / partial:.1f}x")
+
+    print("Decode recipe:")
+    old = timed("json.loads", json.loads, encoded, iterations)
+    new = timed("decode_recipe", decode_recipe, encoded, iterations)
+    print(f"  ratio: {new / old:.1f}x (typed decode includes validation)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark RecipeSearchIndex build and query latency.
+
+Builds a synthetic corpus of N recipes from the vocabulary of the bundled
+recipes/*.json records, then times typical /agent/suggestions queries.
+
+Usage: python benchmarks/search_latency.py [--recipes N] [--queries Q]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from recipe_search import RecipeSearchIndex
+
+RECIPES_DIR = Path(__file__).resolve().parent.parent / "recipes"
+DIETARY_TAGS = ["Vegan", "Vegetarian", "Gluten-Free", "Dairy-Free", "Low-Fat"]
+ACCESSIBILITY_TAGS = ["One-Handed", "Low-Energy", "Seated", "No-Knife"]
+
+QUERIES = [
+    ("single term", "garlic", {}),
+    ("two terms", "corn soup", {}),
+    ("three terms + filters", "tomato basil pasta", {"dietary_tags": ["vegetarian"], "max_time": 40}),
+    ("filters only", "", {"accessibility_tags": ["one-handed"], "difficulty": ["Easy"]}),
+]
+
+
+def synthetic_corpus(count: int, seed: int = 7):
+    seed_index = RecipeSearchIndex()
+    seed_index.load_directory(str(RECIPES_DIR))
+    vocabulary = sorted(seed_index._postings)
+    # Add a long tail so postings lists look like a real corpus
+    vocabulary += [f"{word}{i}" for i in range(40) for word in vocabulary[:100]]
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "id": f"synthetic-{i}",
+            "title": " ".join(rng.choices(vocabulary, k=4)),
+            "description": " ".join(rng.choices(vocabulary, k=20)),
+            "ingredients": [{"name": rng.choice(vocabulary)} for _ in range(rng.randint(4, 12))],
+            "difficulty": rng.choice(["Easy", "Medium", "Hard"]),
+            "estimatedTime": rng.randint(5, 240),
+            "dietaryTags": rng.sample(DIETARY_TAGS, rng.randint(0, 2)),
+            "accessibilityTags": rng.sample(ACCESSIBILITY_TAGS, rng.randint(0, 2)),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--recipes", type=int, default=100_000, help="Synthetic recipes to index")
+    parser.add_argument("--queries", type=int, default=500, help="Timed runs of each query")
+    args = parser.parse_args()
+    runs = args.queries
+    corpus = list(synthetic_corpus(args.recipes))
+
+    start = time.perf_counter()
+    index = RecipeSearchIndex()
+    index.add_many(corpus)
+    print(f"📊 Indexed {len(index)} recipes in {time.perf_counter() - start:.2f}s")
+
+    for label, query, filters in QUERIES:
+        index.search(query, limit=10, **filters)  # warm term weights and bitsets
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            results = index.search(query, limit=10, **filters)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1000
+        p99 = timings[int(len(timings) * 0.99)] * 1000
+        print(f"  {label:<24} p50 {p50:6.3f}ms  p99 {p99:6.3f}ms  ({len(results)} results)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Bounded conversation history: recent turns verbatim, older ones in a rolling summary
+
+import asyncio
+import os
+import re
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from structured_logging import get_logger
+
+# Turns kept verbatim, and the token budget for the summary plus those turns
+HISTORY_KEEP_TURNS = int(os.environ.get("HISTORY_KEEP_TURNS", "6"))
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "2000"))
+# Longest the rolling summary may get
+HISTORY_SUMMARY_TOKENS = int(os.environ.get("HISTORY_SUMMARY_TOKENS", "400"))
+
+logger = get_logger("conversation_history")
+
+# A turn is {"user_input": ..., "agent_response": ...}
+Turn = Dict[str, str]
+Summarizer = Callable[[str, List[Turn]], Awaitable[str]]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+def turn_tokens(turn: Turn) -> int:
+    return estimate_tokens(turn.get("user_input", "")) + estimate_tokens(turn.get("agent_response", ""))
+
+def clip_tokens(text: str, max_tokens: int) -> str:
+    """Keep the end of `text` within `max_tokens`; the newest summary lines matter most."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    clipped = text[-max_chars:]
+    newline = clipped.find("\n")
+    return clipped[newline + 1:] if 0 <= newline < len(clipped) - 1 else clipped
+
+def split_history(turns: List[Turn], summary: str = "",
+                  keep_turns: int = HISTORY_KEEP_TURNS,
+                  token_budget: int = HISTORY_TOKEN_BUDGET) -> Tuple[List[Turn], List[Turn]]:
+    """
+    Split turns into (older, recent): at most `keep_turns` recent turns that
+    fit in the budget left by the summary, and everything older to fold.
+    The latest turn is always kept.
+    """
+    recent = turns[-keep_turns:] if keep_turns > 0 else turns[-1:]
+    budget = token_budget - estimate_tokens(summary)
+    used = sum(turn_tokens(turn) for turn in recent)
+    while len(recent) > 1 and used > budget:
+        used -= turn_tokens(recent[0])
+        recent = recent[1:]
+    return turns[:len(turns) - len(recent)], recent
+
+def _first_sentence(text: str, limit: int = 160) -> str:
+    text = " ".join(text.split())
+    sentence = _SENTENCE_END.split(text, 1)[0]
+    return sentence if len(sentence) <= limit else sentence[:limit - 1].rstrip() + "…"
+
+def extractive_summary(summary: str, turns: List[Turn],
+                       max_tokens: int = HISTORY_SUMMARY_TOKENS) -> str:
+    """Summary without a model: the first sentence of each side of every folded turn."""
+    lines = [summary] if summary else []
+    for turn in turns:
+        lines.append(
+            f"- User: {_first_sentence(turn.get('user_input', ''))} "
+            f"Assistant: {_first_sentence(turn.get('agent_response', ''))}"
+        )
+    return clip_tokens("\n".join(lines), max_tokens)
+
+def render_context(summary: str, turns: List[Turn]) -> str:
+    """The history as a preamble for a message sent to a fresh agent session."""
+    if not summary and not turns:
+        return ""
+    parts = ["Context from earlier in this conversation (do not repeat it back):"]
+    if summary:
+        parts.append(f"Summary:\n{summary}")
+    if turns:
+        parts.append("Most recent turns:")
+        for turn in turns:
+            parts.append(f"User: {turn.get('user_input', '')}\nAssistant: {turn.get('agent_response', '')}")
+    return "\n\n".join(parts)
+
+class ConversationHistory:
+    """
+    History of one conversation under the policy above. Folding old turns
+    into the summary runs as a background task, so the turn that triggers it
+    does not wait on the summarizer; until it finishes, the turns being
+    folded stay in the context verbatim.
+    """
+
+    def __init__(self, summarize: Optional[Summarizer] = None,
+                 keep_turns: int = HISTORY_KEEP_TURNS,
+                 token_budget: int = HISTORY_TOKEN_BUDGET,
+                 summary_tokens: int = HISTORY_SUMMARY_TOKENS):
+        self.summarize = summarize
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self.turns: List[Turn] = []
+        self.folded_turns = 0
+        # Tokens in the current agent session, see needs_new_session()
+        self.session_tokens = 0
+        self.session_stale = False
+        self._folding: List[Turn] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_turn(self, user_input: str, agent_response: str, in_session: bool = True):
+        """
+        Record a finished turn, starting a fold if the policy is exceeded.
+        A turn answered without the agent session (e.g. from a cache) marks
+        the session as missing context, so the next turn starts a fresh one.
+        """
+        turn = {"user_input": user_input, "agent_response": agent_response}
+        self.turns.append(turn)
+        self.session_tokens += turn_tokens(turn)
+        if not in_session:
+            self.session_stale = True
+        self._maybe_fold()
+
+    def _maybe_fold(self):
+        if self._task is not None and not self._task.done():
+            return
+        older, recent = split_history(self.turns, self.summary, self.keep_turns, self.token_budget)
+        if not older:
+            return
+        self._folding, self.turns = older, recent
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._fold(older))
+        except RuntimeError:
+            # No event loop (sync caller): fold inline without a model
+            self._finish_fold(extractive_summary(self.summary, older, self.summary_tokens), older)
+
+    async def _fold(self, older: List[Turn]):
+        summary = None
+        if self.summarize is not None:
+            try:
+                summary = await self.summarize(self.summary, older)
+            except Exception:
+                logger.warning("History summary failed, using extractive summary",
+                               extra={"turns": len(older)}, exc_info=True)
+        if not summary:
+            summary = extractive_summary(self.summary, older, self.summary_tokens)
+        self._finish_fold(summary, older)
+        # Turns that arrived while folding may already need another pass
+        self._task = None
+        self._maybe_fold()
+
+    def _finish_fold(self, summary: str, older: List[Turn]):
+        self.summary = clip_tokens(summary.strip(), self.summary_tokens)
+        self.folded_turns += len(older)
+        self._folding = []
+
+    @property
+    def total_turns(self) -> int:
+        return self.folded_turns + len(self._folding) + len(self.turns)
+
+    def context(self) -> str:
+        return render_context(self.summary, self._folding + self.turns)
+
+    def needs_new_session(self) -> bool:
+        """
+        True once the agent session holding this conversation has outgrown
+        the token budget, or is missing turns answered outside it.
+        """
+        return self.session_stale or self.session_tokens > self.token_budget
+
+    def start_session(self) -> str:
+        """Reset the per-session counters and return the preamble for a fresh agent session."""
+        context = self.context()
+        self.session_stale = False
+        self.session_tokens = estimate_tokens(context)
+        return context
+
+    def tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(turn_tokens(turn) for turn in self._folding + self.turns)
+
+    async def wait(self):
+        """Wait for running folds to finish."""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "turns_kept": len(self._folding) + len(self.turns),
+            "turns_folded": self.folded_turns,
+            "history_tokens": self.tokens(),
+        }
@@ -0,0 +1,168 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Deadlines and hedged requests for model calls
+
+import asyncio
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from metrics import REGISTRY
+
+T = TypeVar("T")
+
+TIMEOUTS = REGISTRY.counter("a11yum_model_timeouts_total", "Model calls cancelled at their deadline", ["label"])
+HEDGES = REGISTRY.counter(
+    "a11yum_model_hedges_total", "Hedged model calls, by the attempt that answered (primary, hedge)",
+    ["label", "winner"]
+)
+
+
+class AgentTimeout(Exception):
+    """A model call ran past its deadline and was cancelled."""
+
+    def __init__(self, label: str, timeout: float):
+        self.label = label
+        self.timeout = timeout
+        super().__init__(f"The {label} model call took longer than {timeout:g}s and was cancelled")
+
+
+async def with_deadline(call: Awaitable[T], timeout: Optional[float], label: str) -> T:
+    """
+    Await `call`, cancelling it after `timeout` seconds (None or 0: no
+    deadline). Cancellation is cooperative: the model calls close their
+    runner.run_async generator on the way out, which stops the request.
+    """
+    if not timeout:
+        return await call
+    try:
+        return await asyncio.wait_for(call, timeout)
+    except asyncio.TimeoutError:
+        TIMEOUTS.inc(label=label)
+        raise AgentTimeout(label, timeout) from None
+
+
+async def stream_with_deadline(stream: AsyncIterator[T], timeout: Optional[float], label: str) -> AsyncIterator[T]:
+    """
+    Yield from `stream` until `timeout` seconds have passed in total (None or
+    0: no deadline), then close it and raise AgentTimeout. The stream is
+    advanced in the caller's task rather than under wait_for, so spans it
+    keeps open across items stay in one context.
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    deadline = loop.time() + timeout if timeout else None
+    async with aclosing(stream):
+        while True:
+            if deadline is None:
+                try:
+                    item = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+                yield item
+                continue
+            expired = []
+            timer = loop.call_at(deadline, lambda: expired.append(True) or task.cancel())
+            try:
+                item = await stream.__anext__()
+            except StopAsyncIteration:
+                return
+            except asyncio.CancelledError:
+                if not expired:
+                    raise
+                if hasattr(task, "uncancel"):
+                    task.uncancel()
+                TIMEOUTS.inc(label=label)
+                raise AgentTimeout(label, timeout) from None
+            finally:
+                timer.cancel()
+            yield item
+
+
+def _succeeded(task: asyncio.Task) -> bool:
+    return task.done() and not task.cancelled() and task.exception() is None
+
+
+class LatencyWindow:
+    """The most recent durations of one kind of call, for quantile estimates."""
+
+    def __init__(self, size: int = 200):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Hedger:
+    """
+    Hedged requests for calls that are safe to run twice. When the first
+    attempt hasn't answered after the `quantile` of recent latencies for
+    its label (at least `min_delay`), a second attempt starts; the first to
+    answer wins and the other is cancelled. Nothing is hedged until
+    `min_samples` latencies have been seen.
+
+    A first attempt that loses is recorded with the time it had run when
+    it was cancelled, so the tail the delay is derived from doesn't shrink
+    just because hedging is cutting it off.
+    """
+
+    def __init__(self, enabled: bool = False, quantile: float = 0.95, min_delay: float = 0.5,
+                 min_samples: int = 20, window: int = 200):
+        self.enabled = enabled
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self._latencies: Dict[str, LatencyWindow] = {}
+
+    def delay(self, label: str) -> Optional[float]:
+        """Seconds to wait before hedging a `label` call, or None to not hedge."""
+        latencies = self._latencies.get(label)
+        if not self.enabled or latencies is None or len(latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, latencies.quantile(self.quantile))
+
+    async def run(self, attempt: Callable[[bool], Awaitable[T]], label: str) -> T:
+        """
+        Run `attempt(hedge)`, and once more with hedge=True if it is slow.
+        If one attempt fails the other is still awaited; if both fail, the
+        first attempt's error is raised.
+        """
+        delay = self.delay(label)
+        started = time.monotonic()
+        attempts = [asyncio.create_task(attempt(False))]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+                attempts.append(asyncio.create_task(attempt(True)))
+            while True:
+                winner = next((task for task in attempts if _succeeded(task)), None)
+                if winner is not None or all(task.done() for task in attempts):
+                    break
+                await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+
+            primary = attempts[0]
+            if not primary.done() or _succeeded(primary):
+                latencies = self._latencies.get(label)
+                if latencies is None:
+                    latencies = self._latencies[label] = LatencyWindow(self.window)
+                latencies.observe(time.monotonic() - started)
+            if len(attempts) > 1 and winner is not None:
+                HEDGES.inc(label=label, winner="primary" if winner is primary else "hedge")
+            return (winner or primary).result()
+        finally:
+            # Cancel the loser (or both, when the caller gave up) and let it clean up
+            pending = [task for task in attempts if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
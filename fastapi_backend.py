@@ -10,13 +10,15 @@ from typing import Optional
 import asyncio
 import logging
 
+import tracing
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Import our agent functionality
 try:
-    from agent import process_recipe_query
+    from agent import process_recipe_query, inflight_requests, response_cache
     AGENT_AVAILABLE = True
 except ImportError as e:
     logger.warning(f"Agent import failed: {e}")
@@ -36,11 +38,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(tracing.TracingMiddleware, app_name="fastapi_backend")
 
 # Request/Response models
 class RecipeQuery(BaseModel):
     user_input: str
     session_id: Optional[str] = "default"
+    user_id: Optional[str] = None
+    use_cache: Optional[bool] = True  # allow a semantically cached answer
 
 class RecipeResponse(BaseModel):
     success: bool
@@ -48,6 +53,7 @@ class RecipeResponse(BaseModel):
     error: Optional[str] = None
     agent_name: Optional[str] = None
     query: Optional[str] = None
+    cached: Optional[bool] = None
 
 # Health check endpoint
 @app.get("/")
@@ -58,12 +64,19 @@ async def root():
         "agent_available": AGENT_AVAILABLE
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return tracing.metrics_response()
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "agent_available": AGENT_AVAILABLE,
-        "message": "Agent ready for recipe assistance" if AGENT_AVAILABLE else "Agent not available - check ADK installation"
+        "message": "Agent ready for recipe assistance" if AGENT_AVAILABLE else "Agent not available - check ADK installation",
+        "request_coalescing": inflight_requests.stats() if AGENT_AVAILABLE else None,
+        "semantic_cache": response_cache.stats() if AGENT_AVAILABLE else None
     }
 
 # Main recipe processing endpoint
@@ -84,14 +97,19 @@ async def get_recipe_assistance(query: RecipeQuery):
     
     try:
         # Call our agent
-        result = await process_recipe_query(query.user_input)
+        result = await process_recipe_query(
+            query.user_input,
+            user_id=query.user_id,
+            use_cache=query.use_cache is not False
+        )
         
         return RecipeResponse(
             success=result["success"],
             response=result.get("response"),
             error=result.get("error"),
             agent_name=result.get("agent_name"),
-            query=result.get("query")
+            query=result.get("query"),
+            cached=result.get("cached", False)
         )
         
     except Exception as e:
@@ -0,0 +1,227 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Incremental extraction of JSON objects from streamed model output
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+# Characters that can change the scanner state; everything else is copied as-is
+_SPECIAL = re.compile(r'[{}\[\]"\\,]')
+_CLOSERS = {"{": "}", "[": "]"}
+# The member name right before a value, e.g. '"steps": ' before '['
+_MEMBER_KEY = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*$')
+
+
+class JSONObjectExtractor:
+    """
+    Finds top-level JSON objects in text that arrives in chunks, e.g. model
+    output with prose or markdown fences around the JSON.
+
+    `feed()` returns every object that was completed by the new chunk, so
+    parsing can start while tokens are still arriving. Braces inside JSON
+    strings are handled, and a candidate that turns out not to be valid JSON
+    (say, "{like this}" in prose) is dropped without losing later objects.
+    `partial()` recovers as much as possible of an object that is still open.
+
+    Objects inside the top-level object's arrays (a recipe's ingredients,
+    tools and steps) are also parsed as soon as each one closes; collect them
+    with `drain_items()`.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._length = 0
+        self._stack: List[str] = []
+        # Buffer offset where each open container starts
+        self._starts: List[int] = []
+        self._in_string = False
+        self._escape = False
+        # Member name of the array currently open in the top-level object
+        self._array_key: Optional[str] = None
+        self._array_index = 0
+        self._items: List[tuple] = []
+        # Characters of input consumed so far
+        self.offset = 0
+        # (buffer length, open containers) at each point where the text so far
+        # could be closed into valid JSON: after a comma or a closed value
+        self._safe_points: List[tuple] = []
+        self.objects: List[Any] = []
+
+    @property
+    def in_object(self) -> bool:
+        return bool(self._stack)
+
+    def feed(self, chunk: str) -> List[Any]:
+        completed = []
+        position = 0
+        # Index of the character escaped by a preceding backslash, if any
+        escaped_index = 0 if self._escape else -1
+        self._escape = False
+        for match in _SPECIAL.finditer(chunk):
+            index = match.start()
+            char = match.group()
+            if not self._stack:
+                # Outside any candidate: only an opening brace matters
+                if char == "{":
+                    self._start()
+                position = index + 1
+                continue
+
+            self._append(chunk[position:index + 1])
+            position = index + 1
+
+            if self._in_string:
+                if index == escaped_index:
+                    continue
+                if char == "\\":
+                    escaped_index = index + 1
+                    # A backslash ending the chunk escapes the next chunk's first character
+                    self._escape = escaped_index == len(chunk)
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "[" and len(self._stack) == 1:
+                    key = _MEMBER_KEY.search(self._text()[-256:-1])
+                    self._array_key = key.group(1) if key else None
+                    self._array_index = 0
+                self._stack.append(char)
+                self._starts.append(self._length - 1)
+            elif char in "}]":
+                if _CLOSERS[self._stack[-1]] != char:
+                    self._reset()
+                    continue
+                self._stack.pop()
+                start = self._starts.pop()
+                if char == "}" and len(self._stack) == 2 and self._stack[1] == "[" and self._array_key:
+                    self._item_closed(start)
+                if not self._stack:
+                    completed.extend(self._finish())
+                else:
+                    self._safe_points.append((self._length, "".join(self._stack)))
+            elif char == ",":
+                self._safe_points.append((self._length - 1, "".join(self._stack)))
+
+        if self._stack:
+            self._append(chunk[position:])
+        self.offset += len(chunk)
+        self.objects.extend(completed)
+        return completed
+
+    def feed_all(self, chunks: Iterable[str]) -> List[Any]:
+        completed = []
+        for chunk in chunks:
+            completed.extend(self.feed(chunk))
+        return completed
+
+    def drain_items(self) -> List[tuple]:
+        """
+        `(array_name, index, item)` for each object completed inside an array
+        of the top-level object since the last call, e.g.
+        `("steps", 0, {...})`.
+        """
+        items, self._items = self._items, []
+        return items
+
+    def _item_closed(self, start: int):
+        try:
+            item = json.loads(self._text()[start:self._length])
+        except json.JSONDecodeError:
+            return
+        self._items.append((self._array_key, self._array_index, item))
+        self._array_index += 1
+
+    def close(self) -> List[Any]:
+        """
+        Signal the end of the input. If an unbalanced "{" in prose swallowed
+        the real object, rescan from just after it and return what is found.
+        """
+        if not self._stack:
+            return []
+        text = self._text()
+        inner = JSONObjectExtractor()
+        found = inner.feed(text[1:]) + inner.close()
+        if found:
+            self._reset()
+            self.objects.extend(found)
+        return found
+
+    def partial(self) -> Optional[Dict[str, Any]]:
+        """
+        Best-effort parse of the object that is still open, by closing any
+        open string and containers. Falls back to earlier cut points (after
+        the last complete member) until something parses.
+        """
+        if not self._stack:
+            return None
+        text = "".join(self._buffer)
+        attempts = []
+        if self._in_string:
+            # Close the string, dropping a dangling escape character
+            closed = text[:-1] if self._escape else text
+            attempts.append((closed + '"', "".join(self._stack)))
+        else:
+            attempts.append((text, "".join(self._stack)))
+        attempts.extend((text[:length], stack) for length, stack in reversed(self._safe_points))
+        for prefix, stack in attempts:
+            candidate = prefix.rstrip().rstrip(",").rstrip()
+            if candidate.endswith(":"):
+                continue
+            candidate += "".join(_CLOSERS[opener] for opener in reversed(stack))
+            try:
+                parsed = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                return parsed
+        return None
+
+    def _text(self) -> str:
+        """The open candidate so far, joined into one string."""
+        if len(self._buffer) > 1:
+            self._buffer = ["".join(self._buffer)]
+        return self._buffer[0] if self._buffer else ""
+
+    def _start(self):
+        self._buffer = ["{"]
+        self._length = 1
+        self._stack = ["{"]
+        self._starts = [0]
+        self._array_key = None
+        self._in_string = False
+        self._escape = False
+        self._safe_points = []
+
+    def _append(self, text: str):
+        if text:
+            self._buffer.append(text)
+            self._length += len(text)
+
+    def _reset(self):
+        self._buffer = []
+        self._length = 0
+        self._stack = []
+        self._starts = []
+        self._array_key = None
+        self._in_string = False
+        self._escape = False
+        self._safe_points = []
+
+    def _finish(self) -> List[Any]:
+        text = "".join(self._buffer)
+        self._reset()
+        try:
+            return [json.loads(text)]
+        except json.JSONDecodeError:
+            # Not JSON after all (e.g. "{braces}" in prose); look for objects
+            # that start inside it
+            return JSONObjectExtractor().feed(text[1:])
+
+
+def extract_json_objects(text: str) -> List[Any]:
+    """All top-level JSON objects found in `text`, in order."""
+    extractor = JSONObjectExtractor()
+    return extractor.feed(text) + extractor.close()
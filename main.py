@@ -7,19 +7,34 @@ import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 
-from fastapi import FastAPI, HTTPException
+from contextlib import aclosing, asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, List
 
 from google.adk.runners import InMemoryRunner
-from google.adk.agents.run_config import RunConfig
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.genai import types
 from google.genai.types import Content, Part
 
 # Import our agent
-from agent import root_agent, scrape_recipe_from_url
+from agent import (
+    root_agent, scrape_recipe_from_url, inflight_requests, summarize_conversation,
+    runner_options, TurnUsage, response_cache, AGENT_TIMEOUT
+)
+from conversation_history import ConversationHistory
+from session_store import BoundedSessionStore
+from recipe_cache import RecipeCache, cache_key
+from batch_scraper import BatchScraper, BatchJobRegistry, TooManyBatchJobs
+from agent_scheduler import AgentScheduler, SchedulerRejected, INTERACTIVE, BULK, BACKGROUND
+from deadlines import AgentTimeout, stream_with_deadline, with_deadline
+from recipe_model import Recipe, encode_json
+from recipe_parser import close_http_client, is_usable_scrape, validate_recipe
+import tracing
+from structured_logging import get_logger, flush_logs
 
 # Load environment variables
 load_dotenv()
@@ -27,6 +42,38 @@ load_dotenv()
 # Configuration
 APP_NAME = "a11Yum Recipe Assistant"
 
+logger = get_logger("main")
+
+# Session store limits
+SESSION_MAX_COUNT = int(os.environ.get("SESSION_MAX_COUNT", "1000"))
+SESSION_MAX_BYTES = int(os.environ.get("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_IDLE_TTL = float(os.environ.get("SESSION_IDLE_TTL", "1800"))
+SESSION_SWEEP_INTERVAL = float(os.environ.get("SESSION_SWEEP_INTERVAL", "60"))
+
+# Scraped recipe cache
+RECIPE_CACHE_PATH = os.environ.get("RECIPE_CACHE_PATH", "recipe_cache.db")
+RECIPE_CACHE_TTL = float(os.environ.get("RECIPE_CACHE_TTL", str(7 * 24 * 3600)))
+RECIPE_CACHE_STALE_TTL = float(os.environ.get("RECIPE_CACHE_STALE_TTL", str(30 * 24 * 3600)))
+RECIPE_CACHE_MAX_ENTRIES = int(os.environ.get("RECIPE_CACHE_MAX_ENTRIES", "5000"))
+RECIPE_CACHE_MAX_BYTES = int(os.environ.get("RECIPE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Batch scraping limits
+BATCH_MAX_URLS = int(os.environ.get("BATCH_MAX_URLS", "1000"))
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_MAX_PER_HOST = int(os.environ.get("BATCH_MAX_PER_HOST", "2"))
+BATCH_PER_HOST_INTERVAL = float(os.environ.get("BATCH_PER_HOST_INTERVAL", "0.5"))
+BATCH_MAX_JOBS = int(os.environ.get("BATCH_MAX_JOBS", "100"))
+
+# Admission control for model calls: global cap (part of it kept for /chat),
+# queue limits before shedding with 429, and per-user token buckets
+AGENT_MAX_CONCURRENCY = int(os.environ.get("AGENT_MAX_CONCURRENCY", "16"))
+AGENT_RESERVED_INTERACTIVE = int(os.environ.get("AGENT_RESERVED_INTERACTIVE", "4"))
+AGENT_MAX_QUEUE = int(os.environ.get("AGENT_MAX_QUEUE", "100"))
+AGENT_MAX_BULK_QUEUE = int(os.environ.get("AGENT_MAX_BULK_QUEUE", "50"))
+AGENT_QUEUE_TIMEOUT = float(os.environ.get("AGENT_QUEUE_TIMEOUT", "30"))
+AGENT_USER_RATE = float(os.environ.get("AGENT_USER_RATE", "1.0"))
+AGENT_USER_BURST = float(os.environ.get("AGENT_USER_BURST", "10"))
+
 #
 # Pydantic Models for API
 #
@@ -35,6 +82,7 @@ class RecipeQuery(BaseModel):
     user_input: str
     session_id: Optional[str] = "default"
     user_id: Optional[str] = "user"
+    use_cache: Optional[bool] = True  # allow a semantically cached answer for a first turn
 
 class RecipeResponse(BaseModel):
     success: bool
@@ -42,6 +90,7 @@ class RecipeResponse(BaseModel):
     error: Optional[str] = None
     session_id: Optional[str] = None
     user_id: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None  # input tokens and time to first token
 
 class SessionInfo(BaseModel):
     session_id: str
@@ -52,6 +101,7 @@ class RecipeURLRequest(BaseModel):
     url: str
     user_id: Optional[str] = "user"
     session_id: Optional[str] = "recipe_scrape"
+    force_refresh: Optional[bool] = False
 
 class RecipeScrapingResponse(BaseModel):
     success: bool
@@ -59,48 +109,114 @@ class RecipeScrapingResponse(BaseModel):
     error: Optional[str] = None
     url: str
     processing_time: Optional[float] = None
+    cache_hit: Optional[bool] = None
+    cache_status: Optional[str] = None
+
+class BatchScrapeRequest(BaseModel):
+    urls: List[str]
+    mode: Optional[str] = "stream"  # "stream" for NDJSON results, "job" for polling
+    max_concurrency: Optional[int] = None
 
 #
 # Agent Session Management
 #
 
+def estimate_session_bytes(session) -> int:
+    """Rough size of a session, based on the text held in its events."""
+    size = 0
+    for event in getattr(session, "events", None) or []:
+        size += 256  # per-event overhead (ids, timestamps, actions)
+        if event.content and event.content.parts:
+            for part in event.content.parts:
+                if part.text:
+                    size += len(part.text)
+    return size
+
+# Every model call made by this server goes through this gate
+agent_scheduler = AgentScheduler(
+    max_concurrency=AGENT_MAX_CONCURRENCY,
+    reserved_interactive=AGENT_RESERVED_INTERACTIVE,
+    max_queue=AGENT_MAX_QUEUE,
+    max_bulk_queue=AGENT_MAX_BULK_QUEUE,
+    queue_timeout=AGENT_QUEUE_TIMEOUT,
+    user_rate=AGENT_USER_RATE,
+    user_burst=AGENT_USER_BURST,
+)
+
+async def summarize_in_background(summary: str, turns) -> str:
+    """History summaries wait behind chat and scrapes for a model slot"""
+    async with agent_scheduler.slot(BACKGROUND, shed=False):
+        return await summarize_conversation(summary, turns)
+
 class AgentSessionManager:
     def __init__(self):
-        self.sessions: Dict[str, Any] = {}
-        self.runners: Dict[str, Any] = {}
+        # One runner (and session service) is shared by every session
+        self.runner = InMemoryRunner(**runner_options(root_agent, APP_NAME))
+        self.sessions = BoundedSessionStore(
+            max_sessions=SESSION_MAX_COUNT,
+            max_bytes=SESSION_MAX_BYTES,
+            idle_ttl=SESSION_IDLE_TTL,
+        )
+        # Bounded history per session key, used to rotate long ADK sessions
+        self.histories: Dict[str, ConversationHistory] = {}
+        # session key -> [lock, holders]; serializes creating and rotating
+        # the ADK session behind a key, so concurrent requests don't orphan one
+        self._session_locks: Dict[str, list] = {}
+    
+    @asynccontextmanager
+    async def _session_lock(self, session_key: str):
+        entry = self._session_locks.setdefault(session_key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._session_locks[session_key]
     
     async def get_or_create_session(self, user_id: str, session_id: str):
         """Get existing session or create a new one"""
         session_key = f"{user_id}_{session_id}"
         
-        if session_key not in self.sessions:
-            # Create a new runner
-            runner = InMemoryRunner(
-                app_name=APP_NAME,
-                agent=root_agent,
-            )
-            
-            # Create a session
-            session = await runner.session_service.create_session(
-                app_name=APP_NAME,
-                user_id=user_id,
-            )
-            
-            # Store both runner and session
-            self.runners[session_key] = runner
-            self.sessions[session_key] = session
-            
-            print(f"✅ Created new session: {session_key}")
+        with tracing.span("session.lookup") as lookup:
+            session = self.sessions.get(session_key)
+            lookup.set(created=False)
+            if session is None:
+                async with self._session_lock(session_key):
+                    # A concurrent first request may have created it meanwhile
+                    if session_key in self.sessions:
+                        return self.runner, self.sessions.get(session_key)
+                    
+                    # Create a session on the shared runner
+                    session = await self.runner.session_service.create_session(
+                        app_name=APP_NAME,
+                        user_id=user_id,
+                    )
+                    lookup.set(created=True)
+                    
+                    evicted = self.sessions.put(session_key, session, estimate_session_bytes(session))
+                    await self._drop_sessions(evicted)
+                    
+                    logger.info("Created session", extra={"session_key": session_key})
         
-        return self.runners[session_key], self.sessions[session_key]
+        return self.runner, session
     
-    async def send_message(self, user_id: str, session_id: str, message: str):
+    async def send_message(self, user_id: str, session_id: str, message: str,
+                           usage: Optional[TurnUsage] = None, use_cache: bool = True):
         """Send a message to the agent and get response"""
+        usage = usage or TurnUsage("chat")
+        session_key = f"{user_id}_{session_id}"
+        first_turn = use_cache and self._is_first_turn(session_key)
+        if first_turn:
+            cached = await self._cached_first_turn(user_id, session_id, message, usage)
+            if cached is not None:
+                return cached
+        runner, session, prompt = await self._prepare_turn(user_id, session_id, message)
+        self.sessions.acquire(session_key)
         try:
-            runner, session = await self.get_or_create_session(user_id, session_id)
-            
             # Create content from message
-            content = Content(role="user", parts=[Part.from_text(text=message)])
+            content = Content(role="user", parts=[Part.from_text(text=prompt)])
             
             # Run config for text response
             run_config = RunConfig(
@@ -110,26 +226,214 @@ class AgentSessionManager:
             
             # Run the agent
             events = runner.run_async(
-                session=session,
+                user_id=session.user_id,
+                session_id=session.id,
                 new_message=content,
                 run_config=run_config
             )
             
-            # Collect the response
-            response_text = ""
-            async for event in events:
-                if event.is_final_response():
-                    # Extract text from the response
-                    if event.content and event.content.parts:
-                        for part in event.content.parts:
-                            if part.text:
-                                response_text += part.text
+            # Collect the response. The session is stateful, so a slow turn
+            # is cancelled at the deadline rather than hedged
+            async def collect():
+                response_text = ""
+                with usage.model_run():
+                    async with aclosing(events):
+                        async for event in events:
+                            usage.observe(event)
+                            if event.is_final_response():
+                                # Extract text from the response
+                                if event.content and event.content.parts:
+                                    for part in event.content.parts:
+                                        if part.text:
+                                            response_text += part.text
+                return response_text
+            
+            response_text = await with_deadline(collect(), AGENT_TIMEOUT, usage.label)
+            usage.report()
+            await self._refresh_size(session_key, session)
+            self._record_turn(session_key, message, response_text)
+            if first_turn and response_text:
+                response_cache.put(message, response_text, scope="chat", user_id=user_id)
             
             return response_text if response_text else "No response received from agent."
             
         except Exception as e:
-            print(f"❌ Error in send_message: {e}")
+            logger.exception("send_message failed", extra={"session_key": session_key})
             raise e
+        finally:
+            self.sessions.release(session_key)
+    
+    async def stream_message(self, user_id: str, session_id: str, message: str,
+                             usage: Optional[TurnUsage] = None,
+                             use_cache: bool = True) -> AsyncIterator[str]:
+        """
+        Send a message to the agent and yield response text as it is generated.
+
+        Closing this generator (e.g. when the client disconnects) closes the
+        underlying runner.run_async generator and stops the model call; so
+        does AgentTimeout once the turn has run for AGENT_TIMEOUT seconds.
+        """
+        session_key = f"{user_id}_{session_id}"
+        usage = usage or TurnUsage("chat_stream")
+        first_turn = use_cache and self._is_first_turn(session_key)
+        if first_turn:
+            cached = await self._cached_first_turn(user_id, session_id, message, usage)
+            if cached is not None:
+                yield cached
+                return
+        runner, session, prompt = await self._prepare_turn(user_id, session_id, message)
+        self.sessions.acquire(session_key)
+        try:
+            content = Content(role="user", parts=[Part.from_text(text=prompt)])
+            
+            # SSE streaming mode makes the runner emit partial text events
+            run_config = RunConfig(
+                response_modalities=["TEXT"],
+                streaming_mode=StreamingMode.SSE
+            )
+            
+            events = stream_with_deadline(runner.run_async(
+                user_id=session.user_id,
+                session_id=session.id,
+                new_message=content,
+                run_config=run_config
+            ), AGENT_TIMEOUT, usage.label)
+            
+            # Partial events carry the text deltas; the aggregated event that
+            # follows them repeats the full text, so only yield it when no
+            # partials were streamed for that model turn.
+            streamed = False
+            response_parts = []
+            with usage.model_run():
+                async with aclosing(events):
+                    async for event in events:
+                        usage.observe(event)
+                        text = ""
+                        if event.content and event.content.parts:
+                            text = "".join(part.text for part in event.content.parts if part.text)
+                        if event.partial:
+                            if text:
+                                streamed = True
+                                response_parts.append(text)
+                                yield text
+                        else:
+                            if text and event.is_final_response() and not streamed:
+                                response_parts.append(text)
+                                yield text
+                            streamed = False
+            
+            usage.report()
+            await self._refresh_size(session_key, session)
+            self._record_turn(session_key, message, "".join(response_parts))
+            if first_turn and response_parts:
+                response_cache.put(message, "".join(response_parts), scope="chat", user_id=user_id)
+        finally:
+            self.sessions.release(session_key)
+    
+    def _is_first_turn(self, session_key: str) -> bool:
+        history = self.histories.get(session_key)
+        return history is None or history.total_turns == 0
+    
+    async def _cached_first_turn(self, user_id: str, session_id: str, message: str,
+                                 usage: TurnUsage) -> Optional[str]:
+        """
+        A first turn has no conversation context, so a semantically cached
+        answer to a close enough question is as good as a new one. The turn
+        is recorded in the history, so the next turn starts an agent session
+        that carries it.
+        """
+        with tracing.span("semantic_cache.lookup") as lookup:
+            cached = response_cache.lookup(message, scope="chat", user_id=user_id)
+            lookup.set(hit=cached is not None)
+        if cached is None:
+            return None
+        response, similarity = cached
+        session_key = f"{user_id}_{session_id}"
+        await self.get_or_create_session(user_id, session_id)
+        history = self.histories.get(session_key)
+        if history is None:
+            history = self.histories[session_key] = ConversationHistory(summarize_in_background)
+        history.add_turn(message, response, in_session=False)
+        usage.mark_cached()
+        logger.info("Semantic cache hit", extra={"session_key": session_key, "similarity": round(similarity, 3)})
+        return response
+    
+    async def _prepare_turn(self, user_id: str, session_id: str, message: str):
+        """
+        Return `(runner, session, prompt)` for the next turn. Once a session has
+        outgrown the history policy it is replaced by a fresh ADK session, and
+        the prompt carries the rolling summary and recent turns instead.
+        """
+        session_key = f"{user_id}_{session_id}"
+        runner, session = await self.get_or_create_session(user_id, session_id)
+        history = self.histories.get(session_key)
+        if history is None:
+            history = self.histories[session_key] = ConversationHistory(summarize_in_background)
+        if not history.needs_new_session():
+            return runner, session, message
+        
+        async with self._session_lock(session_key):
+            if self.sessions.get(session_key) is session and history.needs_new_session():
+                return await self._rotate_session(runner, session, session_key, history, message)
+        # Another turn rotated (or evicted) the session while this one waited
+        return await self._prepare_turn(user_id, session_id, message)
+    
+    async def _rotate_session(self, runner, session, session_key: str, history: ConversationHistory,
+                              message: str):
+        with tracing.span("prompt.build", rotated=True) as build:
+            fresh = await runner.session_service.create_session(app_name=APP_NAME, user_id=session.user_id)
+            evicted = self.sessions.put(session_key, fresh, estimate_session_bytes(fresh))
+            await runner.session_service.delete_session(
+                app_name=APP_NAME,
+                user_id=session.user_id,
+                session_id=session.id,
+            )
+            await self._drop_sessions(evicted)
+            logger.info("Rotated session", extra={"session_key": session_key, "folded_turns": history.folded_turns})
+            
+            context = history.start_session()
+            if context:
+                message = f"{context}\n\nThe user now says:\n{message}"
+            build.set(prompt_chars=len(message))
+        return runner, fresh, message
+    
+    def _record_turn(self, session_key: str, message: str, response: str):
+        history = self.histories.get(session_key)
+        if history is not None and response:
+            history.add_turn(message, response)
+    
+    async def _refresh_size(self, session_key: str, session):
+        """Re-measure a session after a turn so the byte budget stays accurate."""
+        stored = await self.runner.session_service.get_session(
+            app_name=APP_NAME,
+            user_id=session.user_id,
+            session_id=session.id,
+        )
+        if stored is not None:
+            evicted = self.sessions.update_size(session_key, estimate_session_bytes(stored))
+            await self._drop_sessions(evicted)
+    
+    async def _drop_sessions(self, evicted):
+        """Release evicted sessions from the shared runner's session service"""
+        for session_key, session in evicted:
+            history = self.histories.pop(session_key, None)
+            if history is not None:
+                history.cancel()
+            await self.runner.session_service.delete_session(
+                app_name=APP_NAME,
+                user_id=session.user_id,
+                session_id=session.id,
+            )
+            logger.info("Evicted session", extra={"session_key": session_key})
+    
+    async def sweep_forever(self, interval: float = SESSION_SWEEP_INTERVAL):
+        """Background task that evicts idle sessions every `interval` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._drop_sessions(self.sessions.sweep())
+            except Exception as e:
+                logger.exception("Session sweep failed")
     
     def get_session_info(self, user_id: str, session_id: str):
         """Get information about a session"""
@@ -145,27 +449,109 @@ class AgentSessionManager:
     
     def list_sessions(self):
         """List all active sessions"""
-        return list(self.sessions.keys())
+        return self.sessions.keys()
+    
+    def stats(self):
+        """Session store metrics, including eviction counts"""
+        return self.sessions.stats()
 
 # Initialize session manager
 session_manager = AgentSessionManager()
 
+#
+# Scraped Recipe Cache
+#
+
+recipe_cache = RecipeCache(
+    path=RECIPE_CACHE_PATH,
+    ttl=RECIPE_CACHE_TTL,
+    stale_ttl=RECIPE_CACHE_STALE_TTL,
+    max_entries=RECIPE_CACHE_MAX_ENTRIES,
+    max_bytes=RECIPE_CACHE_MAX_BYTES,
+)
+
+# Background refreshes of stale entries, keyed by cache key
+_refresh_tasks: Dict[str, asyncio.Task] = {}
+
+async def _scrape_and_store(url: str, priority: int = BULK, user_id: Optional[str] = None,
+                            shed: bool = False) -> Dict[str, Any]:
+    """
+    Scrape a recipe and cache it if the scrape succeeded. Only the model call
+    of the scrape that does the work takes an agent slot (and a rate token);
+    concurrent scrapes of the URL wait on it, and local parsing takes none.
+    """
+    recipe_data = await scrape_recipe_from_url(url, admit=lambda: agent_scheduler.slot(priority, user_id, shed))
+    if is_usable_scrape(recipe_data):
+        await recipe_cache.aput(url, recipe_data)
+    return recipe_data
+
+def _schedule_refresh(url: str):
+    """Revalidate a stale entry in the background, once per key"""
+    key = cache_key(url)
+    if key in _refresh_tasks:
+        return
+    task = asyncio.create_task(_scrape_and_store(url, BACKGROUND))
+    _refresh_tasks[key] = task
+    task.add_done_callback(lambda _: _refresh_tasks.pop(key, None))
+
+async def peek_scraped_recipe(url: str):
+    """
+    Return `(recipe_data, cache_status)` if the URL is cached, else None.
+    Stale entries are served while a refresh runs in the background
+    (stale-while-revalidate).
+    """
+    with tracing.span("recipe_cache.lookup") as lookup:
+        cached, status = await recipe_cache.aget(url)
+        lookup.set(status=status)
+    if status == "fresh":
+        return cached, "hit"
+    if status == "stale":
+        _schedule_refresh(url)
+        return cached, "stale"
+    return None
+
+async def get_scraped_recipe(url: str, force_refresh: bool = False, user_id: Optional[str] = None,
+                             shed: bool = False):
+    """
+    Return `(recipe_data, cache_status)` for a URL, scraping on a cache miss.
+    Only a scrape's model call takes a (bulk) agent slot; `user_id` and
+    `shed` are as in AgentScheduler.acquire.
+    """
+    if not force_refresh:
+        found = await peek_scraped_recipe(url)
+        if found is not None:
+            return found
+    return await _scrape_and_store(url, BULK, user_id, shed), "miss"
+
+batch_scraper = BatchScraper(
+    scrape=get_scraped_recipe,
+    peek=peek_scraped_recipe,
+    max_concurrency=BATCH_MAX_CONCURRENCY,
+    max_per_host=BATCH_MAX_PER_HOST,
+    per_host_interval=BATCH_PER_HOST_INTERVAL,
+)
+batch_jobs = BatchJobRegistry(batch_scraper, max_jobs=BATCH_MAX_JOBS)
+
 #
 # FastAPI Application
 #
 
 # Using lifespan events (modern FastAPI approach)
-from contextlib import asynccontextmanager
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("🚀 Starting a11Yum Recipe Assistant API with Google ADK...")
-    print(f"📊 Agent: {getattr(root_agent, 'name', 'gideon')}")
-    print(f"📋 App: {APP_NAME}")
+    logger.info("Starting a11Yum Recipe Assistant API with Google ADK",
+                extra={"agent": getattr(root_agent, 'name', 'gideon'), "app": APP_NAME})
+    sweeper = asyncio.create_task(session_manager.sweep_forever())
     yield
     # Shutdown
-    print("🔄 Shutting down a11Yum Recipe Assistant API...")
+    logger.info("Shutting down a11Yum Recipe Assistant API")
+    sweeper.cancel()
+    batch_jobs.cancel_all()
+    recipe_cache.close()
+    await close_http_client()
+    await asyncio.to_thread(tracing.flush)
+    await asyncio.to_thread(flush_logs)
 
 app = FastAPI(
     title="a11Yum Recipe Assistant API",
@@ -182,11 +568,29 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(tracing.TracingMiddleware, app_name="main")
 
 #
 # API Endpoints
 #
 
+@app.exception_handler(SchedulerRejected)
+async def agent_overloaded(request: Request, exc: SchedulerRejected):
+    """Shed load: 429 with a Retry-After estimated from the queue"""
+    logger.warning("Agent call rejected", extra={"reason": exc.reason, "path": request.url.path})
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "reason": exc.reason, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(AgentTimeout)
+async def agent_timed_out(request: Request, exc: AgentTimeout):
+    """The model call was cancelled at its deadline"""
+    logger.warning("Agent call timed out", extra={"label": exc.label, "timeout": exc.timeout,
+                                                  "path": request.url.path})
+    return JSONResponse(status_code=504, content={"detail": str(exc), "timeout": exc.timeout})
+
 @app.get("/")
 async def root():
     """Health check and service info"""
@@ -197,6 +601,11 @@ async def root():
         "description": "Accessible recipe assistance with Google Search"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: request, span, TTFT and token histograms"""
+    return tracing.metrics_response()
+
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
@@ -204,6 +613,11 @@ async def health_check():
     return {
         "status": "healthy",
         "active_sessions": len(active_sessions),
+        "session_store": session_manager.stats(),
+        "recipe_cache": recipe_cache.stats(),
+        "request_coalescing": inflight_requests.stats(),
+        "semantic_cache": response_cache.stats(),
+        "agent_scheduler": agent_scheduler.stats(),
         "app_name": APP_NAME,
         "agent_name": root_agent.name if hasattr(root_agent, 'name') else "gideon"
     }
@@ -214,28 +628,37 @@ async def chat_with_agent(query: RecipeQuery):
     Send a message to the recipe assistant agent.
     The agent can help with accessible cooking tips, recipes, and answer questions using Google Search.
     """
-    print(f"📥 Received query from {query.user_id}/{query.session_id}: {query.user_input}")
+    logger.info("Received query", extra={"user_id": query.user_id, "session_id": query.session_id,
+                                         "user_text": query.user_input})
     
+    # Rejections propagate as 429 (see agent_overloaded)
+    ticket = await agent_scheduler.acquire(INTERACTIVE, query.user_id)
     try:
         # Send message to agent
+        usage = TurnUsage("chat")
         response_text = await session_manager.send_message(
             user_id=query.user_id,
             session_id=query.session_id,
-            message=query.user_input
+            message=query.user_input,
+            usage=usage,
+            use_cache=query.use_cache is not False
         )
         
-        print(f"✅ Agent response: {response_text[:100]}...")
+        logger.info("Agent response", extra={"response_text": response_text[:100], "chars": len(response_text)})
         
         return RecipeResponse(
             success=True,
             response=response_text,
             session_id=query.session_id,
-            user_id=query.user_id
+            user_id=query.user_id,
+            usage=usage.to_dict()
         )
         
+    except AgentTimeout:
+        raise
     except Exception as e:
         error_msg = f"Error processing query: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.exception("Chat query failed")
         
         return RecipeResponse(
             success=False,
@@ -243,6 +666,81 @@ async def chat_with_agent(query: RecipeQuery):
             session_id=query.session_id,
             user_id=query.user_id
         )
+    finally:
+        ticket.release()
+
+def _format_stream_event(stream_format: str, event_type: str, data: Dict[str, Any]) -> str:
+    """Encode one stream event as an SSE frame or an NDJSON line"""
+    if stream_format == "ndjson":
+        return json.dumps({"type": event_type, **data}) + "\n"
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(query: RecipeQuery, request: Request,
+                      stream_format: str = Query("sse", alias="format", pattern="^(sse|ndjson)$")):
+    """
+    Stream the agent's reply as it is generated.
+
+    Emits `chunk` events with partial text, then a single `done` (or `error`)
+    event. Use `?format=ndjson` for newline-delimited JSON instead of
+    Server-Sent Events. The response is pulled by the client, so a slow reader
+    slows the agent down instead of buffering, and a disconnect cancels the
+    underlying agent run. Admission happens before the stream starts, so an
+    overloaded server still answers 429 with Retry-After. A turn still running
+    after AGENT_TIMEOUT is cancelled and ends with an `error` event.
+    """
+    logger.info("Received streaming query", extra={"user_id": query.user_id, "session_id": query.session_id,
+                                                   "user_text": query.user_input})
+    ticket = await agent_scheduler.acquire(INTERACTIVE, query.user_id)
+    
+    async def event_source():
+        usage = TurnUsage("chat_stream")
+        chunks = session_manager.stream_message(
+            user_id=query.user_id,
+            session_id=query.session_id,
+            message=query.user_input,
+            usage=usage,
+            use_cache=query.use_cache is not False
+        )
+        try:
+            async with aclosing(chunks):
+                async for chunk in chunks:
+                    if await request.is_disconnected():
+                        logger.info("Client disconnected", extra={"user_id": query.user_id, "session_id": query.session_id})
+                        return
+                    yield _format_stream_event(stream_format, "chunk", {"text": chunk})
+            yield _format_stream_event(stream_format, "done", {
+                "session_id": query.session_id,
+                "user_id": query.user_id,
+                "usage": usage.to_dict()
+            })
+        except AgentTimeout as e:
+            logger.warning("Streaming query timed out", extra={"user_id": query.user_id, "session_id": query.session_id})
+            yield _format_stream_event(stream_format, "error", {"error": str(e), "timeout": True})
+        except Exception as e:
+            error_msg = f"Error processing query: {str(e)}"
+            logger.exception("Streaming query failed")
+            yield _format_stream_event(stream_format, "error", {"error": error_msg})
+        finally:
+            ticket.release()
+    
+    media_type = "application/x-ndjson" if stream_format == "ndjson" else "text/event-stream"
+    # The background task also frees the slot if the stream is never started
+    return StreamingResponse(
+        event_source(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ticket.release)
+    )
+
+@app.put("/users/{user_id}/semantic-cache")
+async def set_semantic_cache(user_id: str, enabled: bool = Query(...)):
+    """Opt a user out of (or back into) semantically cached answers"""
+    if enabled:
+        response_cache.opt_in(user_id)
+    else:
+        response_cache.opt_out(user_id)
+    return {"user_id": user_id, "semantic_cache": enabled}
 
 @app.get("/session/{user_id}/{session_id}", response_model=SessionInfo)
 async def get_session_info(user_id: str, session_id: str):
@@ -259,11 +757,41 @@ async def list_active_sessions():
         "count": len(sessions)
     }
 
+def scraping_response(success: bool, url: str, recipe_data: Optional[Dict[str, Any]] = None,
+                      error: Optional[str] = None, processing_time: Optional[float] = None,
+                      cache_hit: Optional[bool] = None, cache_status: Optional[str] = None) -> Response:
+    """
+    Serialize a RecipeScrapingResponse straight to JSON bytes. Recipes that
+    already pass validate_recipe (every cached one) are encoded as they are;
+    others, such as a recovered partial recipe, are coerced through the
+    typed Recipe model first. Data that is not a recipe (the raw text
+    fallback) is passed through unchanged.
+    """
+    with tracing.span("serialize") as serialize:
+        if recipe_data is not None and validate_recipe(recipe_data):
+            try:
+                recipe_data = Recipe.from_dict(recipe_data).to_dict()
+            except (ValueError, TypeError, AttributeError):
+                pass
+        body = {
+            "success": success,
+            "recipe_data": recipe_data,
+            "error": error,
+            "url": url,
+            "processing_time": processing_time,
+            "cache_hit": cache_hit,
+            "cache_status": cache_status,
+        }
+        content = encode_json(body)
+        serialize.set(bytes=len(content))
+    return Response(content=content, media_type="application/json")
+
 @app.post("/scrape-recipe", response_model=RecipeScrapingResponse)
 async def scrape_recipe_endpoint(request: RecipeURLRequest):
     """
     Scrape recipe data from a given URL using Google Search tool.
     Returns structured recipe data matching the example-recipe-structure.json format.
+    Results are cached by normalized URL; set force_refresh to bypass the cache.
     
     This endpoint uses the Google ADK agent to:
     1. Search and extract recipe information from the provided URL
@@ -274,45 +802,110 @@ async def scrape_recipe_endpoint(request: RecipeURLRequest):
     import time
     start_time = time.time()
     
-    print(f"🔍 Scraping recipe from URL: {request.url}")
+    logger.info("Scraping recipe", extra={"url": request.url})
     
     try:
-        # Call the recipe scraping function
-        recipe_data = await scrape_recipe_from_url(request.url)
+        # Serve from the cache, falling back to the recipe scraping function
+        # A scrape (cache miss) is bulk work: it yields to /chat and may be shed with 429
+        recipe_data, cache_status = await get_scraped_recipe(
+            request.url, request.force_refresh, user_id=request.user_id, shed=True
+        )
         
         processing_time = time.time() - start_time
         
         # Check if there was an error in the scraping
         if "error" in recipe_data:
-            print(f"❌ Recipe scraping error: {recipe_data['error']}")
-            return RecipeScrapingResponse(
+            logger.warning("Recipe scraping failed", extra={"url": request.url, "error": recipe_data["error"]})
+            return scraping_response(
                 success=False,
                 error=recipe_data["error"],
                 url=request.url,
-                processing_time=processing_time
+                processing_time=processing_time,
+                cache_hit=False,
+                cache_status=cache_status
             )
         
-        print(f"✅ Successfully scraped recipe: {recipe_data.get('name', 'Unknown Recipe')}")
+        logger.info("Scraped recipe", extra={"url": request.url, "cache_status": cache_status,
+                                             "title": recipe_data.get('title', 'Unknown Recipe')})
         
-        return RecipeScrapingResponse(
+        return scraping_response(
             success=True,
             recipe_data=recipe_data,
             url=request.url,
-            processing_time=processing_time
+            processing_time=processing_time,
+            cache_hit=cache_status != "miss",
+            cache_status=cache_status
         )
         
+    except SchedulerRejected:
+        raise
     except Exception as e:
         processing_time = time.time() - start_time
         error_msg = f"Failed to scrape recipe: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.exception("Recipe scrape failed", extra={"url": request.url})
         
-        return RecipeScrapingResponse(
+        return scraping_response(
             success=False,
             error=error_msg,
             url=request.url,
             processing_time=processing_time
         )
 
+@app.post("/scrape-recipes/batch")
+async def scrape_recipes_batch(request: BatchScrapeRequest, http_request: Request):
+    """
+    Scrape many recipe URLs at once.
+
+    URLs are deduplicated by normalized form and scraped with bounded
+    concurrency and per-host rate limits; cached recipes are returned
+    immediately. In "stream" mode the response is NDJSON: an `accepted` line,
+    one `result` line per URL as soon as it completes, then `done`. In "job"
+    mode the scrape runs in the background and the returned job_id can be
+    polled at GET /scrape-recipes/batch/{job_id}.
+    """
+    if len(request.urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_URLS} URLs per batch")
+    if request.mode not in ("stream", "job"):
+        raise HTTPException(status_code=422, detail="mode must be 'stream' or 'job'")
+    
+    max_concurrency = min(request.max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    logger.info("Batch scrape", extra={"urls": len(request.urls), "mode": request.mode})
+    
+    if request.mode == "job":
+        try:
+            job = batch_jobs.start(request.urls, max_concurrency)
+        except TooManyBatchJobs as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+        return {"job_id": job.job_id, "status": job.status, "total": job.total}
+    
+    unique_urls = BatchScraper.dedupe(request.urls)
+    
+    async def result_lines():
+        yield encode_json({
+            "type": "accepted",
+            "total": len(unique_urls),
+            "duplicates": len(request.urls) - len(unique_urls)
+        }) + b"\n"
+        results = batch_scraper.run(unique_urls, max_concurrency)
+        succeeded = 0
+        async with aclosing(results):
+            async for result in results:
+                if await http_request.is_disconnected():
+                    return
+                succeeded += result["success"]
+                yield encode_json({"type": "result", **result}) + b"\n"
+        yield encode_json({"type": "done", "total": len(unique_urls), "succeeded": succeeded}) + b"\n"
+    
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+@app.get("/scrape-recipes/batch/{job_id}")
+async def get_batch_job(job_id: str, offset: int = 0):
+    """Poll a batch scrape job; `offset` skips results already received"""
+    job = batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job.to_dict(offset)
+
 @app.post("/test-query", response_model=RecipeResponse)
 async def test_query_endpoint(query: RecipeQuery):
     """
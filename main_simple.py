@@ -6,18 +6,32 @@ import json
 from pathlib import Path
 from dotenv import load_dotenv
 
-from fastapi import FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 
+from session_backends import SessionBackend, create_session_backend
+from conversation_history import extractive_summary, split_history
+import tracing
+from structured_logging import get_logger
+
 # Load environment variables
 load_dotenv()
 
 # Configuration
 APP_NAME = "a11Yum Recipe Assistant"
 
+logger = get_logger("main_simple")
+
+# Session storage shared by all workers: memory://, sqlite:///sessions.db or redis://host:6379/0
+SESSION_BACKEND_URL = os.environ.get("SESSION_BACKEND_URL", "memory://")
+# Seconds an idle session is kept
+SESSION_BACKEND_TTL = float(os.environ.get("SESSION_BACKEND_TTL", "86400"))
+# Seconds a worker holds a session while folding its history; outlives any fold
+HISTORY_COMPACT_LEASE = 30
+
 #
 # Pydantic Models for API
 #
@@ -40,51 +54,105 @@ class SessionInfo(BaseModel):
     status: str
 
 #
-# Simple Session Management (in-memory for testing)
+# Simple Session Management (pluggable backend, shared across workers)
 #
 
 class SimpleSessionManager:
-    def __init__(self):
-        self.sessions: Dict[str, Dict] = {}
+    def __init__(self, backend: Optional[SessionBackend] = None, ttl: float = SESSION_BACKEND_TTL):
+        self.backend = backend or create_session_backend(SESSION_BACKEND_URL, "a11yum:simple")
+        self.ttl = ttl
     
     def get_session_key(self, user_id: str, session_id: str) -> str:
         return f"{user_id}_{session_id}"
     
+    def _new_session(self, user_id: str, session_id: str) -> Dict:
+        return {
+            "user_id": user_id,
+            "session_id": session_id,
+            "created_at": "now"
+        }
+    
     def create_or_get_session(self, user_id: str, session_id: str):
         session_key = self.get_session_key(user_id, session_id)
         
-        if session_key not in self.sessions:
-            self.sessions[session_key] = {
-                "user_id": user_id,
-                "session_id": session_id,
-                "messages": [],
-                "created_at": "now"
-            }
-            print(f"✅ Created new session: {session_key}")
+        # One round trip: create if missing, then read the session, summary and messages
+        created, session, summary, messages = (
+            self.backend.pipeline()
+            .set(f"session:{session_key}", self._new_session(user_id, session_id), self.ttl, only_if_absent=True)
+            .get(f"session:{session_key}")
+            .get(f"summary:{session_key}")
+            .list_range(f"messages:{session_key}")
+            .execute()
+        )
+        if created:
+            logger.info("Created session", extra={"session_key": session_key})
         
-        return self.sessions[session_key]
+        return {**session, "summary": summary or "", "messages": messages}
     
     def add_message(self, user_id: str, session_id: str, message: str, response: str):
-        session = self.create_or_get_session(user_id, session_id)
-        session["messages"].append({
-            "user_input": message,
-            "agent_response": response,
-            "timestamp": "now"
-        })
+        session_key = self.get_session_key(user_id, session_id)
+        created, _, _ = (
+            self.backend.pipeline()
+            .set(f"session:{session_key}", self._new_session(user_id, session_id), self.ttl, only_if_absent=True)
+            .expire(f"session:{session_key}", self.ttl)
+            .append(f"messages:{session_key}", {
+                "user_input": message,
+                "agent_response": response,
+                "timestamp": "now"
+            }, self.ttl)
+            .execute()
+        )
+        if created:
+            logger.info("Created session", extra={"session_key": session_key})
+    
+    def compact_history(self, user_id: str, session_id: str):
+        """
+        Fold messages beyond the history policy into the session's rolling
+        summary. Runs after the response is sent, under a short lease so two
+        workers never fold (and trim) the same messages; a compaction that
+        finds the lease taken is skipped, and the next turn's catches up.
+        """
+        session_key = self.get_session_key(user_id, session_id)
+        lease = f"compacting:{session_key}"
+        leased, summary, messages = (
+            self.backend.pipeline()
+            .set(lease, True, HISTORY_COMPACT_LEASE, only_if_absent=True)
+            .get(f"summary:{session_key}")
+            .list_range(f"messages:{session_key}")
+            .execute()
+        )
+        if not leased:
+            return
+        older, _ = split_history(messages, summary or "")
+        pipeline = self.backend.pipeline()
+        if older:
+            # New messages only go to the end of the list, so the first
+            # len(older) items are still the ones read above
+            pipeline.set(f"summary:{session_key}", extractive_summary(summary or "", older), self.ttl)
+            pipeline.list_trim(f"messages:{session_key}", len(older))
+        pipeline.delete(lease).execute()
+        if older:
+            logger.info("Folded messages into the summary", extra={"session_key": session_key, "messages": len(older)})
     
     def get_session_info(self, user_id: str, session_id: str):
         session_key = self.get_session_key(user_id, session_id)
-        exists = session_key in self.sessions
+        session, message_count = (
+            self.backend.pipeline()
+            .get(f"session:{session_key}")
+            .list_len(f"messages:{session_key}")
+            .execute()
+        )
+        exists = session is not None
         
         return {
             "session_id": session_id,
             "user_id": user_id,
             "status": "active" if exists else "not_found",
-            "message_count": len(self.sessions[session_key]["messages"]) if exists else 0
+            "message_count": message_count if exists else 0
         }
     
     def list_sessions(self):
-        return list(self.sessions.keys())
+        return [key[len("session:"):] for key in self.backend.keys("session:")]
 
 # Initialize session manager
 session_manager = SimpleSessionManager()
@@ -231,6 +299,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(tracing.TracingMiddleware, app_name="main_simple")
 
 #
 # API Endpoints
@@ -248,6 +317,11 @@ async def root():
         "note": "This version uses mock responses. Install Google ADK for full functionality."
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return tracing.metrics_response()
+
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
@@ -261,12 +335,13 @@ async def health_check():
     }
 
 @app.post("/chat", response_model=RecipeResponse)
-async def chat_with_agent(query: RecipeQuery):
+async def chat_with_agent(query: RecipeQuery, background_tasks: BackgroundTasks):
     """
     Chat with the recipe assistant (test mode with mock responses).
     The agent focuses on accessible cooking tips, recipes, and guidance.
     """
-    print(f"📥 Received query from {query.user_id}/{query.session_id}: {query.user_input}")
+    logger.info("Received query", extra={"user_id": query.user_id, "session_id": query.session_id,
+                                         "user_text": query.user_input})
     
     try:
         # Generate mock response
@@ -279,8 +354,10 @@ async def chat_with_agent(query: RecipeQuery):
             query.user_input, 
             response_text
         )
+        # Keep the stored history bounded without delaying this response
+        background_tasks.add_task(session_manager.compact_history, query.user_id, query.session_id)
         
-        print(f"✅ Generated response: {len(response_text)} characters")
+        logger.info("Generated response", extra={"chars": len(response_text)})
         
         return RecipeResponse(
             success=True,
@@ -291,7 +368,7 @@ async def chat_with_agent(query: RecipeQuery):
         
     except Exception as e:
         error_msg = f"Error processing query: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.exception("Chat query failed")
         
         return RecipeResponse(
             success=False,
@@ -313,16 +390,16 @@ async def list_active_sessions():
     return {
         "active_sessions": sessions,
         "count": len(sessions),
-        "note": "Sessions are stored in memory and will reset when server restarts"
+        "note": f"Sessions are stored in {type(session_manager.backend).__name__} and expire after {SESSION_BACKEND_TTL:.0f}s idle"
     }
 
 # Keep the test endpoint for compatibility
 @app.post("/test-query", response_model=RecipeResponse)
-async def test_query_endpoint(query: RecipeQuery):
+async def test_query_endpoint(query: RecipeQuery, background_tasks: BackgroundTasks):
     """
     Test endpoint - identical to /chat in this test version
     """
-    return await chat_with_agent(query)
+    return await chat_with_agent(query, background_tasks)
 
 #
 # Startup and Main
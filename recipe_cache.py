@@ -0,0 +1,179 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Persistent, content-addressed cache for scraped recipes
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change the recipe a URL points at
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a recipe URL, so trivially different links to the same
+    page share one cache entry.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+def cache_key(url: str) -> str:
+    """Content address of a URL: the SHA-256 of its normalized form."""
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+class RecipeCache:
+    """
+    SQLite-backed recipe cache.
+
+    Entries younger than `ttl` seconds are fresh. Entries older than that but
+    younger than `ttl + stale_ttl` are stale: they can still be served while a
+    refresh runs in the background. Anything older is treated as a miss. The
+    cache keeps at most `max_entries` rows and `max_bytes` of recipe JSON,
+    evicting the least recently accessed rows first.
+    """
+
+    def __init__(self, path: str = "recipe_cache.db", ttl: float = 7 * 24 * 3600,
+                 stale_ttl: float = 30 * 24 * 3600, max_entries: int = 5000,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recipes (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                data TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_recipes_accessed_at ON recipes (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Look up a recipe. Returns `(data, status)` where status is "fresh",
+        "stale" or None for a miss.
+        """
+        key = cache_key(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, created_at FROM recipes WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, None
+            data, created_at = row
+            age = now - created_at
+            if age > self.ttl + self.stale_ttl:
+                self._conn.execute("DELETE FROM recipes WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None, None
+            self._conn.execute(
+                "UPDATE recipes SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        if age > self.ttl:
+            self.stale_hits += 1
+            return json.loads(data), "stale"
+        self.hits += 1
+        return json.loads(data), "fresh"
+
+    def put(self, url: str, recipe_data: Dict[str, Any]):
+        """Store a recipe and evict old entries if the cache is over budget."""
+        data = json.dumps(recipe_data, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recipes (key, url, data, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key(url), normalize_url(url), data, len(data), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM recipes"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM recipes ORDER BY accessed_at ASC"
+        ).fetchall()
+        doomed = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM recipes WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def invalidate(self, url: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM recipes WHERE key = ?", (cache_key(url),))
+            self._conn.commit()
+
+    async def aget(self, url: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Non-blocking `get` for use from the event loop."""
+        return await asyncio.to_thread(self.get, url)
+
+    async def aput(self, url: str, recipe_data: Dict[str, Any]):
+        """Non-blocking `put` for use from the event loop."""
+        await asyncio.to_thread(self.put, url, recipe_data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM recipes"
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
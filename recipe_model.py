@@ -0,0 +1,335 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Typed recipe model mirroring example-recipe-structure.json and frontend/src/types/Recipe.ts
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _str(value: Any, default: str = "") -> str:
+    return default if value is None else str(value)
+
+def _opt_str(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+def _int(value: Any, default: int = 0) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return default
+
+def _opt_int(value: Any) -> Optional[int]:
+    return None if value is None else _int(value)
+
+def _str_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(item) for item in value]
+
+def _put(data: Dict[str, Any], key: str, value: Any):
+    """Set optional fields only when present, like the TypeScript `?` fields."""
+    if value is not None:
+        data[key] = value
+
+
+@dataclass(slots=True)
+class IngredientAlternative:
+    id: str
+    name: str
+    amount: str
+    reason: str
+    unit: Optional[str] = None
+    accessibilityBenefit: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IngredientAlternative":
+        return cls(
+            id=_str(data.get("id")),
+            name=_str(data.get("name")),
+            amount=_str(data.get("amount")),
+            reason=_str(data.get("reason")),
+            unit=_opt_str(data.get("unit")),
+            accessibilityBenefit=_opt_str(data.get("accessibilityBenefit")),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"id": self.id, "name": self.name, "amount": self.amount}
+        _put(data, "unit", self.unit)
+        data["reason"] = self.reason
+        _put(data, "accessibilityBenefit", self.accessibilityBenefit)
+        return data
+
+
+@dataclass(slots=True)
+class Ingredient:
+    id: str
+    name: str
+    amount: str
+    unit: Optional[str] = None
+    notes: Optional[str] = None
+    alternatives: List[IngredientAlternative] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Ingredient":
+        return cls(
+            id=_str(data.get("id")),
+            name=_str(data.get("name")),
+            amount=_str(data.get("amount")),
+            unit=_opt_str(data.get("unit")),
+            notes=_opt_str(data.get("notes")),
+            alternatives=[IngredientAlternative.from_dict(alt) for alt in data.get("alternatives") or []],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"id": self.id, "name": self.name, "amount": self.amount}
+        _put(data, "unit", self.unit)
+        _put(data, "notes", self.notes)
+        data["alternatives"] = [alt.to_dict() for alt in self.alternatives]
+        return data
+
+
+@dataclass(slots=True)
+class ToolAlternative:
+    id: str
+    name: str
+    reason: str
+    accessibilityBenefit: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ToolAlternative":
+        return cls(
+            id=_str(data.get("id")),
+            name=_str(data.get("name")),
+            reason=_str(data.get("reason")),
+            accessibilityBenefit=_opt_str(data.get("accessibilityBenefit")),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"id": self.id, "name": self.name, "reason": self.reason}
+        _put(data, "accessibilityBenefit", self.accessibilityBenefit)
+        return data
+
+
+@dataclass(slots=True)
+class Tool:
+    id: str
+    name: str
+    required: bool = True
+    safetyNotes: List[str] = field(default_factory=list)
+    alternatives: List[ToolAlternative] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Tool":
+        return cls(
+            id=_str(data.get("id")),
+            name=_str(data.get("name")),
+            required=bool(data.get("required", True)),
+            safetyNotes=_str_list(data.get("safetyNotes")),
+            alternatives=[ToolAlternative.from_dict(alt) for alt in data.get("alternatives") or []],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "required": self.required,
+            "safetyNotes": list(self.safetyNotes),
+            "alternatives": [alt.to_dict() for alt in self.alternatives],
+        }
+
+
+@dataclass(slots=True)
+class StepAlternative:
+    id: str
+    instruction: str
+    reason: str
+    accessibilityBenefit: Optional[str] = None
+    toolChanges: Optional[Dict[str, List[str]]] = None
+    timeAdjustment: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StepAlternative":
+        changes = data.get("toolChanges")
+        return cls(
+            id=_str(data.get("id")),
+            instruction=_str(data.get("instruction")),
+            reason=_str(data.get("reason")),
+            accessibilityBenefit=_opt_str(data.get("accessibilityBenefit")),
+            toolChanges={key: _str_list(value) for key, value in changes.items()} if isinstance(changes, dict) else None,
+            timeAdjustment=_opt_int(data.get("timeAdjustment")),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"id": self.id, "instruction": self.instruction, "reason": self.reason}
+        _put(data, "accessibilityBenefit", self.accessibilityBenefit)
+        _put(data, "toolChanges", self.toolChanges)
+        _put(data, "timeAdjustment", self.timeAdjustment)
+        return data
+
+
+@dataclass(slots=True)
+class RecipeStep:
+    id: str
+    stepNumber: int
+    instruction: str
+    estimatedTime: Optional[int] = None
+    difficulty: Optional[str] = None
+    safetyWarnings: List[str] = field(default_factory=list)
+    alternatives: List[StepAlternative] = field(default_factory=list)
+    requiredTools: List[str] = field(default_factory=list)
+    tips: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RecipeStep":
+        return cls(
+            id=_str(data.get("id")),
+            stepNumber=_int(data.get("stepNumber")),
+            instruction=_str(data.get("instruction")),
+            estimatedTime=_opt_int(data.get("estimatedTime")),
+            difficulty=_opt_str(data.get("difficulty")),
+            safetyWarnings=_str_list(data.get("safetyWarnings")),
+            alternatives=[StepAlternative.from_dict(alt) for alt in data.get("alternatives") or []],
+            requiredTools=_str_list(data.get("requiredTools")),
+            tips=_str_list(data.get("tips")),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"id": self.id, "stepNumber": self.stepNumber, "instruction": self.instruction}
+        _put(data, "estimatedTime", self.estimatedTime)
+        _put(data, "difficulty", self.difficulty)
+        data["safetyWarnings"] = list(self.safetyWarnings)
+        data["requiredTools"] = list(self.requiredTools)
+        data["alternatives"] = [alt.to_dict() for alt in self.alternatives]
+        data["tips"] = list(self.tips)
+        return data
+
+
+@dataclass(slots=True)
+class NutritionInfo:
+    calories: Optional[int] = None
+    protein: Optional[str] = None
+    carbs: Optional[str] = None
+    fat: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NutritionInfo":
+        return cls(
+            calories=_opt_int(data.get("calories")),
+            protein=_opt_str(data.get("protein")),
+            carbs=_opt_str(data.get("carbs")),
+            fat=_opt_str(data.get("fat")),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        _put(data, "calories", self.calories)
+        _put(data, "protein", self.protein)
+        _put(data, "carbs", self.carbs)
+        _put(data, "fat", self.fat)
+        return data
+
+
+@dataclass(slots=True)
+class Recipe:
+    id: str
+    title: str
+    description: str = ""
+    estimatedTime: int = 0
+    difficulty: str = "Medium"
+    dietaryTags: List[str] = field(default_factory=list)
+    accessibilityTags: List[str] = field(default_factory=list)
+    ingredients: List[Ingredient] = field(default_factory=list)
+    tools: List[Tool] = field(default_factory=list)
+    steps: List[RecipeStep] = field(default_factory=list)
+    servings: int = 1
+    createdAt: str = ""
+    isFavorite: bool = False
+    imageUrl: Optional[str] = None
+    sourceUrl: Optional[str] = None
+    nutritionInfo: Optional[NutritionInfo] = None
+    # Keys outside the schema (e.g. "incomplete") survive a round trip
+    extras: Dict[str, Any] = field(default_factory=dict)
+
+    FIELDS = (
+        "id", "title", "description", "estimatedTime", "difficulty", "dietaryTags",
+        "accessibilityTags", "ingredients", "tools", "steps", "servings", "createdAt",
+        "isFavorite", "imageUrl", "sourceUrl", "nutritionInfo",
+    )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Recipe":
+        """Build a recipe from parsed JSON, coercing loosely typed model output."""
+        if not isinstance(data, dict) or not data.get("title"):
+            raise ValueError("recipe data needs a title")
+        nutrition = data.get("nutritionInfo")
+        return cls(
+            id=_str(data.get("id")),
+            title=_str(data.get("title")),
+            description=_str(data.get("description")),
+            estimatedTime=_int(data.get("estimatedTime")),
+            difficulty=_str(data.get("difficulty"), "Medium"),
+            dietaryTags=_str_list(data.get("dietaryTags")),
+            accessibilityTags=_str_list(data.get("accessibilityTags")),
+            ingredients=[Ingredient.from_dict(item) for item in data.get("ingredients") or []],
+            tools=[Tool.from_dict(item) for item in data.get("tools") or []],
+            steps=[RecipeStep.from_dict(item) for item in data.get("steps") or []],
+            servings=_int(data.get("servings"), 1),
+            createdAt=_str(data.get("createdAt")),
+            isFavorite=bool(data.get("isFavorite", False)),
+            imageUrl=_opt_str(data.get("imageUrl")),
+            sourceUrl=_opt_str(data.get("sourceUrl")),
+            nutritionInfo=NutritionInfo.from_dict(nutrition) if isinstance(nutrition, dict) else None,
+            extras={key: value for key, value in data.items() if key not in cls.FIELDS},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "estimatedTime": self.estimatedTime,
+            "difficulty": self.difficulty,
+            "dietaryTags": list(self.dietaryTags),
+            "accessibilityTags": list(self.accessibilityTags),
+            "servings": self.servings,
+        }
+        _put(data, "imageUrl", self.imageUrl)
+        _put(data, "sourceUrl", self.sourceUrl)
+        if self.nutritionInfo is not None:
+            data["nutritionInfo"] = self.nutritionInfo.to_dict()
+        data["ingredients"] = [item.to_dict() for item in self.ingredients]
+        data["tools"] = [item.to_dict() for item in self.tools]
+        data["steps"] = [item.to_dict() for item in self.steps]
+        data["createdAt"] = self.createdAt
+        data["isFavorite"] = self.isFavorite
+        data.update(self.extras)
+        return data
+
+
+#
+# Fast JSON encoding/decoding (orjson when installed, stdlib json otherwise)
+#
+
+def encode_json(data: Any) -> bytes:
+    """Compact UTF-8 JSON for a plain dict/list structure."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def decode_json(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def encode_recipe(recipe: Recipe) -> bytes:
+    return encode_json(recipe.to_dict())
+
+def decode_recipe(data: Union[bytes, str]) -> Recipe:
+    return Recipe.from_dict(decode_json(data))
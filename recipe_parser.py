@@ -0,0 +1,680 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Deterministic recipe parser for pages that publish schema.org Recipe data
+
+import asyncio
+import hashlib
+import ipaddress
+import json
+import re
+import socket
+import sys
+import weakref
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+from recipe_cache import cache_key
+from structured_logging import get_logger
+
+logger = get_logger("recipe_parser")
+
+FETCH_TIMEOUT = 10.0
+# Recipe pages are user-supplied URLs: cap what one fetch may download and
+# how many redirects it may follow (each one is checked again)
+FETCH_MAX_BYTES = 5 * 1024 * 1024
+FETCH_MAX_REDIRECTS = 5
+USER_AGENT = "Mozilla/5.0 (compatible; a11YumRecipeBot/1.0)"
+
+UNICODE_FRACTIONS = {
+    "½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4",
+    "⅕": "1/5", "⅛": "1/8", "⅜": "3/8", "⅝": "5/8", "⅞": "7/8",
+}
+
+UNITS = {
+    "teaspoon", "teaspoons", "tsp", "tablespoon", "tablespoons", "tbsp", "cup", "cups",
+    "ounce", "ounces", "oz", "pound", "pounds", "lb", "lbs", "gram", "grams", "g",
+    "kilogram", "kilograms", "kg", "milliliter", "milliliters", "ml", "liter", "liters", "l",
+    "pint", "pints", "quart", "quarts", "gallon", "gallons", "clove", "cloves", "pinch",
+    "dash", "can", "cans", "package", "packages", "box", "boxes", "jar", "jars", "bag",
+    "bags", "slice", "slices", "stick", "sticks", "sprig", "sprigs", "bunch", "bunches",
+    "head", "heads", "ear", "ears", "stalk", "stalks", "fillet", "fillets",
+}
+
+# Keyword in the recipe text -> tool name
+TOOL_KEYWORDS = [
+    ("food processor", "Food processor"),
+    ("slow cooker", "Slow cooker"),
+    ("baking sheet", "Baking sheet"),
+    ("baking dish", "Baking dish"),
+    ("saucepan", "Saucepan"),
+    ("skillet", "Skillet"),
+    ("blender", "Blender"),
+    ("microwave", "Microwave"),
+    ("grill", "Grill"),
+    ("oven", "Oven"),
+    ("pot", "Pot"),
+    ("bowl", "Mixing bowl"),
+    ("whisk", "Whisk"),
+]
+
+KNIFE_WORDS = ("chop", "dice", "mince", "slice", "cut ", "julienne")
+
+SAFETY_HINTS = [
+    (("grill", "oven", "skillet", "saucepan", "boil", "fry", "broil", "hot"),
+     "Hot surfaces or liquids - use oven mitts and keep handles turned inward"),
+    (KNIFE_WORDS, "Sharp knife - cut away from your body on a non-slip board"),
+]
+
+DIET_TAGS = {
+    "vegan": "Vegan", "vegetarian": "Vegetarian", "gluten": "Gluten-Free",
+    "dairy": "Dairy-Free", "lowfat": "Low-Fat", "low fat": "Low-Fat",
+    "lowcalorie": "Low-Calorie", "low calorie": "Low-Calorie", "keto": "Keto",
+    "halal": "Halal", "kosher": "Kosher", "diabetic": "Diabetic-Friendly",
+}
+
+#
+# HTML extraction
+#
+
+class _SchemaExtractor(HTMLParser):
+    """Collects JSON-LD blocks and schema.org microdata items from a page."""
+
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+                 "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.json_ld: List[str] = []
+        self.items: List[Dict[str, Any]] = []
+        self._in_json_ld = False
+        self._json_buffer: List[str] = []
+        # (tag, scope dict or None, itemprop or None, text buffer or None)
+        self._stack: List[tuple] = []
+
+    def _scope(self) -> Optional[Dict[str, Any]]:
+        for _, scope, _, _ in reversed(self._stack):
+            if scope is not None:
+                return scope
+        return None
+
+    @staticmethod
+    def _add(scope: Dict[str, Any], prop: str, value: Any):
+        for name in prop.split():
+            scope.setdefault(name, []).append(value)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script" and (attrs.get("type") or "").lower() == "application/ld+json":
+            self._in_json_ld = True
+            self._json_buffer = []
+            return
+
+        parent = self._scope()
+        prop = attrs.get("itemprop")
+        scope = None
+        text = None
+        if "itemscope" in attrs:
+            itemtype = attrs.get("itemtype") or ""
+            scope = {"@type": itemtype.rstrip("/").rsplit("/", 1)[-1]}
+            self.items.append(scope)
+            if prop and parent is not None:
+                self._add(parent, prop, scope)
+        elif prop and parent is not None:
+            for attr in ("content", "datetime", "href", "src"):
+                if attrs.get(attr) is not None:
+                    self._add(parent, prop, attrs[attr])
+                    prop = None
+                    break
+            else:
+                text = []
+
+        if tag not in self.VOID_TAGS:
+            self._stack.append((tag, scope, prop if text is not None else None, text))
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._in_json_ld:
+            self._in_json_ld = False
+            self.json_ld.append("".join(self._json_buffer))
+            return
+        # Pop up to the matching tag, tolerating unclosed elements
+        if not any(open_tag == tag for open_tag, _, _, _ in self._stack):
+            return
+        while self._stack:
+            open_tag, _, prop, text = self._stack.pop()
+            if prop and text is not None:
+                parent = self._scope()
+                if parent is not None:
+                    self._add(parent, prop, " ".join("".join(text).split()))
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._in_json_ld:
+            self._json_buffer.append(data)
+            return
+        for _, _, _, text in self._stack:
+            if text is not None:
+                text.append(data)
+
+
+def _is_recipe(node: Dict[str, Any]) -> bool:
+    types = node.get("@type")
+    if isinstance(types, str):
+        types = [types]
+    return any(str(t).rsplit("/", 1)[-1] == "Recipe" for t in types or [])
+
+def _find_recipe_nodes(node: Any) -> List[Dict[str, Any]]:
+    if isinstance(node, list):
+        found = []
+        for child in node:
+            found.extend(_find_recipe_nodes(child))
+        return found
+    if isinstance(node, dict):
+        if _is_recipe(node):
+            return [node]
+        return _find_recipe_nodes(node.get("@graph") or node.get("mainEntity") or [])
+    return []
+
+def _flatten_microdata(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Collapse single-valued microdata properties to scalars, like JSON-LD."""
+    flat = {}
+    for key, values in item.items():
+        if key == "@type":
+            flat[key] = values
+            continue
+        values = [_flatten_microdata(v) if isinstance(v, dict) else v for v in values]
+        flat[key] = values if len(values) > 1 or key in ("recipeIngredient", "recipeInstructions") else values[0]
+    return flat
+
+def extract_schema_recipe(html: str) -> Optional[Dict[str, Any]]:
+    """Return the first schema.org Recipe on the page (JSON-LD, then microdata)."""
+    extractor = _SchemaExtractor()
+    extractor.feed(html)
+    extractor.close()
+    for block in extractor.json_ld:
+        try:
+            data = json.loads(block)
+        except json.JSONDecodeError:
+            continue
+        recipes = _find_recipe_nodes(data)
+        if recipes:
+            return recipes[0]
+    for item in extractor.items:
+        if _is_recipe(item):
+            return _flatten_microdata(item)
+    return None
+
+#
+# Field parsing helpers
+#
+
+def _first(value: Any) -> Any:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+def _text(value: Any) -> str:
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get("text") or value.get("name") or ""
+    return " ".join(str(value or "").split())
+
+def parse_duration(value: Any) -> Optional[int]:
+    """Minutes in an ISO 8601 duration such as PT1H30M (or a bare number)."""
+    value = _first(value)
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(
+        r"P(?:(\d+(?:\.\d+)?)D)?(?:T(?:(\d+(?:\.\d+)?)H)?(?:(\d+(?:\.\d+)?)M)?(?:(\d+(?:\.\d+)?)S)?)?",
+        str(value).strip().upper(),
+    )
+    if not match:
+        digits = re.search(r"\d+", str(value))
+        return int(digits.group()) if digits else None
+    days, hours, minutes, seconds = (float(part or 0) for part in match.groups())
+    return int(round(days * 1440 + hours * 60 + minutes + seconds / 60))
+
+def parse_servings(value: Any) -> Optional[int]:
+    for candidate in value if isinstance(value, list) else [value]:
+        if isinstance(candidate, (int, float)):
+            return int(candidate)
+        digits = re.search(r"\d+", str(candidate or ""))
+        if digits:
+            return int(digits.group())
+    return None
+
+def parse_ingredient(line: str, index: int) -> Dict[str, Any]:
+    """
+    Split an ingredient line into amount, unit, name and notes, e.g.
+    "1 (10 ounce) box frozen spinach, thawed" ->
+    amount "1", unit "box", name "frozen spinach", notes "10 ounce; thawed".
+    """
+    text = " ".join(line.split())
+    for char, fraction in UNICODE_FRACTIONS.items():
+        text = text.replace(char, f" {fraction}")
+    text = " ".join(text.split())
+
+    notes = []
+    amount_match = re.match(
+        r"^(\d+(?:[.,]\d+)?(?:[- ]\d+/\d+)?(?:/\d+)?(?:\s*(?:-|to)\s*\d+(?:[.,]\d+)?(?:/\d+)?)?)\s*",
+        text,
+    )
+    amount = ""
+    if amount_match:
+        amount = amount_match.group(1)
+        text = text[amount_match.end():]
+
+    size_match = re.match(r"^\(([^)]*)\)\s*", text)
+    if size_match:
+        notes.append(size_match.group(1))
+        text = text[size_match.end():]
+
+    unit = ""
+    words = text.split(" ", 1)
+    if amount and words and words[0].lower().rstrip(".") in UNITS:
+        unit = words[0].rstrip(".")
+        text = words[1] if len(words) > 1 else ""
+
+    name, _, rest = text.partition(",")
+    if rest.strip():
+        notes.append(rest.strip())
+
+    ingredient = {
+        "id": f"ing-{index}",
+        "name": name.strip() or line.strip(),
+        "amount": amount,
+        "alternatives": [],
+    }
+    if unit:
+        ingredient["unit"] = unit
+    if notes:
+        ingredient["notes"] = "; ".join(notes)
+    return ingredient
+
+def _instruction_texts(value: Any) -> List[str]:
+    """Flatten recipeInstructions (text, HowToStep, HowToSection) to step texts."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [line.strip() for line in re.split(r"\n+", value) if line.strip()]
+    if isinstance(value, dict):
+        if "itemListElement" in value:
+            return _instruction_texts(value["itemListElement"])
+        text = _text(value)
+        return [text] if text else []
+    texts = []
+    for item in value:
+        texts.extend(_instruction_texts(item))
+    return texts
+
+def _step_minutes(instruction: str) -> Optional[int]:
+    minutes = []
+    for number, unit in re.findall(r"(\d+)(?:\s*(?:to|-)\s*\d+)?\s*(hours?|minutes?|mins?)\b", instruction, re.I):
+        minutes.append(int(number) * (60 if unit.lower().startswith("hour") else 1))
+    return max(minutes) if minutes else None
+
+def _mentions(text: str, keyword: str) -> bool:
+    if keyword == "knife":
+        return any(word in text for word in KNIFE_WORDS)
+    return re.search(rf"\b{re.escape(keyword)}s?\b", text) is not None
+
+def _detect_tools(ingredient_text: str, step_texts: List[str]) -> List[tuple]:
+    """Return `(keyword, tool)` pairs for the tools the recipe text mentions."""
+    combined = " ".join(step_texts).lower()
+    found = []
+    for keyword, name in TOOL_KEYWORDS + [("knife", "Knife and cutting board")]:
+        haystack = combined if keyword != "knife" else ingredient_text + " " + combined
+        if _mentions(haystack, keyword) and name not in [tool["name"] for _, tool in found]:
+            found.append((keyword, {
+                "id": f"tool-{len(found) + 1}",
+                "name": name,
+                "required": True,
+                "safetyNotes": [],
+                "alternatives": [],
+            }))
+    return found
+
+def _parse_nutrition(nutrition: Any) -> Optional[Dict[str, Any]]:
+    nutrition = _first(nutrition)
+    if not isinstance(nutrition, dict):
+        return None
+    info = {}
+    calories = re.search(r"\d+", str(_first(nutrition.get("calories")) or ""))
+    if calories:
+        info["calories"] = int(calories.group())
+    for source, target in (("proteinContent", "protein"), ("carbohydrateContent", "carbs"), ("fatContent", "fat")):
+        value = _first(nutrition.get(source))
+        if value:
+            info[target] = str(value).replace(" ", "")
+    return info or None
+
+def _dietary_tags(*sources: Any) -> List[str]:
+    tags = []
+    for source in sources:
+        for value in source if isinstance(source, list) else [source]:
+            if not value:
+                continue
+            for part in re.split(r"[,/]", str(value)):
+                key = part.strip().rsplit("/", 1)[-1].lower().replace("diet", "").strip()
+                for word, tag in DIET_TAGS.items():
+                    if word in key and tag not in tags:
+                        tags.append(tag)
+    return tags
+
+def _difficulty(total_minutes: Optional[int], step_count: int) -> str:
+    if step_count > 10 or (total_minutes or 0) > 90:
+        return "Hard"
+    if step_count <= 5 and (total_minutes or 0) <= 30:
+        return "Easy"
+    return "Medium"
+
+def _image_url(image: Any) -> Optional[str]:
+    image = _first(image)
+    if isinstance(image, dict):
+        image = image.get("url") or image.get("contentUrl")
+    return image or None
+
+#
+# Conversion to the app's recipe structure
+#
+
+def build_recipe(title: str, description: str, ingredient_lines: List[str],
+                 step_texts: List[str], total_minutes: Optional[int],
+                 servings: Optional[int], source_url: Optional[str] = None,
+                 image_url: Optional[str] = None, dietary_tags: Optional[List[str]] = None,
+                 nutrition_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Assemble a recipe in the example-recipe-structure.json shape."""
+    ingredients = [parse_ingredient(line, i) for i, line in enumerate(ingredient_lines, 1)]
+    detected = _detect_tools(" ".join(ingredient_lines).lower(), step_texts)
+    tools = [tool for _, tool in detected]
+
+    steps = []
+    for number, instruction in enumerate(step_texts, 1):
+        lowered = instruction.lower()
+        required = [tool["id"] for keyword, tool in detected if _mentions(lowered, keyword)]
+        warnings = [hint for words, hint in SAFETY_HINTS if any(word in lowered for word in words)]
+        for keyword, tool in detected:
+            if tool["id"] in required:
+                for words, hint in SAFETY_HINTS:
+                    if keyword in words or (keyword == "knife" and words is KNIFE_WORDS):
+                        if hint not in tool["safetyNotes"]:
+                            tool["safetyNotes"].append(hint)
+        step = {
+            "id": f"step-{number}",
+            "stepNumber": number,
+            "instruction": instruction,
+            "difficulty": "Easy",
+            "safetyWarnings": warnings,
+            "requiredTools": required,
+            "alternatives": [],
+            "tips": [],
+        }
+        minutes = _step_minutes(instruction)
+        if minutes is not None:
+            step["estimatedTime"] = minutes
+        steps.append(step)
+
+    if total_minutes is None:
+        total_minutes = sum(step.get("estimatedTime", 0) for step in steps) or None
+
+    recipe = {
+        "id": recipe_id(source_url, title),
+        "title": title,
+        "description": description,
+        "estimatedTime": total_minutes or 0,
+        "difficulty": _difficulty(total_minutes, len(steps)),
+        "dietaryTags": dietary_tags or [],
+        "accessibilityTags": [],
+        "servings": servings or 1,
+        "ingredients": ingredients,
+        "tools": tools,
+        "steps": steps,
+        "createdAt": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "isFavorite": False,
+    }
+    if image_url:
+        recipe["imageUrl"] = image_url
+    if source_url:
+        recipe["sourceUrl"] = source_url
+    if nutrition_info:
+        recipe["nutritionInfo"] = nutrition_info
+    return recipe
+
+def schema_to_recipe(schema: Dict[str, Any], source_url: Optional[str] = None) -> Dict[str, Any]:
+    """Convert a schema.org Recipe node (JSON-LD or microdata) to the app format."""
+    ingredient_lines = schema.get("recipeIngredient") or schema.get("ingredients") or []
+    if isinstance(ingredient_lines, str):
+        ingredient_lines = [ingredient_lines]
+    total = parse_duration(schema.get("totalTime"))
+    if total is None:
+        parts = [parse_duration(schema.get(key)) for key in ("prepTime", "cookTime")]
+        total = sum(part for part in parts if part) or None
+    return build_recipe(
+        title=_text(schema.get("name") or schema.get("headline")),
+        description=_text(schema.get("description")),
+        ingredient_lines=[_text(line) for line in ingredient_lines if _text(line)],
+        step_texts=_instruction_texts(schema.get("recipeInstructions")),
+        total_minutes=total,
+        servings=parse_servings(schema.get("recipeYield")),
+        source_url=source_url or _text(schema.get("url")) or None,
+        image_url=_image_url(schema.get("image")),
+        dietary_tags=_dietary_tags(schema.get("suitableForDiet"), schema.get("keywords")),
+        nutrition_info=_parse_nutrition(schema.get("nutrition")),
+    )
+
+def scraper_json_to_recipe(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a saved recipe-scrapers record (recipes/*.json) to the app format."""
+    nutrients = data.get("nutrients") or {}
+    return build_recipe(
+        title=data.get("title", ""),
+        description=data.get("description", ""),
+        ingredient_lines=data.get("ingredients") or [],
+        step_texts=data.get("instructions_list") or _instruction_texts(data.get("instructions")),
+        total_minutes=data.get("total_time"),
+        servings=parse_servings(data.get("yields")),
+        source_url=data.get("canonical_url"),
+        image_url=data.get("image"),
+        dietary_tags=_dietary_tags(data.get("dietary_restrictions"), data.get("keywords")),
+        nutrition_info=_parse_nutrition(nutrients) if nutrients else None,
+    )
+
+def parse_recipe_html(html: str, source_url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Parse a page into the app's recipe format, or None if it has no Recipe markup."""
+    schema = extract_schema_recipe(html)
+    if schema is None:
+        return None
+    recipe = schema_to_recipe(schema, source_url)
+    if not recipe["title"] or not recipe["ingredients"] or not recipe["steps"]:
+        return None
+    return recipe
+
+def parse_recipe_file(path: str) -> Optional[Dict[str, Any]]:
+    """Parse a saved HTML page or a recipe-scrapers JSON record from disk."""
+    file_path = Path(path)
+    content = file_path.read_text(encoding="utf-8")
+    if file_path.suffix == ".json":
+        return scraper_json_to_recipe(json.loads(content))
+    return parse_recipe_html(content)
+
+class UnsafeURL(ValueError):
+    """A URL the server must not fetch (not http(s), or not a public address)."""
+
+async def _resolve(host: str, port: int) -> List[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+async def check_fetch_url(url: str) -> List[str]:
+    """
+    Raise UnsafeURL unless `url` is http(s) and its host resolves only to
+    public addresses, so user-supplied URLs can't reach loopback, private
+    networks or cloud metadata endpoints. Returns the checked addresses.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeURL(f"Only http(s) URLs can be fetched: {url}")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = await _resolve(parts.hostname, port)
+    except (OSError, ValueError) as e:
+        raise UnsafeURL(f"Could not resolve {parts.hostname}: {e}") from e
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise UnsafeURL(f"{parts.hostname} resolves to a non-public address")
+    if not addresses:
+        raise UnsafeURL(f"Could not resolve {parts.hostname}")
+    return addresses
+
+def _pinned_request(url: str, address: str):
+    """
+    The URL to connect to `address` for `url`, plus the Host header and TLS
+    server name that keep the request addressed to the original host.
+    """
+    parts = urlsplit(url)
+    host = f"[{parts.hostname}]" if ":" in parts.hostname else parts.hostname
+    pinned = f"[{address}]" if ":" in address else address
+    if parts.port:
+        host, pinned = f"{host}:{parts.port}", f"{pinned}:{parts.port}"
+    return parts._replace(netloc=pinned).geturl(), {"Host": host}, {"sni_hostname": parts.hostname}
+
+# One pooled client per event loop (the FastAPI loop, the Flask agent loop)
+_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def _http_client():
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            timeout=FETCH_TIMEOUT, follow_redirects=False, headers={"User-Agent": USER_AGENT}
+        )
+    return client
+
+async def close_http_client():
+    """Close this event loop's shared fetch client (on shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+async def fetch_recipe_html(url: str, timeout: float = FETCH_TIMEOUT) -> str:
+    """
+    Download a recipe page. Every URL, including each redirect target, must
+    pass check_fetch_url, and bodies over FETCH_MAX_BYTES are refused. The
+    connection goes to the address that was checked rather than to a second
+    DNS lookup, so a host can't pass the check and then rebind to a private
+    address.
+    """
+    client = _http_client()
+    for _ in range(FETCH_MAX_REDIRECTS + 1):
+        addresses = await check_fetch_url(url)
+        pinned_url, headers, extensions = _pinned_request(url, addresses[0])
+        async with client.stream("GET", pinned_url, headers=headers, extensions=extensions,
+                                 timeout=timeout) as response:
+            if response.is_redirect:
+                url = urljoin(url, response.headers["location"])
+                continue
+            response.raise_for_status()
+            if int(response.headers.get("content-length") or 0) > FETCH_MAX_BYTES:
+                raise ValueError(f"Page is larger than {FETCH_MAX_BYTES} bytes")
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > FETCH_MAX_BYTES:
+                    raise ValueError(f"Page is larger than {FETCH_MAX_BYTES} bytes")
+            return body.decode(response.encoding or "utf-8", errors="replace")
+    raise ValueError(f"More than {FETCH_MAX_REDIRECTS} redirects")
+
+async def parse_recipe_from_url(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a page and parse its schema.org Recipe markup. Returns None when the
+    page can't be fetched or has no usable markup, so callers can fall back to
+    the agent. Parsing runs in a worker thread, off the event loop.
+    """
+    try:
+        html = await fetch_recipe_html(url)
+    except Exception:
+        logger.warning("Could not fetch recipe page for local parsing", extra={"url": url}, exc_info=True)
+        return None
+    return await asyncio.to_thread(parse_recipe_html, html, url)
+
+def recipe_id(source_url: Optional[str], title: str = "") -> str:
+    """
+    Stable id for a recipe: from its normalized source URL, else its title.
+    The same in every process, unlike hash(), and wide enough not to collide.
+    """
+    if source_url:
+        return f"recipe-{cache_key(source_url)[:12]}"
+    return f"recipe-{hashlib.sha256(title.encode('utf-8')).hexdigest()[:12]}"
+
+def validate_recipe(data: Any) -> List[str]:
+    """Problems that keep `data` from being a usable recipe; empty when valid."""
+    if not isinstance(data, dict):
+        return ["recipe is not a JSON object"]
+    problems = []
+    if not isinstance(data.get("title"), str) or not data["title"].strip():
+        problems.append("missing title")
+    for section, field in (("ingredients", "name"), ("steps", "instruction")):
+        items = data.get(section)
+        if not isinstance(items, list) or not items:
+            problems.append(f"missing {section}")
+        elif not all(isinstance(item, dict) and isinstance(item.get(field), str) for item in items):
+            problems.append(f"every entry in {section} needs a '{field}'")
+    if not isinstance(data.get("tools", []), list):
+        problems.append("tools must be a list")
+    for field in ("estimatedTime", "servings"):
+        if field in data and not isinstance(data[field], (int, float)):
+            problems.append(f"{field} must be a number")
+    if "difficulty" in data and data["difficulty"] not in ("Easy", "Medium", "Hard"):
+        problems.append("difficulty must be Easy, Medium or Hard")
+    return problems
+
+def is_usable_scrape(recipe_data: Dict[str, Any]) -> bool:
+    """
+    True when a scrape returned a complete, valid recipe: not an error, a
+    partial recipe or the agent's text-only fallback. Only these are cached
+    and reported as successful scrapes.
+    """
+    return ("raw_content" not in recipe_data and not recipe_data.get("incomplete")
+            and not validate_recipe(recipe_data))
+
+def merge_accessibility_alternatives(recipe: Dict[str, Any], alternatives: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge agent-suggested alternatives into a parsed recipe. `alternatives` maps
+    ingredient/tool/step ids to lists of alternatives, plus "accessibilityTags".
+    """
+    for tag in alternatives.get("accessibilityTags") or []:
+        if isinstance(tag, str) and tag not in recipe["accessibilityTags"]:
+            recipe["accessibilityTags"].append(tag)
+
+    for section, prefix in (("ingredients", "alt"), ("tools", "tool-alt"), ("steps", "step-alt")):
+        suggested = alternatives.get(section) or {}
+        if not isinstance(suggested, dict):
+            continue
+        counter = 1
+        for item in recipe[section]:
+            for alternative in suggested.get(item["id"]) or []:
+                if not isinstance(alternative, dict):
+                    continue
+                item["alternatives"].append({**alternative, "id": f"{prefix}-{counter}"})
+                counter += 1
+    return recipe
+
+if __name__ == "__main__":
+    # Parse saved pages or records, e.g. `python recipe_parser.py recipes/html`
+    targets = sys.argv[1:] or ["recipes/html"]
+    for target in targets:
+        paths = sorted(Path(target).glob("*")) if Path(target).is_dir() else [Path(target)]
+        for path in paths:
+            parsed = parse_recipe_file(str(path))
+            if parsed is None:
+                print(f"❌ {path}: no recipe markup found")
+            else:
+                print(f"✅ {path}: {parsed['title']} - {len(parsed['ingredients'])} ingredients, "
+                      f"{len(parsed['steps'])} steps, {parsed['estimatedTime']} min")
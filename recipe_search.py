@@ -0,0 +1,350 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# In-process BM25 search over saved and scraped recipes
+
+import heapq
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from recipe_parser import scraper_json_to_recipe
+from structured_logging import get_logger
+
+logger = get_logger("recipe_search")
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to with".split()
+)
+# Title matches count more than description and ingredient matches
+FIELD_WEIGHTS = (("title", 3), ("description", 1), ("ingredients", 1))
+# Cumulative "estimatedTime <= N minutes" filter buckets
+TIME_BUCKETS = (15, 30, 45, 60, 90, 120, 180, 240)
+# Fields kept per document for results; full recipes stay in their source
+SUMMARY_FIELDS = (
+    "id", "title", "description", "estimatedTime", "difficulty", "dietaryTags",
+    "accessibilityTags", "servings", "imageUrl", "sourceUrl",
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+def normalize_tag(tag: str) -> str:
+    """"Gluten-Free", "gluten free" and "gluten_free" all become "gluten-free"."""
+    return re.sub(r"[^a-z0-9]+", "-", str(tag).lower()).strip("-")
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Indexes of the set bits in `bits`, lowest first."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    # Let the regex engine skip runs of zero bytes in C
+    for match in _NONZERO_BYTE.finditer(data):
+        byte = data[match.start()]
+        base = match.start() * 8
+        while byte:
+            low = byte & -byte
+            yield base + low.bit_length() - 1
+            byte ^= low
+
+
+class RecipeSearchIndex:
+    """
+    Inverted index with BM25 ranking over title, description and ingredient
+    names, plus integer bitsets for filtering by dietary/accessibility tags,
+    difficulty and maximum cooking time.
+
+    Documents get dense integer ids, so a filter is a bitwise AND of
+    per-value bitsets. Per-term BM25 weights are computed lazily and cached,
+    sorted by weight, so single-term unfiltered queries read only the top of
+    one postings list. Re-adding a recipe with the same id replaces it.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._docs: List[Optional[Dict[str, Any]]] = []
+        self._doc_lengths: List[int] = []
+        self._total_length = 0
+        self._ids: Dict[str, int] = {}
+        self._deleted = set()
+        # term -> {doc: weighted term frequency}
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        # term -> ([(bm25 tf part, doc)] highest first, {doc: tf part}), cached
+        # for the average doc length in _impact_avgdl
+        self._impacts: Dict[str, tuple] = {}
+        self._impact_avgdl = 0.0
+        # (kind, value) -> doc ids, for kinds "dietary", "accessibility",
+        # "difficulty" and "time" (value is the bucket's upper bound)
+        self._facets: Dict[tuple, List[int]] = defaultdict(list)
+        self._minutes: List[int] = []
+        # Bitsets are built from the doc lists on first use and dropped when
+        # a document touching them is added; setting bits one add at a time
+        # would copy the whole integer on every add
+        self._bits: Dict[tuple, int] = {}
+        # max_time -> bitset of docs with 0 < estimatedTime <= max_time
+        self._time_bits: Dict[int, int] = {}
+        self.cache_synced_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    #
+    # Indexing
+    #
+
+    def add(self, recipe: Dict[str, Any]) -> bool:
+        """Index a recipe in the app format. Returns False if it has no title."""
+        title = recipe.get("title")
+        if not title:
+            return False
+        recipe_id = str(recipe.get("id") or recipe.get("sourceUrl") or title)
+        terms: Dict[str, int] = defaultdict(int)
+        fields = {
+            "title": title,
+            "description": recipe.get("description") or "",
+            "ingredients": " ".join(
+                str(item.get("name", "")) for item in recipe.get("ingredients") or [] if isinstance(item, dict)
+            ),
+        }
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(fields[field]):
+                terms[token] += weight
+
+        minutes = recipe.get("estimatedTime")
+        minutes = int(minutes) if isinstance(minutes, (int, float)) and minutes > 0 else 0
+        facets = [("dietary", normalize_tag(tag)) for tag in recipe.get("dietaryTags") or []]
+        facets += [("accessibility", normalize_tag(tag)) for tag in recipe.get("accessibilityTags") or []]
+        if recipe.get("difficulty"):
+            facets.append(("difficulty", normalize_tag(recipe["difficulty"])))
+        if minutes:
+            facets.append(("time", next((limit for limit in TIME_BUCKETS if minutes <= limit), None)))
+
+        with self._lock:
+            if recipe_id in self._ids:
+                self._remove(self._ids[recipe_id])
+            doc = len(self._docs)
+            summary = {field: recipe.get(field) for field in SUMMARY_FIELDS}
+            summary["id"] = recipe_id
+            self._docs.append(summary)
+            length = sum(terms.values())
+            self._doc_lengths.append(length)
+            self._total_length += length
+            self._minutes.append(minutes)
+            self._ids[recipe_id] = doc
+            self._bits.pop(("live",), None)
+
+            for term, frequency in terms.items():
+                self._postings[term][doc] = frequency
+                self._impacts.pop(term, None)
+                self._bits.pop(("term", term), None)
+            for facet in facets:
+                self._facets[facet].append(doc)
+                self._bits.pop(facet, None)
+            if minutes:
+                for limit in [limit for limit in self._time_bits if minutes <= limit]:
+                    del self._time_bits[limit]
+        return True
+
+    def add_many(self, recipes: Iterable[Dict[str, Any]]) -> int:
+        return sum(1 for recipe in recipes if self.add(recipe))
+
+    def _remove(self, doc: int):
+        # Postings keep the old entry; the doc is masked out at query time
+        self._deleted.add(doc)
+        self._bits.pop(("live",), None)
+        self._total_length -= self._doc_lengths[doc]
+        self._docs[doc] = None
+
+    def load_directory(self, path: str) -> int:
+        """Index recipe-scrapers records (recipes/*.json)."""
+        recipes = []
+        for file_path in sorted(Path(path).glob("*.json")):
+            try:
+                recipes.append(scraper_json_to_recipe(json.loads(file_path.read_text(encoding="utf-8"))))
+            except (OSError, ValueError, TypeError, AttributeError):
+                logger.warning("Skipping unreadable recipe", extra={"file": file_path.name}, exc_info=True)
+        return self.add_many(recipes)
+
+    def sync_cache(self, path: str) -> int:
+        """Index recipes added to the scrape cache (recipe_cache.py) since the last sync."""
+        if not Path(path).exists():
+            return 0
+        try:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                rows = conn.execute(
+                    "SELECT data, created_at FROM recipes WHERE created_at > ? ORDER BY created_at",
+                    (self.cache_synced_at,),
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            logger.warning("Could not read recipe cache", extra={"path": path}, exc_info=True)
+            return 0
+        added = 0
+        for data, created_at in rows:
+            try:
+                added += self.add(json.loads(data))
+            except ValueError:
+                pass
+            self.cache_synced_at = max(self.cache_synced_at, created_at)
+        return added
+
+    #
+    # Querying
+    #
+
+    def _to_bits(self, docs: Iterable[int]) -> int:
+        buffer = bytearray(len(self._docs) // 8 + 1)
+        for doc in docs:
+            buffer[doc >> 3] |= 1 << (doc & 7)
+        return int.from_bytes(buffer, "little")
+
+    def _bitset(self, key: tuple) -> int:
+        bits = self._bits.get(key)
+        if bits is None:
+            kind = key[0]
+            if kind == "live":
+                docs = (doc for doc in range(len(self._docs)) if doc not in self._deleted)
+            elif kind == "term":
+                docs = self._postings.get(key[1], ())
+            else:
+                docs = self._facets.get(key, ())
+            bits = self._bits[key] = self._to_bits(docs)
+        return bits
+
+    def filter_bits(self, dietary_tags: Optional[List[str]] = None,
+                    accessibility_tags: Optional[List[str]] = None,
+                    difficulty: Optional[List[str]] = None,
+                    max_time: Optional[int] = None) -> int:
+        """
+        Bitset of live documents matching every filter: all of the given
+        dietary and accessibility tags, any of the difficulties, and an
+        estimated time of at most `max_time` minutes.
+        """
+        with self._lock:
+            bits = self._bitset(("live",))
+            for tag in dietary_tags or []:
+                bits &= self._bitset(("dietary", normalize_tag(tag)))
+            for tag in accessibility_tags or []:
+                bits &= self._bitset(("accessibility", normalize_tag(tag)))
+            if difficulty:
+                allowed = 0
+                for level in difficulty:
+                    allowed |= self._bitset(("difficulty", normalize_tag(level)))
+                bits &= allowed
+            if max_time is not None:
+                bits &= self._time_bits_upto(max_time)
+            return bits
+
+    def _time_bits_upto(self, max_time: int) -> int:
+        bits = self._time_bits.get(max_time)
+        if bits is None:
+            docs = [doc for limit in TIME_BUCKETS if limit <= max_time
+                    for doc in self._facets.get(("time", limit), ())]
+            # Only the bucket straddling max_time needs a per-doc check
+            upper = next((limit for limit in TIME_BUCKETS if limit > max_time), None)
+            if max_time not in TIME_BUCKETS:
+                docs.extend(doc for doc in self._facets.get(("time", upper), ())
+                            if self._minutes[doc] <= max_time)
+            bits = self._time_bits[max_time] = self._to_bits(docs)
+        return bits
+
+    def _term_impacts(self, term: str) -> tuple:
+        """
+        BM25 tf component per doc for `term`, as a list sorted highest first
+        and a dict by doc.
+        """
+        avgdl = self._total_length / max(len(self._ids), 1)
+        if self._impact_avgdl and abs(avgdl - self._impact_avgdl) > 0.05 * self._impact_avgdl:
+            # Document lengths drifted enough to matter; recompute everything
+            self._impacts.clear()
+        if not self._impacts:
+            self._impact_avgdl = avgdl
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            k1, b, avgdl = self.k1, self.b, self._impact_avgdl or 1.0
+            lengths = self._doc_lengths
+            by_doc = {
+                doc: tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[doc] / avgdl))
+                for doc, tf in self._postings.get(term, {}).items()
+            }
+            ranked = sorted(((weight, doc) for doc, weight in by_doc.items()), reverse=True)
+            impacts = self._impacts[term] = (ranked, by_doc)
+        return impacts
+
+    def _idf(self, term: str) -> float:
+        total = len(self._ids)
+        df = (self._bitset(("term", term)) & self._bitset(("live",))).bit_count()
+        return math.log(1 + (total - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str = "", limit: int = 10, **filters) -> List[Dict[str, Any]]:
+        """
+        Top `limit` recipes for `query`, each a summary dict with a "score".
+        Keyword filters are passed to `filter_bits`. With an empty query the
+        matching recipes are returned in index order.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            mask = self.filter_bits(**filters) if any(value is not None for value in filters.values()) else None
+            if not terms:
+                results = []
+                for doc in iter_bits(mask if mask is not None else self._bitset(("live",))):
+                    if len(results) >= limit:
+                        break
+                    results.append({**self._docs[doc], "score": 0.0})
+                return results
+
+            if len(terms) == 1 and mask is None:
+                # Postings are sorted by weight, so the first live ones win
+                idf = self._idf(terms[0])
+                top = []
+                for weight, doc in self._term_impacts(terms[0])[0]:
+                    if doc in self._deleted:
+                        continue
+                    top.append((weight * idf, doc))
+                    if len(top) >= limit:
+                        break
+            else:
+                scores: Dict[int, float] = defaultdict(float)
+                for term in terms:
+                    idf = self._idf(term)
+                    ranked, by_doc = self._term_impacts(term)
+                    if mask is None:
+                        for weight, doc in ranked:
+                            if doc not in self._deleted:
+                                scores[doc] += weight * idf
+                    else:
+                        for doc in iter_bits(self._bitset(("term", term)) & mask):
+                            scores[doc] += by_doc[doc] * idf
+                top = heapq.nlargest(limit, ((score, doc) for doc, score in scores.items()))
+            return [{**self._docs[doc], "score": round(score, 4)} for score, doc in top]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._ids),
+                "terms": len(self._postings),
+                "deleted": len(self._deleted),
+                "cached_term_impacts": len(self._impacts),
+                "cached_bitsets": len(self._bits),
+                "cache_synced_at": self.cache_synced_at,
+            }
+
+
+def build_default_index(recipes_dir: str = "recipes", cache_path: Optional[str] = None) -> RecipeSearchIndex:
+    """Index the bundled recipes/ corpus and, if given, the scrape cache."""
+    start_time = time.time()
+    index = RecipeSearchIndex()
+    index.load_directory(recipes_dir)
+    if cache_path:
+        index.sync_cache(cache_path)
+    logger.info("Indexed recipes", extra={"recipes": len(index), "ms": round((time.time() - start_time) * 1000, 1)})
+    return index
@@ -0,0 +1,287 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Semantic response cache: near-duplicate questions share one agent answer
+
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Negations ("no", "not", "without") are kept: they change the answer
+STOPWORDS = frozenset(
+    "a an and are as at be by can could do find for from get give how i i'm im in into is it "
+    "like me my need of on or people person please show some someone something the "
+    "to want what which would you".split()
+)
+_SUFFIXES = ("ing", "ies", "es", "ed", "s")
+
+SparseVector = Dict[int, float]
+
+
+def _stem(token: str) -> str:
+    """Tiny suffix stripper, enough for "chopping"/"chop" and "recipes"/"recipe"."""
+    for suffix in _SUFFIXES:
+        if len(token) > len(suffix) + 2 and token.endswith(suffix):
+            token = token[:-len(suffix)] + ("y" if suffix == "ies" else "")
+            if len(token) > 3 and token[-1] == token[-2]:
+                token = token[:-1]
+            return token
+    return token
+
+def _bucket(feature: str, dim: int) -> Tuple[int, float]:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dim, (1.0 if value >> 63 else -1.0)
+
+
+class HashingVectorizer:
+    """
+    Embeds text locally with the hashing trick: stemmed words and word
+    bigrams are hashed into `dim` signed buckets and L2-normalised, so cosine
+    similarity is a sparse dot product. No model or vocabulary to load.
+    """
+
+    def __init__(self, dim: int = 4096, bigram_weight: float = 0.5):
+        self.dim = dim
+        self.bigram_weight = bigram_weight
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def tokens(self, text: str) -> List[str]:
+        return [_stem(token) for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+    def _feature(self, feature: str) -> Tuple[int, float]:
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            bucket = _bucket(feature, self.dim)
+            if len(self._buckets) < 100_000:
+                self._buckets[feature] = bucket
+        return bucket
+
+    def embed(self, text: str) -> SparseVector:
+        tokens = self.tokens(text)
+        features = [(token, 1.0) for token in tokens]
+        features += [(f"{a} {b}", self.bigram_weight) for a, b in zip(tokens, tokens[1:])]
+        vector: SparseVector = defaultdict(float)
+        for feature, weight in features:
+            index, sign = self._feature(feature)
+            vector[index] += sign * weight
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        if not norm:
+            return {}
+        return {index: value / norm for index, value in vector.items() if value}
+
+
+def cosine(a: SparseVector, b: SparseVector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+
+class SimHashLSH:
+    """
+    Approximate nearest-neighbour index over sparse unit vectors using random
+    hyperplanes. Each of `bands` tables hashes a vector to `bits` sign bits;
+    vectors that agree on every bit of any band become candidates, and only
+    candidates are scored exactly.
+    """
+
+    def __init__(self, dim: int, bands: int = 16, bits: int = 8, seed: int = 17):
+        self.bands = bands
+        self.bits = bits
+        # One ±1 row per hyperplane, derived from the seed so every process agrees
+        self._planes = [
+            [1.0 if byte & 1 else -1.0 for byte in hashlib.shake_128(f"{seed}:{plane}".encode()).digest(dim)]
+            for plane in range(bands * bits)
+        ]
+        self._tables: List[Dict[int, Set[Any]]] = [defaultdict(set) for _ in range(bands)]
+
+    def signature(self, vector: SparseVector) -> Tuple[int, ...]:
+        keys = []
+        for band in range(self.bands):
+            key = 0
+            for plane in self._planes[band * self.bits:(band + 1) * self.bits]:
+                key = (key << 1) | (sum(value * plane[index] for index, value in vector.items()) >= 0)
+            keys.append(key)
+        return tuple(keys)
+
+    def add(self, item: Any, signature: Tuple[int, ...]):
+        for table, key in zip(self._tables, signature):
+            table[key].add(item)
+
+    def remove(self, item: Any, signature: Tuple[int, ...]):
+        for table, key in zip(self._tables, signature):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(item)
+                if not bucket:
+                    del table[key]
+
+    def candidates(self, signature: Tuple[int, ...]) -> Set[Any]:
+        found: Set[Any] = set()
+        for table, key in zip(self._tables, signature):
+            found |= table.get(key, set())
+        return found
+
+
+class CacheEntry:
+    __slots__ = ("scope", "query", "vector", "signature", "response", "created_at", "hits")
+
+    def __init__(self, scope: str, query: str, vector: SparseVector,
+                 signature: Tuple[int, ...], response: Any):
+        self.scope = scope
+        self.query = query
+        self.vector = vector
+        self.signature = signature
+        self.response = response
+        self.created_at = time.monotonic()
+        self.hits = 0
+
+
+class SemanticCache:
+    """
+    Answers for recently asked questions, looked up by meaning rather than
+    exact text. A lookup embeds the query, pulls candidates from the LSH
+    index within the same scope, and returns the best one whose cosine
+    similarity is at least `threshold`.
+
+    Entries expire after `ttl` seconds and the least recently used are
+    evicted beyond `max_entries`. Users who opt out never read from or
+    write to the cache.
+    """
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 5000, ttl: float = 3600,
+                 vectorizer: Optional[HashingVectorizer] = None, enabled: bool = True):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.index = SimHashLSH(self.vectorizer.dim)
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._exact: Dict[Tuple[str, str], int] = {}
+        self._opted_out: Set[str] = set()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def opt_out(self, user_id: str):
+        """Never read or write cached answers for this user."""
+        with self._lock:
+            self._opted_out.add(user_id)
+
+    def opt_in(self, user_id: str):
+        with self._lock:
+            self._opted_out.discard(user_id)
+
+    def is_opted_out(self, user_id: Optional[str]) -> bool:
+        return user_id is not None and user_id in self._opted_out
+
+    def _usable(self, user_id: Optional[str]) -> bool:
+        return self.enabled and not self.is_opted_out(user_id)
+
+    def lookup(self, query: str, scope: str = "default",
+               user_id: Optional[str] = None) -> Optional[Tuple[Any, float]]:
+        """`(response, similarity)` for the closest cached query, or None."""
+        if not self._usable(user_id):
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry_id = self._exact.get((scope, self._normalize(query)))
+            if entry_id is not None:
+                match = self._hit(entry_id, 1.0, now)
+                if match is not None:
+                    return match
+
+            vector = self.vectorizer.embed(query)
+            best_id, best_score = None, self.threshold
+            if vector:
+                for candidate in self.index.candidates(self.index.signature(vector)):
+                    entry = self._entries.get(candidate)
+                    if entry is None or entry.scope != scope:
+                        continue
+                    score = cosine(vector, entry.vector)
+                    if score >= best_score:
+                        best_id, best_score = candidate, score
+            match = self._hit(best_id, best_score, now) if best_id is not None else None
+            if match is None:
+                self.misses += 1
+            return match
+
+    def _hit(self, entry_id: int, score: float, now: float) -> Optional[Tuple[Any, float]]:
+        entry = self._entries.get(entry_id)
+        if entry is None:
+            return None
+        if now - entry.created_at > self.ttl:
+            self._remove(entry_id)
+            return None
+        entry.hits += 1
+        self.hits += 1
+        self._entries.move_to_end(entry_id)
+        return entry.response, round(score, 4)
+
+    def put(self, query: str, response: Any, scope: str = "default", user_id: Optional[str] = None):
+        """Cache `response` for `query`, replacing an identical query's entry."""
+        if not self._usable(user_id):
+            return
+        vector = self.vectorizer.embed(query)
+        if not vector:
+            return
+        signature = self.index.signature(vector)
+        key = (scope, self._normalize(query))
+        with self._lock:
+            if key in self._exact:
+                self._remove(self._exact[key])
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = CacheEntry(scope, key[1], vector, signature, response)
+            self._exact[key] = entry_id
+            self.index.add(entry_id, signature)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self.index.remove(entry_id, entry.signature)
+        if self._exact.get((entry.scope, entry.query)) == entry_id:
+            del self._exact[(entry.scope, entry.query)]
+
+    def sweep(self) -> int:
+        """Drop expired entries; returns how many were removed."""
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            expired = [entry_id for entry_id, entry in self._entries.items() if entry.created_at < cutoff]
+            for entry_id in expired:
+                self._remove(entry_id)
+        return len(expired)
+
+    def clear(self, scopes: Optional[Iterable[str]] = None):
+        with self._lock:
+            scopes = set(scopes) if scopes is not None else None
+            for entry_id, entry in list(self._entries.items()):
+                if scopes is None or entry.scope in scopes:
+                    self._remove(entry_id)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "threshold": self.threshold,
+            "opted_out_users": len(self._opted_out),
+        }
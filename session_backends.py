@@ -0,0 +1,409 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Pluggable key/value + list session storage shared by every worker process
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from recipe_model import decode_json, encode_json
+
+
+class SessionPipeline:
+    """
+    Queues session operations and runs them in one round trip on `execute()`.
+    Each method returns the pipeline so calls can be chained; `execute()`
+    returns one result per queued operation, in order.
+    """
+
+    def __init__(self, backend: "SessionBackend"):
+        self.backend = backend
+        self.ops: List[Tuple] = []
+
+    def get(self, key: str) -> "SessionPipeline":
+        self.ops.append(("get", key))
+        return self
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, only_if_absent: bool = False) -> "SessionPipeline":
+        self.ops.append(("set", key, value, ttl, only_if_absent))
+        return self
+
+    def delete(self, key: str) -> "SessionPipeline":
+        self.ops.append(("delete", key))
+        return self
+
+    def append(self, key: str, value: Any, ttl: Optional[float] = None) -> "SessionPipeline":
+        """Append to the list at `key`; the result is the new length."""
+        self.ops.append(("append", key, value, ttl))
+        return self
+
+    def list_range(self, key: str, start: int = 0, end: int = -1) -> "SessionPipeline":
+        """Items `start..end` of the list at `key`, inclusive, like Redis LRANGE."""
+        self.ops.append(("list_range", key, start, end))
+        return self
+
+    def list_len(self, key: str) -> "SessionPipeline":
+        self.ops.append(("list_len", key))
+        return self
+
+    def list_trim(self, key: str, start: int) -> "SessionPipeline":
+        """Drop the first `start` items of the list at `key`, like Redis LTRIM key start -1."""
+        self.ops.append(("list_trim", key, start))
+        return self
+
+    def expire(self, key: str, ttl: float) -> "SessionPipeline":
+        """Reset the TTL of an existing value or list; the result is 1 if it exists."""
+        self.ops.append(("expire", key, ttl))
+        return self
+
+    def execute(self) -> List[Any]:
+        ops, self.ops = self.ops, []
+        return self.backend._execute(ops) if ops else []
+
+
+class SessionBackend:
+    """
+    Session storage interface: JSON values and append-only lists under string
+    keys, with optional per-key TTLs. Backends implement `_execute(ops)` for
+    a batch of pipeline operations and `keys(prefix)`.
+    """
+
+    def __init__(self, namespace: str = "a11yum"):
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def pipeline(self) -> SessionPipeline:
+        return SessionPipeline(self)
+
+    def get(self, key: str) -> Any:
+        return self.pipeline().get(key).execute()[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        return self.pipeline().set(key, value, ttl, only_if_absent).execute()[0]
+
+    def delete(self, key: str) -> int:
+        return self.pipeline().delete(key).execute()[0]
+
+    def append(self, key: str, value: Any, ttl: Optional[float] = None) -> int:
+        return self.pipeline().append(key, value, ttl).execute()[0]
+
+    def list_range(self, key: str, start: int = 0, end: int = -1) -> List[Any]:
+        return self.pipeline().list_range(key, start, end).execute()[0]
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Values for the keys that exist, fetched in one round trip."""
+        pipe = self.pipeline()
+        for key in keys:
+            pipe.get(key)
+        return {key: value for key, value in zip(keys, pipe.execute()) if value is not None}
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None):
+        pipe = self.pipeline()
+        for key, value in items.items():
+            pipe.set(key, value, ttl)
+        pipe.execute()
+
+    def keys(self, prefix: str = "") -> List[str]:
+        """Keys (values and lists) starting with `prefix`."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _slice(items: List[Any], start: int, end: int) -> List[Any]:
+    # Redis LRANGE semantics: inclusive end, -1 for the last item
+    return items[start:] if end == -1 else items[start:end + 1]
+
+
+class MemorySessionBackend(SessionBackend):
+    """Single-process backend; values are stored as JSON so callers never share objects."""
+
+    def __init__(self, namespace: str = "a11yum"):
+        super().__init__(namespace)
+        self._values: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lists: Dict[str, Tuple[List[bytes], Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, store: Dict[str, Tuple[Any, Optional[float]]], key: str, now: float):
+        entry = store.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del store[key]
+            return None
+        return entry
+
+    def _execute(self, ops: List[Tuple]) -> List[Any]:
+        now = time.time()
+        results = []
+        with self._lock:
+            for op in ops:
+                name, key = op[0], self._key(op[1])
+                if name == "get":
+                    entry = self._live(self._values, key, now)
+                    results.append(decode_json(entry[0]) if entry else None)
+                elif name == "set":
+                    _, _, value, ttl, only_if_absent = op
+                    if only_if_absent and self._live(self._values, key, now):
+                        results.append(False)
+                        continue
+                    self._values[key] = (encode_json(value), now + ttl if ttl else None)
+                    results.append(True)
+                elif name == "delete":
+                    removed = self._values.pop(key, None) is not None
+                    removed = (self._lists.pop(key, None) is not None) or removed
+                    results.append(int(removed))
+                elif name == "append":
+                    _, _, value, ttl = op
+                    entry = self._live(self._lists, key, now)
+                    items = entry[0] if entry else []
+                    items.append(encode_json(value))
+                    self._lists[key] = (items, now + ttl if ttl else (entry[1] if entry else None))
+                    results.append(len(items))
+                elif name == "list_range":
+                    entry = self._live(self._lists, key, now)
+                    results.append([decode_json(item) for item in _slice(entry[0], op[2], op[3])] if entry else [])
+                elif name == "list_len":
+                    entry = self._live(self._lists, key, now)
+                    results.append(len(entry[0]) if entry else 0)
+                elif name == "list_trim":
+                    entry = self._live(self._lists, key, now)
+                    if entry:
+                        self._lists[key] = (entry[0][op[2]:], entry[1])
+                    results.append(1)
+                elif name == "expire":
+                    found = 0
+                    for store in (self._values, self._lists):
+                        entry = self._live(store, key, now)
+                        if entry:
+                            store[key] = (entry[0], now + op[2])
+                            found = 1
+                    results.append(found)
+        return results
+
+    def keys(self, prefix: str = "") -> List[str]:
+        now = time.time()
+        full_prefix = self._key(prefix)
+        with self._lock:
+            return [
+                key[len(self.namespace) + 1:]
+                for store in (self._values, self._lists) for key in list(store)
+                if key.startswith(full_prefix) and self._live(store, key, now)
+            ]
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """
+    Backend in a SQLite file (WAL mode), shared by worker processes on one
+    machine. A pipeline runs as one transaction.
+    """
+
+    def __init__(self, path: str = "sessions.db", namespace: str = "a11yum"):
+        super().__init__(namespace)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_values ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_lists ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_session_lists_key ON session_lists (key, id)")
+        self._conn.commit()
+
+    def _execute(self, ops: List[Tuple]) -> List[Any]:
+        now = time.time()
+        live = "(expires_at IS NULL OR expires_at > ?)"
+        results = []
+        with self._lock, self._conn:
+            for op in ops:
+                name, key = op[0], self._key(op[1])
+                if name == "get":
+                    row = self._conn.execute(
+                        f"SELECT value FROM session_values WHERE key = ? AND {live}", (key, now)
+                    ).fetchone()
+                    results.append(decode_json(row[0]) if row else None)
+                elif name == "set":
+                    _, _, value, ttl, only_if_absent = op
+                    expires_at = now + ttl if ttl else None
+                    if only_if_absent:
+                        self._conn.execute(
+                            "DELETE FROM session_values WHERE key = ? AND expires_at <= ?", (key, now)
+                        )
+                        cursor = self._conn.execute(
+                            "INSERT OR IGNORE INTO session_values (key, value, expires_at) VALUES (?, ?, ?)",
+                            (key, encode_json(value).decode("utf-8"), expires_at),
+                        )
+                        results.append(cursor.rowcount == 1)
+                        continue
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO session_values (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, encode_json(value).decode("utf-8"), expires_at),
+                    )
+                    results.append(True)
+                elif name == "delete":
+                    removed = self._conn.execute("DELETE FROM session_values WHERE key = ?", (key,)).rowcount
+                    removed += self._conn.execute("DELETE FROM session_lists WHERE key = ?", (key,)).rowcount
+                    results.append(int(removed > 0))
+                elif name == "append":
+                    _, _, value, ttl = op
+                    self._conn.execute(
+                        "DELETE FROM session_lists WHERE key = ? AND expires_at <= ?", (key, now)
+                    )
+                    self._conn.execute(
+                        "INSERT INTO session_lists (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, encode_json(value).decode("utf-8"), now + ttl if ttl else None),
+                    )
+                    if ttl:
+                        self._conn.execute(
+                            "UPDATE session_lists SET expires_at = ? WHERE key = ?", (now + ttl, key)
+                        )
+                    results.append(self._conn.execute(
+                        "SELECT COUNT(*) FROM session_lists WHERE key = ?", (key,)
+                    ).fetchone()[0])
+                elif name == "list_range":
+                    rows = self._conn.execute(
+                        f"SELECT value FROM session_lists WHERE key = ? AND {live} ORDER BY id", (key, now)
+                    ).fetchall()
+                    results.append([decode_json(row[0]) for row in _slice(rows, op[2], op[3])])
+                elif name == "list_len":
+                    results.append(self._conn.execute(
+                        f"SELECT COUNT(*) FROM session_lists WHERE key = ? AND {live}", (key, now)
+                    ).fetchone()[0])
+                elif name == "list_trim":
+                    self._conn.execute(
+                        "DELETE FROM session_lists WHERE id IN "
+                        "(SELECT id FROM session_lists WHERE key = ? ORDER BY id LIMIT ?)", (key, op[2])
+                    )
+                    results.append(1)
+                elif name == "expire":
+                    expires_at = now + op[2]
+                    updated = self._conn.execute(
+                        f"UPDATE session_values SET expires_at = ? WHERE key = ? AND {live}", (expires_at, key, now)
+                    ).rowcount
+                    updated += self._conn.execute(
+                        f"UPDATE session_lists SET expires_at = ? WHERE key = ? AND {live}", (expires_at, key, now)
+                    ).rowcount
+                    results.append(int(updated > 0))
+        return results
+
+    def keys(self, prefix: str = "") -> List[str]:
+        pattern = self._key(prefix).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM session_values WHERE key LIKE ? ESCAPE '\\' "
+                "AND (expires_at IS NULL OR expires_at > ?) "
+                "UNION SELECT DISTINCT key FROM session_lists WHERE key LIKE ? ESCAPE '\\' "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (pattern, time.time(), pattern, time.time()),
+            ).fetchall()
+        return [row[0][len(self.namespace) + 1:] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionBackend(SessionBackend):
+    """
+    Backend on any client speaking the redis-py API: `redis.Redis` in
+    production, or `fakeredis.FakeRedis` in local tests. A session pipeline
+    is sent as one non-transactional Redis pipeline.
+    """
+
+    def __init__(self, client: Any, namespace: str = "a11yum"):
+        super().__init__(namespace)
+        self.client = client
+
+    def _execute(self, ops: List[Tuple]) -> List[Any]:
+        pipe = self.client.pipeline(transaction=False)
+        # Number of raw replies each op produces, to map them back
+        widths = []
+        for op in ops:
+            name, key = op[0], self._key(op[1])
+            if name == "get":
+                pipe.get(key)
+                widths.append(1)
+            elif name == "set":
+                _, _, value, ttl, only_if_absent = op
+                pipe.set(key, encode_json(value), px=int(ttl * 1000) if ttl else None, nx=only_if_absent)
+                widths.append(1)
+            elif name == "delete":
+                pipe.delete(key)
+                widths.append(1)
+            elif name == "append":
+                _, _, value, ttl = op
+                pipe.rpush(key, encode_json(value))
+                if ttl:
+                    pipe.pexpire(key, int(ttl * 1000))
+                widths.append(2 if ttl else 1)
+            elif name == "list_range":
+                pipe.lrange(key, op[2], op[3])
+                widths.append(1)
+            elif name == "list_len":
+                pipe.llen(key)
+                widths.append(1)
+            elif name == "list_trim":
+                pipe.ltrim(key, op[2], -1)
+                widths.append(1)
+            elif name == "expire":
+                pipe.pexpire(key, int(op[2] * 1000))
+                widths.append(1)
+        replies = pipe.execute()
+
+        results = []
+        position = 0
+        for op, width in zip(ops, widths):
+            reply = replies[position]
+            position += width
+            name = op[0]
+            if name == "get":
+                results.append(decode_json(reply) if reply is not None else None)
+            elif name == "set":
+                results.append(bool(reply))
+            elif name == "list_range":
+                results.append([decode_json(item) for item in reply])
+            else:
+                results.append(int(reply))
+        return results
+
+    def keys(self, prefix: str = "") -> List[str]:
+        full_prefix = self._key(prefix)
+        keys = []
+        for key in self.client.scan_iter(match=full_prefix.replace("*", "\\*") + "*", count=500):
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            keys.append(key[len(self.namespace) + 1:])
+        return keys
+
+    def close(self):
+        self.client.close()
+
+
+def create_session_backend(url: str = "memory://", namespace: str = "a11yum",
+                           client: Any = None) -> SessionBackend:
+    """
+    Build a backend from a URL:
+    memory://, sqlite:///path/to/sessions.db, redis://host:6379/0 (or rediss://).
+    Pass `client` to use an existing redis-compatible client such as fakeredis.
+    """
+    if client is not None:
+        return RedisSessionBackend(client, namespace)
+    scheme = urlsplit(url).scheme
+    if scheme in ("", "memory"):
+        return MemorySessionBackend(namespace)
+    if scheme == "sqlite":
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else "sessions.db"
+        return SQLiteSessionBackend(path or "sessions.db", namespace)
+    if scheme in ("redis", "rediss", "unix"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis package is required for redis:// session backends (pip install redis)")
+        return RedisSessionBackend(redis.Redis.from_url(url), namespace)
+    raise ValueError(f"Unsupported session backend URL: {url}")
@@ -0,0 +1,139 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Bounded LRU + idle-TTL store for agent sessions
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SessionEntry:
+    """A stored session together with its bookkeeping."""
+
+    __slots__ = ("value", "size", "last_used", "in_use")
+
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.size = size
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+
+class BoundedSessionStore:
+    """
+    Keeps at most `max_sessions` entries and roughly `max_bytes` of session
+    data. Entries idle for longer than `idle_ttl` seconds are dropped by
+    `sweep()`. Sessions that are currently in use are never evicted.
+
+    Methods that may evict return the evicted `(key, value)` pairs so the
+    caller can release whatever backs them.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 idle_ttl: float = 1800.0):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._entries: "OrderedDict[str, SessionEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self.evictions = {"lru": 0, "bytes": 0, "ttl": 0}
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> List[str]:
+        return list(self._entries.keys())
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value for `key` and mark it as most recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry.last_used = time.monotonic()
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def put(self, key: str, value: Any, size: int = 0) -> List[Tuple[str, Any]]:
+        """
+        Insert or replace an entry, evicting others if over budget. The new
+        entry itself is never evicted here, so the caller can still pin it.
+        """
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_bytes -= old.size
+        self._entries[key] = SessionEntry(value, size)
+        self._total_bytes += size
+        return self._enforce_limits(keep=key)
+
+    def update_size(self, key: str, size: int) -> List[Tuple[str, Any]]:
+        """Record the new size of an entry after it has grown."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return []
+        self._total_bytes += size - entry.size
+        entry.size = size
+        return self._enforce_limits()
+
+    def acquire(self, key: str):
+        """Pin an entry so it survives eviction while a request uses it."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.in_use += 1
+
+    def release(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and entry.in_use > 0:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+
+    def pop(self, key: str) -> Optional[Any]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._total_bytes -= entry.size
+        return entry.value
+
+    def sweep(self) -> List[Tuple[str, Any]]:
+        """Drop entries that have been idle for longer than the TTL."""
+        cutoff = time.monotonic() - self.idle_ttl
+        expired = [
+            key for key, entry in self._entries.items()
+            if entry.last_used < cutoff and not entry.in_use
+        ]
+        evicted = []
+        for key in expired:
+            evicted.append((key, self.pop(key)))
+            self.evictions["ttl"] += 1
+        return evicted
+
+    def _enforce_limits(self, keep: Optional[str] = None) -> List[Tuple[str, Any]]:
+        evicted = []
+        # Oldest entries sit at the front of the OrderedDict
+        for key in list(self._entries.keys()):
+            over_count = len(self._entries) > self.max_sessions
+            over_bytes = self._total_bytes > self.max_bytes
+            if not (over_count or over_bytes):
+                break
+            if self._entries[key].in_use or key == keep:
+                continue
+            evicted.append((key, self.pop(key)))
+            self.evictions["lru" if over_count else "bytes"] += 1
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._entries),
+            "max_sessions": self.max_sessions,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "idle_ttl_seconds": self.idle_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": dict(self.evictions),
+        }
@@ -0,0 +1,75 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Request coalescing: concurrent identical calls share one in-flight coroutine
+
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Runs at most one coroutine per key at a time. Callers that arrive while a
+    call for the same key is in flight wait on it and receive the same result
+    (or exception) instead of starting their own.
+
+    The shared call runs as its own task, so a waiter that is cancelled (for
+    example because its client disconnected) does not cancel the work for the
+    others.
+
+    Keys can carry user text, so `stats()` labels them by a hash, keeping
+    only the `prefix:` part; keys starting with one of `public_prefixes`
+    (e.g. recipe URLs) are shown as they are.
+    """
+
+    def __init__(self, name: str = "single_flight", max_tracked_keys: int = 100,
+                 public_prefixes: Tuple[str, ...] = ()):
+        self.name = name
+        self.max_tracked_keys = max_tracked_keys
+        self.public_prefixes = public_prefixes
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.calls = 0
+        self.executions = 0
+        # Largest number of callers that shared one execution, per key
+        self.fan_out: Dict[str, int] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn()` for `key`, or join the call already running for it."""
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._finish(key, done))
+        self._waiters[key] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        # Mark the exception as retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+        self._inflight.pop(key, None)
+        waiters = self._waiters.pop(key, 0)
+        label = self._label(key)
+        if label in self.fan_out or len(self.fan_out) < self.max_tracked_keys:
+            self.fan_out[label] = max(self.fan_out.get(label, 0), waiters)
+
+    def _label(self, key: Hashable) -> str:
+        text = str(key)
+        if text.startswith(self.public_prefixes):
+            return text
+        prefix, sep, _ = text.partition(":")
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        return f"{prefix}:{digest}" if sep else digest
+
+    def stats(self) -> Dict[str, Any]:
+        top_keys = sorted(self.fan_out.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.calls - self.executions,
+            "in_flight": len(self._inflight),
+            "top_fan_out": dict(top_keys),
+        }
@@ -0,0 +1,192 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Non-blocking structured logging: JSON lines written by a background thread
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import traceback
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import tracing
+from metrics import REGISTRY
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Per-logger overrides, e.g. "agent=DEBUG,main=WARNING"
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+# "json" (one object per line) or "text"
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+# Fraction of a route's requests whose INFO/DEBUG logs are kept, e.g.
+# "/chat=0.1,/health=0"; longest matching path prefix wins. Warnings and
+# errors are always kept.
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
+# Log what users typed and what the agent answered only when this is off
+LOG_REDACT_USER_TEXT = os.environ.get("LOG_REDACT_USER_TEXT", "true").lower() in ("1", "true", "yes")
+# Records buffered for the writer thread; more are dropped rather than blocking
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+# Record fields that carry user or model text, redacted unless LOG_REDACT_USER_TEXT is off
+USER_TEXT_FIELDS = ("user_text", "response_text")
+
+LOGS_DROPPED = REGISTRY.counter("a11yum_logs_dropped_total", "Log records dropped because the log queue was full")
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+def _parse_pairs(spec: str) -> Dict[str, str]:
+    pairs = {}
+    for item in spec.split(","):
+        key, sep, value = item.partition("=")
+        if sep and key.strip():
+            pairs[key.strip()] = value.strip()
+    return pairs
+
+def redact(value) -> str:
+    return f"[redacted {len(str(value))} chars]"
+
+def _fields(record: logging.LogRecord) -> Dict[str, object]:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS}
+
+
+#
+# Formatting (on the writer thread)
+#
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """`time level logger message key=value ...` for reading in a terminal."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        created = datetime.fromtimestamp(record.created).strftime("%H:%M:%S.%f")[:-3]
+        line = f"{created} {record.levelname:<7} {record.name} {record.getMessage()}"
+        fields = " ".join(f"{key}={value}" for key, value in _fields(record).items())
+        line = f"{line} {fields}" if fields else line
+        return f"{line}\n{record.exc_text}" if record.exc_text else line
+
+
+#
+# Enqueueing (on the calling thread)
+#
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps all of a request's INFO/DEBUG records or none of them, at the
+    rate configured for its route. The choice is derived from the trace id,
+    so every process in the request's path makes the same choice. Adds the
+    trace and span ids for correlation.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first, so the most specific route wins
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def rate_for(self, path: str) -> float:
+        return next((rate for prefix, rate in self.rates if path.startswith(prefix)), 1.0)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        current = tracing.current_span()
+        if current is None:
+            return True
+        record.trace_id = current.trace_id
+        record.span_id = current.span_id
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(current.root.attributes.get("http.target", ""))
+        return int(current.trace_id[:8], 16) < rate * 0x100000000
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without ever waiting: the caller only
+    builds the message, and a full queue drops the record.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that can't cross threads, and redact before user
+        # text reaches the queue; formatting happens later
+        if LOG_REDACT_USER_TEXT:
+            for key in USER_TEXT_FIELDS:
+                if getattr(record, key, None) is not None:
+                    setattr(record, key, redact(getattr(record, key)))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOGS_DROPPED.inc()
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+def configure_logging(stream=None) -> logging.Logger:
+    """
+    Set up the "a11yum" logger once: a non-blocking queue handler in front
+    of a writer thread that formats and writes to `stream` (stdout).
+    """
+    global _listener
+    root = logging.getLogger("a11yum")
+    with _configure_lock:
+        if _listener is not None and stream is None:
+            return root
+        if _listener is not None:
+            _listener.stop()
+            root.handlers.clear()
+
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JSONFormatter())
+        records: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        handler = NonBlockingQueueHandler(records)
+        handler.addFilter(SamplingFilter({
+            prefix: float(rate) for prefix, rate in _parse_pairs(LOG_SAMPLE_RATES).items()
+        }))
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        for name, level in _parse_pairs(LOG_LEVELS).items():
+            logging.getLogger(f"a11yum.{name}").setLevel(level.upper())
+
+        _listener = logging.handlers.QueueListener(records, writer, respect_handler_level=True)
+        _listener.start()
+    return root
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger `a11yum.<name>`, configuring logging on first use."""
+    configure_logging()
+    return logging.getLogger(f"a11yum.{name}")
+
+def flush_logs():
+    """Block until every queued record has been written (tests, shutdown)."""
+    if _listener is not None:
+        _listener.queue.join()
+
+@atexit.register
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
@@ -0,0 +1,185 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Offline model backends: replay recorded ADK response streams, or record them
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# "gemini" (default), "replay" (no network) or "record" (Gemini, saving every response)
+AGENT_MODEL_BACKEND = os.environ.get("AGENT_MODEL_BACKEND", "gemini")
+AGENT_REPLAY_FILE = os.environ.get(
+    "AGENT_REPLAY_FILE", str(Path(__file__).resolve().parent / "benchmarks" / "recordings" / "agent_replay.json")
+)
+# Simulated model speed: time to the first token, then tokens per second (0 = instant)
+AGENT_REPLAY_FIRST_TOKEN_MS = float(os.environ.get("AGENT_REPLAY_FIRST_TOKEN_MS", "300"))
+AGENT_REPLAY_TOKENS_PER_SEC = float(os.environ.get("AGENT_REPLAY_TOKENS_PER_SEC", "80"))
+# Tokens per streamed chunk when a recording has no partial responses of its own
+AGENT_REPLAY_CHUNK_TOKENS = int(os.environ.get("AGENT_REPLAY_CHUNK_TOKENS", "16"))
+
+
+def prompt_text(llm_request: LlmRequest) -> str:
+    """Text of the newest message in a request, which recordings are matched on."""
+    if not llm_request.contents:
+        return ""
+    return "".join(part.text or "" for part in llm_request.contents[-1].parts or [])
+
+def prompt_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+def _text(response: LlmResponse) -> str:
+    if response.content is None or not response.content.parts:
+        return ""
+    return "".join(part.text or "" for part in response.content.parts)
+
+def _chunk(text: str) -> LlmResponse:
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]), partial=True)
+
+
+class Recording:
+    """One recorded model call: how it is matched and the responses it produced."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.name = data.get("name", "")
+        self.prompt_sha256 = data.get("prompt_sha256")
+        self.pattern = re.compile(data["match"]) if data.get("match") else None
+        self.responses = [LlmResponse.model_validate(response) for response in data.get("responses", [])]
+
+    @property
+    def is_default(self) -> bool:
+        return self.pattern is None and self.prompt_sha256 is None
+
+    def matches(self, text: str) -> bool:
+        return self.pattern is not None and self.pattern.search(text) is not None
+
+def load_recordings(path: str) -> List[Recording]:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return [Recording(entry) for entry in data.get("recordings", [])]
+
+
+class ReplayLlm(BaseLlm):
+    """
+    Model backend that replays recorded ADK response streams instead of
+    calling Gemini, so every Runner, session and event path runs as usual
+    without a network. A request replays the recording whose prompt hash
+    matches exactly, else the first whose `match` regex finds the prompt,
+    else the default recording (neither set).
+
+    Timing is simulated: the first chunk after `first_token_latency`
+    seconds, then `tokens_per_second`. Recordings made without streaming
+    are split into chunks when a stream is requested.
+    """
+
+    recording_file: str = AGENT_REPLAY_FILE
+    first_token_latency: float = AGENT_REPLAY_FIRST_TOKEN_MS / 1000
+    tokens_per_second: float = AGENT_REPLAY_TOKENS_PER_SEC
+    chunk_tokens: int = AGENT_REPLAY_CHUNK_TOKENS
+    recordings: List[Any] = []
+
+    def model_post_init(self, __context: Any):
+        if not self.recordings:
+            self.recordings = load_recordings(self.recording_file)
+
+    def find(self, text: str) -> Recording:
+        digest = prompt_hash(text)
+        exact = next((r for r in self.recordings if r.prompt_sha256 == digest), None)
+        found = exact or next((r for r in self.recordings if r.matches(text)), None) \
+            or next((r for r in self.recordings if r.is_default), None)
+        if found is None:
+            raise ValueError(f"No recording in {self.recording_file} matches: {text[:80]!r}")
+        return found
+
+    def _delay(self, text: str) -> float:
+        return _tokens(text) / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    async def generate_content_async(self, llm_request: LlmRequest,
+                                     stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        recording = self.find(prompt_text(llm_request))
+        partials = [response for response in recording.responses if response.partial]
+        finals = [response for response in recording.responses if not response.partial]
+
+        if not stream:
+            text = "".join(_text(response) for response in finals)
+            await asyncio.sleep(self.first_token_latency + self._delay(text))
+            for response in finals:
+                yield response.model_copy(deep=True)
+            return
+
+        if not partials:
+            text = "".join(_text(response) for response in finals)
+            size = max(1, self.chunk_tokens) * 4
+            partials = [_chunk(text[start:start + size]) for start in range(0, len(text), size)]
+        await asyncio.sleep(self.first_token_latency)
+        for index, response in enumerate(partials):
+            if index:
+                await asyncio.sleep(self._delay(_text(response)))
+            yield response.model_copy(deep=True)
+        for response in finals:
+            yield response.model_copy(deep=True)
+
+
+class RecordingLlm(BaseLlm):
+    """
+    Pass-through to a real model that appends every call's responses to
+    `recording_file`, keyed by the prompt hash, for ReplayLlm to play back.
+    """
+
+    recording_file: str = AGENT_REPLAY_FILE
+    inner: Any = None
+
+    def model_post_init(self, __context: Any):
+        if self.inner is None:
+            from google.adk.models.registry import LLMRegistry
+            self.inner = LLMRegistry.new_llm(self.model)
+
+    async def generate_content_async(self, llm_request: LlmRequest,
+                                     stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        text = prompt_text(llm_request)
+        responses = []
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            responses.append(response)
+            yield response
+        save_recording(self.recording_file, {
+            "name": prompt_hash(text)[:12],
+            "prompt": text[:200],
+            "prompt_sha256": prompt_hash(text),
+            "responses": [response.model_dump(mode="json", exclude_none=True) for response in responses],
+        })
+
+_save_lock = threading.Lock()
+
+def save_recording(path: str, recording: Dict[str, Any]):
+    """Add or replace (by prompt hash) one recording in a recording file."""
+    with _save_lock:
+        file_path = Path(path)
+        data = json.loads(file_path.read_text(encoding="utf-8")) if file_path.exists() else {"recordings": []}
+        data["recordings"] = [
+            entry for entry in data["recordings"]
+            if not recording.get("prompt_sha256") or entry.get("prompt_sha256") != recording["prompt_sha256"]
+        ] + [recording]
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def agent_model(model: str, backend: Optional[str] = None):
+    """The `model` for an Agent: the Gemini model name, or a replay/record backend imitating it."""
+    backend = backend or AGENT_MODEL_BACKEND
+    if backend == "replay":
+        return ReplayLlm(model=model)
+    if backend == "record":
+        return RecordingLlm(model=model)
+    if backend != "gemini":
+        raise ValueError(f"Unknown AGENT_MODEL_BACKEND: {backend}")
+    return model
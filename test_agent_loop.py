@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared agent event loop used by the Flask backend
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.services.agent_loop import AgentLoop
+
+def test_run_and_timeout_cancels_on_the_loop():
+    loop = AgentLoop("test-agent-loop", max_concurrency=1)
+    cancelled = threading.Event()
+
+    async def answer(value, delay=0.0):
+        await asyncio.sleep(delay)
+        return value
+
+    async def stuck():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    try:
+        assert loop.run(answer("ok")) == "ok"
+        started = time.monotonic()
+        try:
+            loop.run(stuck(), timeout=0.05)
+            raise AssertionError("call should have timed out")
+        except TimeoutError:
+            pass
+        assert time.monotonic() - started < 1 and cancelled.wait(1)
+        # Calls from another event loop, limited to one at a time
+        async def from_other_loop():
+            return await asyncio.gather(loop.run_async(answer(1, 0.02)), loop.run_async(answer(2, 0.02)))
+        started = time.monotonic()
+        assert asyncio.run(from_other_loop()) == [1, 2]
+        assert time.monotonic() - started >= 0.04
+    finally:
+        loop.stop()
+
+def test_iterate_and_close_early():
+    loop = AgentLoop("test-agent-loop")
+    closed = threading.Event()
+
+    async def chunks(count, fail=False):
+        try:
+            for i in range(count):
+                await asyncio.sleep(0.001)
+                yield i
+            if fail:
+                raise ValueError("model error")
+        finally:
+            closed.set()
+
+    try:
+        assert list(loop.iterate(chunks(3))) == [0, 1, 2]
+        closed.clear()
+        stream = loop.iterate(chunks(1000))
+        assert next(stream) == 0
+        # Closing the iterator stops the generator on the agent loop
+        stream.close()
+        assert closed.wait(1)
+        try:
+            list(loop.iterate(chunks(2, fail=True)))
+            raise AssertionError("error should reach the caller")
+        except ValueError:
+            pass
+    finally:
+        loop.stop()
+
+def test_stream_timeout_closes_the_generator():
+    loop = AgentLoop("test-agent-loop")
+    closed = threading.Event()
+
+    async def stalls():
+        try:
+            yield "first"
+            await asyncio.sleep(5)
+            yield "never"
+        finally:
+            closed.set()
+
+    try:
+        received = []
+        try:
+            for item in loop.iterate(stalls(), timeout=0.05):
+                received.append(item)
+            raise AssertionError("stream should have timed out")
+        except TimeoutError:
+            pass
+        assert received == ["first"] and closed.wait(1)
+    finally:
+        loop.stop()
+
+def test_validate_recipe_merges_agent_alternatives():
+    import json
+    import agent
+    from backend.services.ai_agent_service import AIAgentService
+
+    prompts = []
+
+    async def call_agent(prompt, **kwargs):
+        prompts.append(prompt)
+        return json.dumps({
+            "accessibilityTags": ["No-Chop Options"],
+            "ingredients": {"ing-1": [{"name": "frozen diced onion", "amount": "1 cup",
+                                       "reason": "No chopping", "accessibilityBenefit": "No knife work"}]},
+        })
+
+    original = agent.call_agent_async
+    agent.call_agent_async = call_agent
+    try:
+        service = AIAgentService(AgentLoop("test-agent-loop"))
+        recipe = service.validate_recipe({
+            "title": "Onion soup",
+            "ingredients": [{"name": "onion", "amount": "2"}],
+            "steps": [{"instruction": "Slice the onions"}],
+        })
+        try:
+            service.validate_recipe({"title": "No steps"})
+            raise AssertionError("an invalid recipe should be rejected")
+        except ValueError as e:
+            assert "missing ingredients" in str(e)
+    finally:
+        agent.call_agent_async = original
+        service.loop.stop()
+    assert len(prompts) == 1 and "ing-1: 2 onion" in prompts[0]
+    assert recipe["ingredients"][0]["alternatives"][0]["name"] == "frozen diced onion"
+    assert recipe["accessibilityTags"] == ["No-Chop Options"]
+    assert recipe["accessibility_improvements"] == ["Added 1 ingredient alternative"]
+
+if __name__ == "__main__":
+    print("🧪 Testing agent loop...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for agent admission control and priority queueing
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from agent_scheduler import AgentScheduler, SchedulerRejected, INTERACTIVE, BULK
+
+def test_interactive_goes_first_and_keeps_reserved_slots():
+    async def run():
+        scheduler = AgentScheduler(max_concurrency=2, reserved_interactive=1, user_rate=0)
+        order = []
+        bulk = await scheduler.acquire(BULK)
+
+        # The second slot is reserved: bulk waits, interactive does not
+        waiting_bulk = asyncio.create_task(scheduler.acquire(BULK))
+        await asyncio.sleep(0)
+        assert not waiting_bulk.done() and scheduler.stats()["queued"]["bulk"] == 1
+        chat = await scheduler.acquire(INTERACTIVE)
+
+        async def take(priority, name):
+            ticket = await scheduler.acquire(priority)
+            order.append(name)
+            return ticket
+        later_chat = asyncio.create_task(take(INTERACTIVE, "chat"))
+        await asyncio.sleep(0)
+        chat.release()
+        (await later_chat).release()
+        bulk.release()
+        (await waiting_bulk).release()
+        assert order == ["chat"] and scheduler.running == 0 and scheduler.queued == 0
+    asyncio.run(run())
+
+def test_user_token_bucket():
+    async def run():
+        scheduler = AgentScheduler(user_rate=0.5, user_burst=2)
+        for _ in range(2):
+            (await scheduler.acquire(INTERACTIVE, "alice")).release()
+        try:
+            await scheduler.acquire(INTERACTIVE, "alice")
+            raise AssertionError("third call should be rate limited")
+        except SchedulerRejected as e:
+            assert e.reason == "user_rate" and e.retry_after == 2
+        # Other users and unattributed calls have their own budget
+        (await scheduler.acquire(INTERACTIVE, "bob")).release()
+        (await scheduler.acquire(BULK)).release()
+    asyncio.run(run())
+
+def test_queue_shedding_returns_429():
+    import main
+
+    async def run():
+        scheduler = AgentScheduler(max_concurrency=1, reserved_interactive=0, max_queue=1,
+                                   queue_timeout=0.05, user_rate=0)
+        held = await scheduler.acquire(INTERACTIVE)
+        queued = asyncio.create_task(scheduler.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        try:
+            await scheduler.acquire(INTERACTIVE)
+            raise AssertionError("queue is full")
+        except SchedulerRejected as e:
+            assert e.reason == "queue_full"
+        try:
+            await queued
+            raise AssertionError("queued call should time out")
+        except SchedulerRejected as e:
+            assert e.reason == "queue_timeout"
+        assert scheduler.queued == 0
+        # Cancelled waiters give up their place without leaking the slot
+        cancelled = asyncio.create_task(scheduler.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert scheduler.queued == 0
+        held.release()
+        assert scheduler.running == 0 and scheduler.queued == 0
+
+        main.agent_scheduler = AgentScheduler(user_rate=0.001, user_burst=1)
+        (await main.agent_scheduler.acquire(INTERACTIVE, "carol")).release()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/chat", json={"user_input": "hi", "user_id": "carol"})
+            stream = await client.post("/chat/stream", json={"user_input": "hi", "user_id": "carol"})
+        assert response.status_code == 429 and int(response.headers["Retry-After"]) > 1
+        assert response.json()["reason"] == "user_rate" and stream.status_code == 429
+    asyncio.run(run())
+
+def test_identical_scrapes_take_one_slot():
+    import tempfile
+    import agent
+    import main
+    from recipe_cache import RecipeCache
+
+    seen = []
+
+    async def parse(url):
+        seen.append(("parse", main.agent_scheduler.running))
+        return None
+
+    async def scrape(url):
+        seen.append(("model", main.agent_scheduler.running))
+        await asyncio.sleep(0.01)
+        return {"title": "Soup"}
+
+    async def run():
+        # One token for "dave": three scrapes of one URL must not spend three
+        main.agent_scheduler = AgentScheduler(user_rate=0.001, user_burst=1)
+        results = await asyncio.gather(*(
+            main.get_scraped_recipe("https://example.com/soup", user_id="dave", shed=True) for _ in range(3)
+        ))
+        assert all(result == ({"title": "Soup"}, "miss") for result in results)
+        assert main.agent_scheduler.running == 0
+
+    originals = agent.parse_recipe_from_url, agent._scrape_with_agent, main.recipe_cache
+    agent.parse_recipe_from_url, agent._scrape_with_agent = parse, scrape
+    main.recipe_cache = RecipeCache(os.path.join(tempfile.mkdtemp(), "recipes.db"))
+    try:
+        asyncio.run(run())
+    finally:
+        agent.parse_recipe_from_url, agent._scrape_with_agent, main.recipe_cache = originals
+    # Fetching the page holds no slot; the model call holds exactly one
+    assert seen == [("parse", 0), ("model", 1)]
+
+if __name__ == "__main__":
+    print("🧪 Testing agent scheduler...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
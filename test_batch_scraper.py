@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for batch scraping and batch jobs
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from batch_scraper import BatchJobRegistry, BatchScraper, HostRateLimiter, TooManyBatchJobs
+
+def test_host_rate_limiter_caps_and_spaces_requests():
+    limiter = HostRateLimiter(max_per_host=1, min_interval=0.02)
+    starts = []
+
+    async def fetch(host):
+        await limiter.acquire(host)
+        try:
+            starts.append((host, time.monotonic()))
+            await asyncio.sleep(0.01)
+        finally:
+            limiter.release(host)
+
+    async def run():
+        await asyncio.gather(fetch("a.com"), fetch("a.com"), fetch("a.com"), fetch("b.com"))
+    asyncio.run(run())
+
+    a_starts = [at for host, at in starts if host == "a.com"]
+    assert len(a_starts) == 3
+    assert all(later - earlier >= 0.019 for earlier, later in zip(a_starts, a_starts[1:]))
+    # Other hosts don't wait behind a.com
+    assert starts[1][0] == "b.com"
+
+def test_cancelled_wait_frees_the_host_slot():
+    limiter = HostRateLimiter(max_per_host=1, min_interval=10)
+
+    async def run():
+        await limiter.acquire("a.com")
+        limiter.release("a.com")
+        # The next start is 10s away; cancel while it waits
+        waiting = asyncio.create_task(limiter.acquire("a.com"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        try:
+            await waiting
+        except asyncio.CancelledError:
+            pass
+        assert not limiter._semaphores["a.com"].locked()
+    asyncio.run(run())
+
+def test_dedupe_and_cancel_on_close():
+    urls = ["https://www.example.com/soup/", "https://example.com/soup?utm_source=x",
+            "https://example.com/stew", "https://example.com/soup"]
+    assert BatchScraper.dedupe(urls) == ["https://www.example.com/soup/", "https://example.com/stew"]
+    cancelled = []
+
+    async def scrape(url):
+        try:
+            await asyncio.sleep(0 if url.endswith("/0") else 5)
+            return {"title": url}, "miss"
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+
+    async def peek(url):
+        return ({"title": "cached"}, "hit") if url.endswith("/cached") else None
+
+    async def run():
+        scraper = BatchScraper(scrape, peek, max_concurrency=4, max_per_host=4, per_host_interval=0)
+        results = scraper.run([f"https://example.com/{i}" for i in range(3)] + ["https://example.com/cached"])
+        first = await results.__anext__()
+        second = await results.__anext__()
+        assert {first["cache_status"], second["cache_status"]} == {"hit", "miss"}
+        # Closing the stream (a client disconnect) cancels the scrapes still pending
+        await results.aclose()
+        await asyncio.sleep(0)
+        assert sorted(cancelled) == ["https://example.com/1", "https://example.com/2"]
+    asyncio.run(run())
+
+def test_job_registry_limits():
+    async def run():
+        gate = asyncio.Event()
+
+        async def scrape(url):
+            await gate.wait()
+            if url.endswith("/b"):
+                # The agent's text-only fallback is not a recipe
+                return {"name": "Extracted Recipe", "raw_content": "..."}, "miss"
+            return {"title": url, "ingredients": [{"name": "leeks"}], "steps": [{"instruction": "Stir"}]}, "miss"
+
+        registry = BatchJobRegistry(BatchScraper(scrape, per_host_interval=0), max_jobs=2)
+        first = registry.start(["https://example.com/a", "https://www.example.com/a/"])
+        second = registry.start(["https://example.com/b"])
+        assert first.total == 1
+        try:
+            registry.start(["https://example.com/c"])
+            raise AssertionError("both jobs are still running")
+        except TooManyBatchJobs:
+            pass
+        gate.set()
+        await asyncio.gather(first.task, second.task)
+        assert first.status == "completed" and first.to_dict()["succeeded"] == 1
+        assert second.to_dict()["succeeded"] == 0 and second.results[0]["error"]
+        # Finished jobs make room, oldest first
+        third = registry.start(["https://example.com/c"])
+        assert registry.get(first.job_id) is None and registry.get(second.job_id) is second
+        await third.task
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    print("🧪 Testing batch scraper...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
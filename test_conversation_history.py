@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded conversation history policy
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_history import ConversationHistory, extractive_summary, split_history
+
+def _turn(i, size=10):
+    return {"user_input": f"Question {i}. " + "x" * size, "agent_response": f"Answer {i}. " + "y" * size}
+
+def test_split_keeps_last_turns_within_budget():
+    turns = [_turn(i) for i in range(10)]
+    older, recent = split_history(turns, keep_turns=4, token_budget=10_000)
+    assert len(older) == 6 and recent == turns[6:]
+    # A tight budget drops more turns, but never the latest one
+    older, recent = split_history([_turn(i, 400) for i in range(3)], keep_turns=4, token_budget=50)
+    assert len(older) == 2 and len(recent) == 1
+
+def test_extractive_summary_is_bounded():
+    summary = extractive_summary("", [_turn(i) for i in range(200)], max_tokens=100)
+    assert len(summary) <= 400 and "Question 199." in summary
+
+def test_folds_in_background_with_summarizer():
+    async def summarize(summary, turns):
+        await asyncio.sleep(0.01)
+        return f"{summary} folded {len(turns)}".strip()
+
+    async def run():
+        history = ConversationHistory(summarize, keep_turns=2, token_budget=10_000)
+        for i in range(5):
+            history.add_turn(f"Question {i}", f"Answer {i}")
+        # Turns being folded stay in the context until the summary is ready
+        assert "Question 0" in history.context()
+        await history.wait()
+        assert history.turns == [
+            {"user_input": "Question 3", "agent_response": "Answer 3"},
+            {"user_input": "Question 4", "agent_response": "Answer 4"},
+        ]
+        assert history.folded_turns == 3 and "Question 0" not in history.context()
+        # The session rotates on its token budget, not on a turn count
+        assert not history.needs_new_session()
+        history.token_budget = 20
+        assert history.needs_new_session()
+        history.token_budget = 10_000
+        history.start_session()
+        assert not history.needs_new_session()
+        history.add_turn("Cached question", "Cached answer", in_session=False)
+        assert history.needs_new_session()
+
+    asyncio.run(run())
+
+def test_failed_summary_is_logged_and_falls_back():
+    import logging
+
+    async def summarize(summary, turns):
+        raise RuntimeError("model unavailable")
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("a11yum.conversation_history")
+    logger.addHandler(handler)
+
+    async def run():
+        history = ConversationHistory(summarize, keep_turns=1, token_budget=10_000)
+        history.add_turn("Question 0", "Answer 0")
+        history.add_turn("Question 1", "Answer 1")
+        await history.wait()
+        assert history.summary == "- User: Question 0 Assistant: Answer 0"
+
+    try:
+        asyncio.run(run())
+    finally:
+        logger.removeHandler(handler)
+    assert len(records) == 1 and "RuntimeError: model unavailable" in records[0].exc_text
+
+def test_compaction_leases_the_session():
+    from main_simple import SimpleSessionManager
+    from session_backends import create_session_backend
+
+    manager = SimpleSessionManager(create_session_backend("memory://"))
+    for i in range(10):
+        manager.add_message("u", "s", f"Question {i}", f"Answer {i}")
+    # Another worker is folding this session: leave its messages alone
+    manager.backend.set("compacting:u_s", True, ttl=30)
+    manager.compact_history("u", "s")
+    assert len(manager.create_or_get_session("u", "s")["messages"]) == 10
+    manager.backend.delete("compacting:u_s")
+    manager.compact_history("u", "s")
+    session = manager.create_or_get_session("u", "s")
+    assert [m["user_input"] for m in session["messages"]] == [f"Question {i}" for i in range(4, 10)]
+    assert "User: Question 3 " in session["summary"] and manager.backend.get("compacting:u_s") is None
+
+if __name__ == "__main__":
+    print("🧪 Testing conversation history...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
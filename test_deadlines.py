@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for model call deadlines and hedged requests
+"""
+
+import sys
+import os
+import asyncio
+import contextvars
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from deadlines import AgentTimeout, Hedger, LatencyWindow, stream_with_deadline, with_deadline, HEDGES, TIMEOUTS
+
+def test_deadline_cancels_the_call():
+    closed = []
+
+    async def slow_call():
+        try:
+            await asyncio.sleep(5)
+        finally:
+            closed.append(True)
+
+    async def run():
+        assert await with_deadline(asyncio.sleep(0, "ok"), 1, "test") == "ok"
+        try:
+            await with_deadline(slow_call(), 0.05, "test")
+            raise AssertionError("call should have timed out")
+        except AgentTimeout as e:
+            assert e.label == "test" and e.timeout == 0.05
+    asyncio.run(run())
+    assert closed == [True]
+
+def test_stream_deadline_closes_the_stream():
+    current = contextvars.ContextVar("current", default=None)
+    closed = []
+
+    async def stream(delays):
+        # Like a span held open across chunks: set and reset in one context
+        token = current.set("model.run")
+        try:
+            for delay in delays:
+                await asyncio.sleep(delay)
+                yield delay
+        finally:
+            current.reset(token)
+            closed.append(True)
+
+    async def run():
+        chunks = stream_with_deadline(stream([0.01, 0.01]), 1, "test_stream")
+        assert [chunk async for chunk in chunks] == [0.01, 0.01]
+        timeouts = TIMEOUTS.value(label="test_stream")
+        received = []
+        try:
+            async for chunk in stream_with_deadline(stream([0.01, 0.02, 5]), 0.05, "test_stream"):
+                received.append(chunk)
+            raise AssertionError("stream should have timed out")
+        except AgentTimeout as e:
+            assert e.label == "test_stream"
+        assert received == [0.01, 0.02] and closed == [True, True]
+        assert TIMEOUTS.value(label="test_stream") == timeouts + 1
+        # The caller's task is not left cancelled
+        await asyncio.sleep(0.01)
+    asyncio.run(run())
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    hedger = Hedger(enabled=True, quantile=0.95, min_delay=0.01, min_samples=5)
+    primary_seconds = [0.01] * 5 + [1.0]
+    started, cancelled = [], []
+
+    async def attempt(hedge):
+        started.append(hedge)
+        try:
+            await asyncio.sleep(0.01 if hedge else primary_seconds[len(started) - 1])
+            return "hedge" if hedge else "primary"
+        except asyncio.CancelledError:
+            cancelled.append(hedge)
+            raise
+
+    async def run():
+        # Warm-up calls are never hedged
+        for _ in range(5):
+            assert await hedger.run(attempt, "test") == "primary"
+        assert started == [False] * 5 and 0.01 <= hedger.delay("test") < 0.5
+        won = HEDGES.value(label="test", winner="hedge")
+        assert await hedger.run(attempt, "test") == "hedge"
+        assert started[-2:] == [False, True] and cancelled == [False]
+        assert HEDGES.value(label="test", winner="hedge") == won + 1
+    asyncio.run(run())
+
+def test_failed_attempt_falls_back_to_the_other():
+    hedger = Hedger(enabled=True, min_delay=0.01, min_samples=1)
+    hedger._latencies["test"] = LatencyWindow()
+    hedger._latencies["test"].observe(0.01)
+
+    async def primary_fails(hedge):
+        await asyncio.sleep(0.04 if hedge else 0.02)
+        if not hedge:
+            raise ValueError("primary failed")
+        return "hedge"
+
+    async def both_fail(hedge):
+        await asyncio.sleep(0.02)
+        raise ValueError("hedge failed" if hedge else "primary failed")
+
+    async def run():
+        assert await hedger.run(primary_fails, "test") == "hedge"
+        try:
+            await hedger.run(both_fail, "test")
+            raise AssertionError("both attempts failed")
+        except ValueError as e:
+            assert str(e) == "primary failed"
+        # With hedging off a failure is final
+        hedger.enabled = False
+        try:
+            await hedger.run(primary_fails, "test")
+            raise AssertionError("primary failure should be raised")
+        except ValueError:
+            pass
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    print("🧪 Testing deadlines and hedging...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental JSON extractor used on agent responses
+"""
+
+import json
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from json_extract import JSONObjectExtractor, extract_json_objects
+
+RECIPE = {
+    "title": "Soup {for two}",
+    "ingredients": [{"name": "stock", "notes": "say \"low sodium\" \\ unsalted"}],
+    "steps": [{"instruction": "Heat gently"}],
+}
+
+def test_prose_and_fences_around_json():
+    text = f"Sure {{here}} it is:\n```json\n{json.dumps(RECIPE)}\n```\nEnjoy {{your}} meal!"
+    assert extract_json_objects(text) == [RECIPE]
+
+def test_chunk_boundaries_anywhere():
+    text = "prefix " + json.dumps(RECIPE) + " suffix"
+    for size in range(1, 12):
+        extractor = JSONObjectExtractor()
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert extractor.feed_all(chunks) + extractor.close() == [RECIPE], size
+
+def test_unbalanced_brace_in_prose():
+    assert extract_json_objects('Note: { this is loose, then {"a": 1} done') == [{"a": 1}]
+
+def test_partial_recovery():
+    extractor = JSONObjectExtractor()
+    extractor.feed('{"title": "Soup", "ingredients": [{"name": "salt"}, {"name": "pep')
+    assert extractor.partial() == {"title": "Soup", "ingredients": [{"name": "salt"}, {"name": "pep"}]}
+    extractor = JSONObjectExtractor()
+    extractor.feed('{"title": "Soup", "servings":')
+    assert extractor.partial() == {"title": "Soup"}
+
+def test_array_items_reported_as_they_close():
+    text = json.dumps({"title": "Soup", "ingredients": [{"name": "a [b]"}, {"name": "c"}],
+                       "steps": [{"instruction": "Heat", "alternatives": [{"id": "x"}]}]})
+    for size in (1, 7, len(text)):
+        extractor = JSONObjectExtractor()
+        items = []
+        for i in range(0, len(text), size):
+            extractor.feed(text[i:i + size])
+            items.extend(extractor.drain_items())
+        assert items == [
+            ("ingredients", 0, {"name": "a [b]"}),
+            ("ingredients", 1, {"name": "c"}),
+            ("steps", 0, {"instruction": "Heat", "alternatives": [{"id": "x"}]}),
+        ], size
+
+if __name__ == "__main__":
+    print("🧪 Testing JSON extraction...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the Socket.IO message queue and sticky node routing
+"""
+
+import sys
+import os
+import logging
+import threading
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import socketio
+
+from backend.sockets.message_queue import LocalQueueManager, StickyNodeMiddleware, message_queue_options
+
+def _call(app, path, cookie=None, query=''):
+    """Run one request through a WSGI app and return the response headers"""
+    environ = {'PATH_INFO': path, 'QUERY_STRING': query}
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['headers'] = headers
+
+    app(environ, start_response)
+    return [value for name, value in response['headers'] if name == 'Set-Cookie']
+
+def test_sticky_cookie_only_on_socketio_paths():
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    app = StickyNodeMiddleware(wsgi_app, 'node-a')
+    assert _call(app, '/api/recipes') == []
+    assert _call(app, '/socket.io/', query='EIO=4&transport=polling') == [
+        'a11yum_node=node-a; Path=/; HttpOnly; SameSite=Lax'
+    ]
+    # Already routed here: nothing to set
+    assert _call(app, '/socket.io/', cookie='a11yum_node=node-a', query='sid=abc') == []
+
+def test_misrouted_request_is_logged_and_rerouted():
+    def wsgi_app(environ, start_response):
+        start_response('400 BAD REQUEST', [])
+        return [b'unknown session']
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger('a11yum.message_queue')
+    logger.addHandler(handler)
+    try:
+        app = StickyNodeMiddleware(wsgi_app, 'node-a')
+        cookies = _call(app, '/socket.io/', cookie='a11yum_node=node-b', query='EIO=4&sid=abc')
+    finally:
+        logger.removeHandler(handler)
+    # The client is pointed at this node for its next handshake
+    assert cookies == ['a11yum_node=node-a; Path=/; HttpOnly; SameSite=Lax']
+    assert len(records) == 1 and records[0].levelno == logging.WARNING
+    assert (records[0].routed_to, records[0].node_id) == ('node-b', 'node-a')
+
+def test_local_queue_shares_emits_between_servers():
+    assert message_queue_options('', 'a11yum') == {}
+    assert message_queue_options('redis://cache:6379/0', 'a11yum') == {
+        'message_queue': 'redis://cache:6379/0', 'channel': 'a11yum'
+    }
+    options = message_queue_options('local://', 'test-local-queue')
+    received = []
+    done = threading.Event()
+
+    class RecordingManager(LocalQueueManager):
+        def _handle_emit(self, message):
+            received.append((self.channel, message['event'], message['data'], message['room']))
+            done.set()
+
+    sender = socketio.Server(async_mode='threading', **options)
+    for channel in ('test-local-queue', 'another-channel'):
+        # Servers subscribe on their first connection; start listening now
+        server = socketio.Server(async_mode='threading', client_manager=RecordingManager(channel=channel))
+        server.manager.initialize()
+    sender.emit('recipe_updated', {'id': 1}, room='recipe-1')
+    assert done.wait(1)
+    time.sleep(0.05)
+    # Only servers on the sender's channel get the emit
+    assert received == [('test-local-queue', 'recipe_updated', {'id': 1}, 'recipe-1')]
+
+if __name__ == "__main__":
+    print("🧪 Testing message queue...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite scraped recipe cache
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from recipe_cache import RecipeCache, cache_key, normalize_url
+
+def _cache(**limits):
+    return RecipeCache(os.path.join(tempfile.mkdtemp(), "recipes.db"), **limits)
+
+def _recipe(title):
+    return {"title": title, "ingredients": [{"name": "carrots"}], "steps": [{"instruction": "Simmer"}]}
+
+def test_normalize_url_and_cache_key():
+    url = "HTTPS://www.Example.com:443/recipes/soup/?utm_source=x&b=2&fbclid=y&a=1#method"
+    assert normalize_url(url) == "https://example.com/recipes/soup?a=1&b=2"
+    assert normalize_url("example.com/soup") == "https://example.com/soup"
+    assert normalize_url("http://example.com:8080/") == "http://example.com:8080/"
+    assert cache_key(url) == cache_key("https://example.com/recipes/soup?b=2&a=1")
+    assert cache_key("https://example.com/soup") != cache_key("http://example.com/soup")
+
+def test_fresh_stale_and_miss():
+    cache = _cache(ttl=0.05, stale_ttl=0.05)
+    assert cache.get("https://example.com/soup") == (None, None)
+    cache.put("https://www.example.com/soup/", {"title": "Soup"})
+    assert cache.get("https://example.com/soup") == ({"title": "Soup"}, "fresh")
+    time.sleep(0.06)
+    assert cache.get("https://example.com/soup") == ({"title": "Soup"}, "stale")
+    time.sleep(0.05)
+    assert cache.get("https://example.com/soup") == (None, None)
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.stale_hits, cache.misses) == (1, 1, 2)
+
+def test_evicts_least_recently_accessed():
+    cache = _cache(max_entries=2)
+    cache.put("https://example.com/a", {"title": "A"})
+    time.sleep(0.01)
+    cache.put("https://example.com/b", {"title": "B"})
+    time.sleep(0.01)
+    cache.get("https://example.com/a")
+    cache.put("https://example.com/c", {"title": "C"})
+    assert cache.get("https://example.com/b") == (None, None)
+    assert cache.get("https://example.com/a")[1] == "fresh" and cache.evictions == 1
+    # The byte budget evicts as well
+    cache.max_bytes = 20
+    cache.put("https://example.com/d", {"title": "D"})
+    assert cache.stats()["entries"] == 1
+
+def test_stale_entry_is_served_while_it_is_refreshed():
+    import main
+
+    url = "https://example.com/stew"
+    scrapes = []
+
+    async def scrape(recipe_url, admit=None):
+        scrapes.append(recipe_url)
+        return _recipe("Stew, refreshed")
+
+    original_cache, original_scrape = main.recipe_cache, main.scrape_recipe_from_url
+    main.recipe_cache = cache = _cache(ttl=0.01, stale_ttl=60)
+    main.scrape_recipe_from_url = scrape
+    try:
+        cache.put(url, _recipe("Stew"))
+        time.sleep(0.02)
+
+        async def run():
+            assert await main.get_scraped_recipe(url) == (_recipe("Stew"), "stale")
+            assert await main.get_scraped_recipe(url) == (_recipe("Stew"), "stale")
+            await asyncio.gather(*main._refresh_tasks.values())
+        asyncio.run(run())
+        # Both stale reads shared one background refresh
+        assert scrapes == [url]
+        cache.ttl = 60
+        assert cache.get(url) == (_recipe("Stew, refreshed"), "fresh")
+    finally:
+        main.recipe_cache, main.scrape_recipe_from_url = original_cache, original_scrape
+
+def test_only_complete_recipes_are_cached():
+    import main
+
+    results = {
+        "https://example.com/text": {"name": "Extracted Recipe", "raw_content": "Soup. Boil water.",
+                                     "extraction_method": "text_analysis"},
+        "https://example.com/partial": {**_recipe("Partial"), "incomplete": True},
+        "https://example.com/error": {"error": "timed out"},
+        "https://example.com/soup": _recipe("Soup"),
+    }
+
+    async def scrape(recipe_url, admit=None):
+        return results[recipe_url]
+
+    original_cache, original_scrape = main.recipe_cache, main.scrape_recipe_from_url
+    main.recipe_cache = cache = _cache()
+    main.scrape_recipe_from_url = scrape
+    try:
+        async def run():
+            for url, recipe_data in results.items():
+                assert await main.get_scraped_recipe(url) == (recipe_data, "miss")
+        asyncio.run(run())
+        assert cache.get("https://example.com/soup")[1] == "fresh"
+        assert cache.stats()["entries"] == 1
+    finally:
+        main.recipe_cache, main.scrape_recipe_from_url = original_cache, original_scrape
+
+if __name__ == "__main__":
+    print("🧪 Testing recipe cache...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the typed recipe model and its JSON encoding
+"""
+
+import json
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from recipe_model import Recipe, decode_recipe, encode_recipe
+from recipe_parser import parse_recipe_file, scraper_json_to_recipe
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def test_round_trip_matches_parser_output():
+    with open(os.path.join(HERE, "recipes", "recipe1.json"), encoding="utf-8") as f:
+        recipe = scraper_json_to_recipe(json.load(f))
+    assert Recipe.from_dict(recipe).to_dict() == recipe
+    assert decode_recipe(encode_recipe(Recipe.from_dict(recipe))).to_dict() == recipe
+
+    parsed = parse_recipe_file(os.path.join(HERE, "recipes", "html", "shrimp-scampi-with-pasta.html"))
+    assert json.loads(encode_recipe(Recipe.from_dict(parsed))) == parsed
+
+def test_loose_model_output_is_coerced():
+    recipe = Recipe.from_dict({
+        "title": "Toast",
+        "estimatedTime": "5",
+        "servings": None,
+        "ingredients": [{"id": "ing-1", "name": "bread", "amount": 2}],
+        "steps": [{"stepNumber": "1", "instruction": "Toast it", "tips": "Watch it"}],
+        "incomplete": True,
+    })
+    assert recipe.estimatedTime == 5 and recipe.servings == 1
+    assert recipe.ingredients[0].amount == "2"
+    assert recipe.steps[0].stepNumber == 1 and recipe.steps[0].tips == ["Watch it"]
+    assert recipe.to_dict()["incomplete"] is True
+    # Unbounded JSON-LD values fall back to the default
+    assert Recipe.from_dict({"title": "Stew", "estimatedTime": "Infinity", "servings": 1e400}).servings == 1
+
+def test_valid_recipes_are_served_as_they_are():
+    import main
+
+    recipe = {
+        "id": "recipe-1", "title": "Toast", "estimatedTime": 5, "servings": 1,
+        "ingredients": [{"id": "ing-1", "name": "bread", "amount": "2", "brand": "any"}],
+        "steps": [{"id": "step-1", "stepNumber": 1, "instruction": "Toast it", "video": "toast.mp4"}],
+    }
+    body = json.loads(main.scraping_response(True, "https://example.com/toast", recipe).body)
+    assert body["recipe_data"] == recipe
+    partial = {"title": "Toast", "estimatedTime": "5", "ingredients": [{"name": "bread"}], "incomplete": True}
+    assert json.loads(main.scraping_response(True, "u", partial).body)["recipe_data"]["estimatedTime"] == 5
+
+def test_missing_title_is_rejected():
+    try:
+        Recipe.from_dict({"name": "Not a recipe", "raw_content": "..."})
+    except ValueError:
+        return
+    assert False, "expected ValueError"
+
+if __name__ == "__main__":
+    print("🧪 Testing recipe model...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
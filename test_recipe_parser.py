@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for the local schema.org recipe parser
+Uses the saved pages in recipes/html, so no network or Google ADK is needed
+"""
+
+import asyncio
+import json
+import sys
+import os
+
+import httpx
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import recipe_parser
+from recipe_parser import (
+    UnsafeURL,
+    check_fetch_url,
+    fetch_recipe_html,
+    merge_accessibility_alternatives,
+    parse_duration,
+    parse_ingredient,
+    parse_recipe_file,
+    scraper_json_to_recipe,
+)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes", "html")
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+def test_json_ld_page():
+    """JSON-LD pages parse into the example-recipe-structure.json shape"""
+    recipe = parse_recipe_file(fixture("spinach-feta-turkey-burgers.html"))
+    assert recipe["title"] == "Spinach and Feta Turkey Burgers"
+    assert recipe["estimatedTime"] == 35
+    assert recipe["servings"] == 8
+    assert recipe["sourceUrl"] == "https://www.allrecipes.com/recipe/158968/spinach-and-feta-turkey-burgers/"
+    assert recipe["nutritionInfo"] == {"calories": 233, "protein": "27g", "carbs": "2g", "fat": "13g"}
+    assert [step["stepNumber"] for step in recipe["steps"]] == [1, 2, 3]
+    assert recipe["ingredients"][1]["name"] == "ground turkey"
+
+def test_microdata_page_matches_saved_record():
+    """Microdata pages and the saved recipe-scrapers record agree"""
+    from_html = parse_recipe_file(fixture("shrimp-scampi-with-pasta.html"))
+    with open(os.path.join(FIXTURES, "..", "recipe3.json")) as f:
+        from_json = scraper_json_to_recipe(json.load(f))
+    for key in ("title", "estimatedTime", "servings", "ingredients", "tools", "steps", "nutritionInfo"):
+        assert from_html[key] == from_json[key], key
+
+def test_page_without_recipe_markup():
+    """Pages without Recipe markup return None so the agent path is used"""
+    assert parse_recipe_file(fixture("no-recipe-markup.html")) is None
+
+def test_ingredient_lines():
+    ingredient = parse_ingredient("1 (10 ounce) box frozen chopped spinach, thawed and squeezed dry", 3)
+    assert ingredient["id"] == "ing-3"
+    assert ingredient["amount"] == "1"
+    assert ingredient["unit"] == "box"
+    assert ingredient["name"] == "frozen chopped spinach"
+    assert ingredient["notes"] == "10 ounce; thawed and squeezed dry"
+    assert parse_ingredient("½ cup milk", 1)["amount"] == "1/2"
+    assert parse_ingredient("salt to taste", 2)["amount"] == ""
+
+def test_durations():
+    assert parse_duration("PT1H30M") == 90
+    assert parse_duration("PT45M") == 45
+    assert parse_duration(["P0DT2H"]) == 120
+    assert parse_duration(None) is None
+
+def test_merge_alternatives():
+    recipe = parse_recipe_file(fixture("spinach-feta-turkey-burgers.html"))
+    merge_accessibility_alternatives(recipe, {
+        "accessibilityTags": ["No-Chop Options"],
+        "ingredients": {"ing-6": [{"name": "jarred minced garlic", "reason": "No chopping"}]},
+        "steps": {"step-1": [{"instruction": "Use an indoor grill pan", "reason": "No outdoor grill"}]},
+    })
+    assert recipe["accessibilityTags"] == ["No-Chop Options"]
+    assert recipe["ingredients"][5]["alternatives"][0]["id"] == "alt-1"
+    assert recipe["steps"][0]["alternatives"][0]["id"] == "step-alt-1"
+
+def test_refuses_unsafe_urls():
+    async def run():
+        for url in ("file:///etc/passwd", "ftp://example.com/r", "http://127.0.0.1:8000/health",
+                    "http://localhost/", "http://169.254.169.254/latest/meta-data/", "http://10.0.0.5/",
+                    "http://[::1]/", "http://[::ffff:192.168.1.1]/"):
+            try:
+                await check_fetch_url(url)
+                raise AssertionError(f"{url} should be refused")
+            except UnsafeURL:
+                pass
+    asyncio.run(run())
+
+def test_fetch_checks_redirects_and_size():
+    pages = {
+        "/soup": httpx.Response(200, html="<html><h1>Soup</h1></html>"),
+        "/moved": httpx.Response(302, headers={"location": "/soup"}),
+        "/metadata": httpx.Response(302, headers={"location": "http://169.254.169.254/latest/meta-data/"}),
+        "/huge": httpx.Response(200, content=b"x" * 2048),
+    }
+
+    requests = []
+
+    async def resolve(host, port):
+        return ["93.184.216.34"] if host == "recipes.example" else ["169.254.169.254"]
+
+    def respond(request):
+        requests.append(request)
+        return pages[request.url.path]
+
+    original_resolve, original_max = recipe_parser._resolve, recipe_parser.FETCH_MAX_BYTES
+    recipe_parser._resolve = resolve
+    recipe_parser.FETCH_MAX_BYTES = 1024
+
+    async def run():
+        recipe_parser._clients[asyncio.get_running_loop()] = httpx.AsyncClient(
+            transport=httpx.MockTransport(respond))
+        try:
+            assert await fetch_recipe_html("https://recipes.example/moved") == pages["/soup"].text
+            # Every hop connects to the address that was checked, named by Host and SNI,
+            # so a second DNS lookup can't send it somewhere else
+            assert [request.url.host for request in requests] == ["93.184.216.34"] * 2
+            assert all(request.headers["host"] == "recipes.example" for request in requests)
+            assert all(request.extensions["sni_hostname"] == "recipes.example" for request in requests)
+            for path, error in (("/metadata", UnsafeURL), ("/huge", ValueError)):
+                try:
+                    await fetch_recipe_html(f"https://recipes.example{path}")
+                    raise AssertionError(f"{path} should be refused")
+                except error:
+                    pass
+        finally:
+            await recipe_parser.close_http_client()
+    try:
+        asyncio.run(run())
+    finally:
+        recipe_parser._resolve, recipe_parser.FETCH_MAX_BYTES = original_resolve, original_max
+
+if __name__ == "__main__":
+    print("🧪 Testing recipe parser...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
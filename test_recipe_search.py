@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process recipe search index
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from recipe_search import RecipeSearchIndex
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def make_index():
+    index = RecipeSearchIndex()
+    index.add_many([
+        {"id": "1", "title": "Garlic Chicken", "description": "Weeknight chicken",
+         "ingredients": [{"name": "chicken thighs"}, {"name": "garlic"}],
+         "difficulty": "Easy", "estimatedTime": 25, "dietaryTags": ["Gluten-Free"]},
+        {"id": "2", "title": "Vegan Chili", "description": "Beans and garlic",
+         "ingredients": [{"name": "black beans"}, {"name": "garlic"}],
+         "difficulty": "Medium", "estimatedTime": 50, "dietaryTags": ["Vegan", "Gluten-Free"]},
+        {"id": "3", "title": "Chicken Soup", "description": "Slow simmered",
+         "ingredients": [{"name": "chicken"}, {"name": "carrots"}],
+         "difficulty": "Hard", "estimatedTime": 140},
+    ])
+    return index
+
+def test_bm25_ranks_title_matches_first():
+    results = make_index().search("chicken garlic")
+    assert [result["id"] for result in results] == ["1", "3", "2"]
+    assert results[0]["score"] > results[1]["score"] > 0
+
+def test_filters():
+    index = make_index()
+    assert [r["id"] for r in index.search("garlic", dietary_tags=["gluten free"])] == ["1", "2"]
+    assert [r["id"] for r in index.search("garlic", dietary_tags=["vegan"])] == ["2"]
+    assert [r["id"] for r in index.search("", max_time=40)] == ["1"]
+    assert [r["id"] for r in index.search("", max_time=50)] == ["1", "2"]
+    assert [r["id"] for r in index.search("chicken", difficulty=["Easy", "Hard"], max_time=200)] == ["1", "3"]
+
+def test_readding_replaces_recipe():
+    index = make_index()
+    index.add({"id": "3", "title": "Lentil Soup", "difficulty": "Easy"})
+    assert len(index) == 3
+    assert [r["id"] for r in index.search("chicken")] == ["1"]
+    assert [r["title"] for r in index.search("soup", difficulty=["easy"])] == ["Lentil Soup"]
+
+def test_loads_bundled_corpus():
+    index = RecipeSearchIndex()
+    assert index.load_directory(os.path.join(HERE, "recipes")) == 5
+    assert index.search("gazpacho")[0]["title"] == "Sweet Corn Gazpacho"
+
+if __name__ == "__main__":
+    print("🧪 Testing recipe search...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLAlchemy recipe store: bulk ingest, round trips and keyset pagination
+"""
+
+import sys
+import os
+import json
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from backend.models import db
+from backend.routes.recipe_routes import recipe_bp
+from backend.services import recipe_store
+
+EXAMPLE = json.loads((Path(__file__).parent / "example-recipe-structure.json").read_text(encoding="utf-8"))
+
+def _app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    app.register_blueprint(recipe_bp)
+    with app.app_context():
+        db.create_all()
+    return app
+
+def test_round_trip_keeps_nested_alternatives():
+    app = _app()
+    with app.app_context():
+        assert recipe_store.ingest_recipes([EXAMPLE]) == {"inserted": 1, "skipped": 0, "invalid": 0}
+        assert recipe_store.get_recipe(EXAMPLE["id"]) == json.loads(json.dumps(
+            recipe_store.Recipe.from_dict(EXAMPLE).to_dict()
+        ))
+        assert recipe_store.find_by_source_url("https://www.example.com/original-recipe/")["id"] == EXAMPLE["id"]
+
+def test_ingest_skips_stored_ids_and_source_urls():
+    app = _app()
+    with app.app_context():
+        recipe_store.ingest_recipes([EXAMPLE])
+        copy = {**EXAMPLE, "id": "recipe-copy"}
+        other = {**EXAMPLE, "id": "recipe-other", "sourceUrl": None}
+        counts = recipe_store.ingest_recipes([EXAMPLE, copy, other, other, {"id": "untitled"}])
+        assert counts == {"inserted": 1, "skipped": 3, "invalid": 1}
+        assert recipe_store.recipe_count() == 2
+
+def test_keyset_pages_cover_every_recipe_once():
+    app = _app()
+    recipes = [
+        {"id": f"recipe-{n}", "title": f"Recipe {n}", "difficulty": "Easy" if n % 2 else "Hard"}
+        for n in range(25)
+    ]
+    with app.app_context():
+        recipe_store.ingest_recipes(recipes, batch_size=7)
+
+    client = app.test_client()
+    seen, cursor = [], None
+    while True:
+        url = "/recipes?limit=10&difficulty=Easy" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url).get_json()
+        seen += [recipe["id"] for recipe in page["recipes"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"recipe-{n}" for n in range(23, 0, -2)]
+    assert client.get("/recipes/recipe-3").get_json()["recipe"]["title"] == "Recipe 3"
+    assert client.get("/recipes/missing").status_code == 404
+
+def test_generated_recipes_get_their_own_ids():
+    import agent
+    from backend.services.ai_agent_service import AIAgentService
+
+    async def stream(prompt, **kwargs):
+        # The model copies the example's id and source URL
+        yield json.dumps({**EXAMPLE, "title": prompt[-20:]})
+
+    original = agent.stream_agent_async
+    agent.stream_agent_async = stream
+    try:
+        service = AIAgentService()
+        recipes = [service.generate_recipe(f"soup number {n}", {}) for n in range(2)]
+    finally:
+        agent.stream_agent_async = original
+
+    app = _app()
+    with app.app_context():
+        recipe_store.ingest_recipes([EXAMPLE])
+        assert all(recipe_store.save_generated_recipe(recipe) for recipe in recipes)
+        assert len({recipe["id"] for recipe in recipes} | {EXAMPLE["id"]}) == 3
+        for recipe in recipes:
+            stored = recipe_store.get_recipe(recipe["id"])
+            assert stored["title"] == recipe["title"] and "sourceUrl" not in stored
+        counts = recipe_store.ingest_recipes([{**EXAMPLE, "id": "r" * 65, "sourceUrl": None}])
+        assert counts == {"inserted": 0, "skipped": 0, "invalid": 1}
+
+if __name__ == "__main__":
+    print("🧪 Testing recipe store...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
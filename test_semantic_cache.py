@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the semantic response cache
+"""
+
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from semantic_cache import SemanticCache
+
+def test_near_duplicate_questions_hit():
+    cache = SemanticCache(threshold=0.85)
+    cache.put("no-chop recipes for arthritis", "Try sheet-pan dinners.", scope="chat")
+    response, similarity = cache.lookup("Easy no-chop recipes for arthritis?", scope="chat")
+    assert response == "Try sheet-pan dinners." and 0.85 <= similarity < 1
+    # Different meaning, or a different scope, is a miss
+    assert cache.lookup("vegan recipes for arthritis", scope="chat") is None
+    assert cache.lookup("recipes without chop for arthritis", scope="chat") is None
+    assert cache.lookup("no-chop recipes for arthritis", scope="recipe_query") is None
+
+def test_opt_out_skips_reads_and_writes():
+    cache = SemanticCache()
+    cache.opt_out("u1")
+    cache.put("one-pot meals for limited mobility", "answer", user_id="u1")
+    assert cache.stats()["entries"] == 0
+    cache.put("one-pot meals for limited mobility", "answer", user_id="u2")
+    assert cache.lookup("one-pot meals for limited mobility", user_id="u1") is None
+    assert cache.lookup("one-pot meals for limited mobility", user_id="u2")[0] == "answer"
+
+def test_eviction_and_expiry():
+    cache = SemanticCache(max_entries=2, ttl=0.05)
+    for question in ("slow cooker stew", "microwave mug cake", "sheet pan chicken"):
+        cache.put(question, question)
+    assert cache.lookup("slow cooker stew") is None and cache.stats()["evictions"] == 1
+    time.sleep(0.1)
+    assert cache.lookup("sheet pan chicken") is None and cache.sweep() == 1
+
+if __name__ == "__main__":
+    print("🧪 Testing semantic cache...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
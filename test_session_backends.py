@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable session backends (memory, SQLite and Redis via fakeredis)
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from session_backends import create_session_backend
+
+def _backends():
+    yield create_session_backend("memory://")
+    yield create_session_backend(f"sqlite:///{tempfile.mkdtemp()}/sessions.db")
+    try:
+        import fakeredis
+    except ImportError:
+        print("⏭️  fakeredis not installed, skipping Redis backend")
+        return
+    yield create_session_backend(client=fakeredis.FakeRedis())
+
+def test_pipeline_values_and_lists():
+    for backend in _backends():
+        created, again, length, session, messages = (
+            backend.pipeline()
+            .set("session:u_1", {"user_id": "u"}, only_if_absent=True)
+            .set("session:u_1", {"user_id": "other"}, only_if_absent=True)
+            .append("messages:u_1", {"text": "hi"})
+            .get("session:u_1")
+            .list_range("messages:u_1")
+            .execute()
+        )
+        assert (created, again, length) == (True, False, 1), type(backend).__name__
+        assert session == {"user_id": "u"} and messages == [{"text": "hi"}]
+        backend.append("messages:u_1", {"text": "bye"})
+        assert backend.list_range("messages:u_1", 1) == [{"text": "bye"}]
+        assert backend.keys("session:") == ["session:u_1"]
+        assert backend.delete("session:u_1") == 1 and backend.get("session:u_1") is None
+        backend.close()
+
+def test_batch_reads_and_writes():
+    for backend in _backends():
+        backend.set_many({"a": 1, "b": [2]})
+        assert backend.get_many(["a", "b", "missing"]) == {"a": 1, "b": [2]}
+        backend.close()
+
+def test_values_expire():
+    for backend in _backends():
+        backend.set("short", "x", ttl=0.05)
+        backend.append("short_list", "x", ttl=0.05)
+        time.sleep(0.1)
+        assert backend.get("short") is None and backend.list_range("short_list") == []
+        backend.close()
+
+def test_workers_share_sqlite_sessions():
+    url = f"sqlite:///{tempfile.mkdtemp()}/sessions.db"
+    first, second = create_session_backend(url), create_session_backend(url)
+    first.set("session:s1", {"user_preferences": {"energy_level": "low"}})
+    assert second.get("session:s1")["user_preferences"] == {"energy_level": "low"}
+    first.close()
+    second.close()
+
+if __name__ == "__main__":
+    print("🧪 Testing session backends...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
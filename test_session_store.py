@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded agent session store
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from session_store import BoundedSessionStore
+
+def test_lru_and_byte_budget_eviction():
+    store = BoundedSessionStore(max_sessions=2, max_bytes=100)
+    assert store.put("a", "A", 10) == [] and store.put("b", "B", 10) == []
+    store.get("a")
+    # "b" is least recently used now
+    assert store.put("c", "C", 10) == [("b", "B")]
+    assert store.update_size("c", 95) == [("a", "A")]
+    assert store.keys() == ["c"] and store.evictions == {"lru": 1, "bytes": 1, "ttl": 0}
+    # A new entry over the budget on its own is kept, so the caller can still pin it
+    assert store.put("d", "D", 500) == [("c", "C")] and "d" in store
+
+def test_pinned_sessions_survive_eviction_and_sweep():
+    store = BoundedSessionStore(max_sessions=1, idle_ttl=0.01)
+    store.put("a", "A")
+    store.acquire("a")
+    assert store.put("b", "B") == [] and len(store) == 2
+    time.sleep(0.02)
+    assert store.sweep() == [("b", "B")]
+    store.release("a")
+    assert "a" in store
+    time.sleep(0.02)
+    assert store.sweep() == [("a", "A")] and store.evictions["ttl"] == 2
+
+def test_concurrent_first_requests_share_one_session():
+    import main
+
+    async def run():
+        manager = main.AgentSessionManager()
+        results = await asyncio.gather(*(manager.get_or_create_session("u1", "s1") for _ in range(5)))
+        assert len({session.id for _, session in results}) == 1
+        listed = await manager.runner.session_service.list_sessions(app_name=main.APP_NAME, user_id="u1")
+        assert len(listed.sessions) == 1 and not manager._session_locks
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    print("🧪 Testing session store...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for request coalescing
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test", public_prefixes=("scrape:",))
+    runs = []
+
+    async def work(key):
+        runs.append(key)
+        await asyncio.sleep(0.01)
+        return {"key": key}
+
+    async def run():
+        results = await asyncio.gather(
+            *(flight.do("scrape:https://example.com/soup", lambda: work("soup")) for _ in range(4)),
+            flight.do("query:what can i cook with arthritis?", lambda: work("query")),
+        )
+        assert runs == ["soup", "query"] and results[0] is results[3]
+        # A later call starts a new execution
+        await flight.do("scrape:https://example.com/soup", lambda: work("soup"))
+    asyncio.run(run())
+
+    stats = flight.stats()
+    assert (stats["calls"], stats["executions"], stats["coalesced"], stats["in_flight"]) == (6, 3, 3, 0)
+    assert stats["top_fan_out"]["scrape:https://example.com/soup"] == 4
+    # User text never shows up in the stats, only a hash of it
+    assert not any("arthritis" in label for label in stats["top_fan_out"])
+    assert any(label.startswith("query:") for label in stats["top_fan_out"])
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def fail():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("scrape failed")
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        assert len(runs) == 1 and all(isinstance(result, ValueError) for result in results)
+    asyncio.run(run())
+
+def test_cancelled_leader_does_not_cancel_the_others():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "done"
+        assert leader.cancelled() and flight.executions == 1
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    print("🧪 Testing single flight...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
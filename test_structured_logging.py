@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the non-blocking structured logger
+"""
+
+import sys
+import os
+import io
+import json
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import structured_logging
+import tracing
+from structured_logging import configure_logging, flush_logs, get_logger
+
+def _capture(**settings):
+    for name, value in settings.items():
+        setattr(structured_logging, name, value)
+    stream = io.StringIO()
+    configure_logging(stream)
+    return stream
+
+def _lines(stream):
+    flush_logs()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+def test_json_lines_redact_user_text():
+    stream = _capture(LOG_FORMAT="json", LOG_SAMPLE_RATES="")
+    logger = get_logger("test")
+    with tracing.span("request") as request:
+        logger.info("Received query", extra={"user_text": "I have arthritis, what can I cook?", "user_id": "u1"})
+    structured_logging.LOG_REDACT_USER_TEXT = False
+    try:
+        logger.info("Agent response", extra={"response_text": "Try a sheet-pan dinner"})
+        entries = _lines(stream)
+    finally:
+        structured_logging.LOG_REDACT_USER_TEXT = True
+
+    assert entries[0]["msg"] == "Received query" and entries[0]["logger"] == "a11yum.test"
+    assert entries[0]["user_text"] == "[redacted 34 chars]" and entries[0]["user_id"] == "u1"
+    assert entries[0]["trace_id"] == request.trace_id
+    assert entries[1]["response_text"] == "Try a sheet-pan dinner"
+
+def test_sampling_by_route_keeps_warnings():
+    stream = _capture(LOG_FORMAT="json", LOG_SAMPLE_RATES="/health=0,/chat=1,/chat/stream=0")
+    logger = get_logger("test")
+    for path in ("/health", "/chat", "/chat/stream", "/chat/stream"):
+        with tracing.span("request", **{"http.target": path}):
+            with tracing.span("model.run"):
+                logger.info("routine", extra={"path": path})
+                logger.warning("unusual", extra={"path": path})
+    logger.info("startup")
+    entries = [(entry["msg"], entry.get("path")) for entry in _lines(stream)]
+
+    assert ("routine", "/chat") in entries
+    assert ("routine", "/health") not in entries and ("routine", "/chat/stream") not in entries
+    assert entries.count(("unusual", "/chat/stream")) == 2 and ("unusual", "/health") in entries
+    assert ("startup", None) in entries
+
+def test_slow_output_never_blocks_the_caller():
+    class SlowStream(io.StringIO):
+        def write(self, text):
+            time.sleep(0.02)
+            return super().write(text)
+
+    stream = SlowStream()
+    _capture(LOG_FORMAT="text", LOG_SAMPLE_RATES="", LOG_QUEUE_SIZE=50)
+    configure_logging(stream)
+    logger = get_logger("test")
+    dropped = structured_logging.LOGS_DROPPED.value()
+
+    started = time.perf_counter()
+    for i in range(200):
+        logger.info("tick", extra={"i": i})
+    elapsed = time.perf_counter() - started
+
+    # 200 writes would take 4s on the caller; the queue takes them at once and sheds the excess
+    assert elapsed < 0.5
+    assert structured_logging.LOGS_DROPPED.value() - dropped > 0
+    flush_logs()
+    assert "INFO    a11yum.test tick i=0" in stream.getvalue()
+    structured_logging.LOG_QUEUE_SIZE = 10000
+    configure_logging(sys.stdout)
+
+if __name__ == "__main__":
+    print("🧪 Testing structured logging...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
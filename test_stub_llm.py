@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline model backends (replay and record)
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from stub_llm import ReplayLlm, RecordingLlm, agent_model
+
+def _request(text):
+    return LlmRequest(model="gemini-2.0-flash-exp",
+                      contents=[types.Content(role="user", parts=[types.Part(text=text)])])
+
+def _replay(request, stream, **options):
+    model = ReplayLlm(model="gemini-2.0-flash-exp", first_token_latency=0, tokens_per_second=0, **options)
+
+    async def collect():
+        return [response async for response in model.generate_content_async(request, stream=stream)]
+    return asyncio.run(collect())
+
+def test_bundled_recordings_match_by_prompt():
+    final = _replay(_request("Create a recipe for this request: soup"), stream=False)
+    assert len(final) == 1 and '"title": "One-Pot Tomato Soup"' in final[0].content.parts[0].text
+    assert final[0].usage_metadata.prompt_token_count == 1800
+    summary = _replay(_request("Previous summary:\n(none)"), stream=False)
+    assert summary[0].content.parts[0].text.startswith("- User asked")
+
+def test_stream_splits_final_only_recordings():
+    responses = _replay(_request("Create a recipe for this request: soup"), stream=True, chunk_tokens=8)
+    partials = [r for r in responses if r.partial]
+    assert len(partials) > 10 and all(len(r.content.parts[0].text) <= 32 for r in partials)
+    assert "".join(r.content.parts[0].text for r in partials) == responses[-1].content.parts[0].text
+
+def test_recorded_calls_replay_exactly():
+    canned = _replay(_request("anything"), stream=True)
+
+    class CannedLlm(BaseLlm):
+        async def generate_content_async(self, llm_request, stream=False):
+            for response in canned:
+                yield response
+
+    path = os.path.join(tempfile.mkdtemp(), "recording.json")
+    recorder = RecordingLlm(model="gemini-2.0-flash-exp", recording_file=path, inner=CannedLlm(model="canned"))
+
+    async def record():
+        return [r async for r in recorder.generate_content_async(_request("How do I boil an egg?"), stream=True)]
+    recorded = asyncio.run(record())
+
+    replayed = _replay(_request("How do I boil an egg?"), stream=True, recording_file=path)
+    assert [r.content.parts[0].text for r in replayed] == [r.content.parts[0].text for r in recorded]
+    assert agent_model("gemini-2.0-flash-exp", "gemini") == "gemini-2.0-flash-exp"
+
+if __name__ == "__main__":
+    print("🧪 Testing stub LLM backends...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for request tracing, span export and the Prometheus metrics
+"""
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import FastAPI
+from google.adk.events import Event
+from google.genai import types
+
+import tracing
+from metrics import Registry
+from agent import TurnUsage
+
+def _export_to_file():
+    path = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+    tracing.TRACING_EXPORTER = "json"
+    tracing.TRACING_JSON_PATH = path
+    return path
+
+def _read_spans(path):
+    tracing.flush()
+    with open(path, encoding="utf-8") as handle:
+        return {span["name"]: span for span in map(json.loads, handle)}
+
+def test_histogram_exposition():
+    registry = Registry()
+    latency = registry.histogram("demo_seconds", "Demo latency", ["route"], buckets=(0.1, 1.0))
+    latency.observe(0.05, route="/chat")
+    latency.observe(0.5, route="/chat")
+    latency.observe(5, route="/chat")
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{route="/chat",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/chat",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="/chat",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/chat"} 3' in text
+    assert registry.histogram("demo_seconds", "Demo latency") is latency
+
+def test_model_run_spans_and_tools():
+    path = _export_to_file()
+    usage = TurnUsage("test_model_run")
+
+    async def run():
+        with tracing.span("request") as request:
+            with usage.model_run():
+                call = types.FunctionCall(id="call-1", name="lookup_recipe", args={})
+                usage.observe(Event(author="gideon", content=types.Content(role="model", parts=[types.Part(function_call=call)])))
+                reply = types.FunctionResponse(id="call-1", name="lookup_recipe", response={"ok": True})
+                usage.observe(Event(author="gideon", content=types.Content(role="user", parts=[types.Part(function_response=reply)])))
+                usage.observe(Event(
+                    author="gideon",
+                    content=types.Content(role="model", parts=[types.Part(text="Soup!")]),
+                    grounding_metadata=types.GroundingMetadata(web_search_queries=["tomato soup"]),
+                    usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=12, candidates_token_count=3),
+                ))
+        return request
+    request = asyncio.run(run())
+
+    spans = _read_spans(path)
+    model = spans["model.run"]
+    assert model["parentSpanId"] == request.span_id and model["traceId"] == request.trace_id
+    assert spans["tool.lookup_recipe"]["parentSpanId"] == model["spanId"]
+    assert [event["name"] for event in model["events"]] == ["first_token", "tool.google_search"]
+    attributes = {a["key"]: a["value"] for a in model["attributes"]}
+    assert attributes["input_tokens"] == {"intValue": "12"} and "ttft_ms" in attributes
+    assert tracing.SPAN_SECONDS.count(span="model.run") >= 1
+
+def test_asgi_middleware_continues_trace():
+    path = _export_to_file()
+    app = FastAPI()
+    app.add_middleware(tracing.TracingMiddleware, app_name="test")
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        with tracing.span("lookup"):
+            return {"item": item_id}
+
+    @app.get("/metrics")
+    async def metrics():
+        return tracing.metrics_response()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            parent = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+            assert (await client.get("/items/7", headers={"traceparent": parent})).status_code == 200
+            return await client.get("/metrics")
+    metrics = asyncio.run(run())
+
+    spans = _read_spans(path)
+    server = spans["GET /items/{item_id}"]
+    assert server["traceId"] == "a" * 32 and server["parentSpanId"] == "b" * 16
+    assert spans["lookup"]["parentSpanId"] == server["spanId"]
+    assert 'a11yum_http_request_duration_seconds_count{app="test",method="GET",route="/items/{item_id}",status="200"} 1' in metrics.text
+    assert metrics.headers["content-type"].startswith("text/plain")
+
+if __name__ == "__main__":
+    print("🧪 Testing tracing and metrics...")
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
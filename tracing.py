@@ -0,0 +1,407 @@
+# Copyright 2025 - a11Yum Recipe Assistant
+# Per-request tracing: spans over the hot paths, exported as OTLP JSON
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from metrics import CONTENT_TYPE, REGISTRY, render_latest
+
+# "none" (spans only feed /metrics), "json" (one span per line) or "otlp" (OTLP/HTTP JSON)
+TRACING_EXPORTER = os.environ.get("TRACING_EXPORTER", "none")
+TRACING_JSON_PATH = os.environ.get("TRACING_JSON_PATH", "traces.jsonl")
+TRACING_OTLP_ENDPOINT = os.environ.get("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_SERVICE_NAME = os.environ.get("TRACING_SERVICE_NAME", "a11yum")
+# Fraction of requests whose spans are exported; metrics always see every span
+TRACING_SAMPLE_RATE = float(os.environ.get("TRACING_SAMPLE_RATE", "1.0"))
+# Spans buffered for the export thread; more are dropped rather than blocking a request
+TRACING_QUEUE_SIZE = int(os.environ.get("TRACING_QUEUE_SIZE", "10000"))
+TRACING_FLUSH_INTERVAL = float(os.environ.get("TRACING_FLUSH_INTERVAL", "2"))
+TRACING_BATCH_SIZE = 512
+
+SPAN_SECONDS = REGISTRY.histogram(
+    "a11yum_span_duration_seconds", "Duration of traced operations", ["span"]
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "a11yum_http_request_duration_seconds", "HTTP request duration", ["app", "method", "route", "status"]
+)
+SPANS_DROPPED = REGISTRY.counter(
+    "a11yum_spans_dropped_total", "Spans not exported because the export queue was full"
+)
+
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER = 1, 2
+STATUS_OK, STATUS_ERROR = 1, 2
+
+
+#
+# Spans
+#
+
+class Span:
+    """One timed operation. Attributes and events are exported with it."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "root", "kind", "sampled",
+                 "start_ns", "end_ns", "attributes", "events", "status", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, kind: int = KIND_INTERNAL,
+                 trace_id: Optional[str] = None, parent_id: Optional[str] = None,
+                 sampled: Optional[bool] = None, **attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else trace_id or f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else parent_id
+        # The request (server) span this one belongs to, or itself
+        self.root: "Span" = parent.root if parent else self
+        self.kind = kind
+        if sampled is None:
+            sampled = parent.sampled if parent else random.random() < TRACING_SAMPLE_RATE
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes)
+        self.events: List[Dict[str, Any]] = []
+        self.status = STATUS_OK
+        self.error = ""
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def event(self, name: str, **attributes):
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def fail(self, exc: BaseException):
+        self.status = STATUS_ERROR
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        SPAN_SECONDS.observe(self.duration, span=self.name)
+        if self.sampled:
+            _exporter().export(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {"name": event["name"], "timeUnixNano": str(event["time_ns"]),
+                 "attributes": _otlp_attributes(event["attributes"])}
+                for event in self.events
+            ],
+            "status": {"code": self.status, "message": self.error} if self.error else {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("a11yum_span", default=None)
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes) -> Span:
+    """A span that is not made current; end() it yourself. For async generators."""
+    return Span(name, parent=parent or current_span(), **attributes)
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the block as a child of the current span, and make it current inside."""
+    current = start_span(name, **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.fail(exc)
+        raise
+    finally:
+        _reset(token)
+        current.end()
+
+@contextmanager
+def activate(current: Optional[Span]):
+    """Make an existing span current, e.g. on the thread that continues its work."""
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _reset(token)
+
+def _reset(token: contextvars.Token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # An async generator closed from another context; that context never saw the span
+        pass
+
+async def bind(coro, parent: Optional[Span]):
+    """Await `coro` with `parent` current, for coroutines handed to another event loop."""
+    with activate(parent):
+        return await coro
+
+def traced(name: str):
+    """Decorator form of span() for sync and async functions."""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def parse_traceparent(header: Optional[str]) -> Dict[str, Any]:
+    """trace_id, parent_id and sampled from a W3C traceparent header, if valid."""
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or parts[1] == "0" * 32:
+        return {}
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return {}
+    return {"trace_id": parts[1], "parent_id": parts[2], "sampled": sampled}
+
+
+#
+# Export
+#
+
+class SpanExporter:
+    """
+    Hands finished spans to a daemon thread that writes them in batches, so
+    a request never waits on disk or the collector. When the queue is full
+    spans are dropped and counted.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=TRACING_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, finished: Span):
+        if self.kind == "none":
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            SPANS_DROPPED.inc()
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch, taken = self._drain()
+            if batch:
+                self._write(batch)
+            for _ in range(taken):
+                self._queue.task_done()
+
+    def _drain(self):
+        batch: List[Span] = []
+        taken = 0
+        deadline = time.monotonic() + TRACING_FLUSH_INTERVAL
+        while len(batch) < TRACING_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            taken += 1
+            if item is None:
+                break
+            batch.append(item)
+        return batch, taken
+
+    def flush(self):
+        """Block until everything queued so far is written (tests, shutdown)."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._queue.join()
+
+    def _write(self, batch: List[Span]):
+        try:
+            if self.kind == "json":
+                with open(TRACING_JSON_PATH, "a", encoding="utf-8") as handle:
+                    for finished in batch:
+                        handle.write(json.dumps(finished.to_otlp(), ensure_ascii=False) + "\n")
+            elif self.kind == "otlp":
+                self._post(batch)
+        except Exception:
+            # Imported here: structured_logging imports this module
+            from structured_logging import get_logger
+            get_logger("tracing").warning("Could not export spans", extra={"spans": len(batch)}, exc_info=True)
+
+    def _post(self, batch: List[Span]):
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": TRACING_SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": "a11yum"}, "spans": [s.to_otlp() for s in batch]}],
+            }]
+        }
+        request = urllib.request.Request(
+            TRACING_OTLP_ENDPOINT, data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=10):
+            pass
+
+_exporters: Dict[str, SpanExporter] = {}
+
+def _exporter() -> SpanExporter:
+    exporter = _exporters.get(TRACING_EXPORTER)
+    if exporter is None:
+        exporter = _exporters.setdefault(TRACING_EXPORTER, SpanExporter(TRACING_EXPORTER))
+    return exporter
+
+def flush():
+    _exporter().flush()
+
+
+#
+# HTTP servers
+#
+
+class TracingMiddleware:
+    """
+    ASGI middleware: one server span per request, made current for the
+    handler, ended when the last body chunk is sent (so streamed responses
+    are timed to the end), plus the request duration histogram.
+    """
+
+    def __init__(self, app, app_name: str):
+        self.app = app
+        self.app_name = app_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        remote = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        method = scope.get("method", "GET")
+        request_span = Span(f"{method} {scope['path']}", kind=KIND_SERVER,
+                            **remote, **{"http.method": method, "http.target": scope["path"]})
+        state = {"status": 500}
+
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                self._finish(scope, request_span, state["status"])
+
+        token = _current.set(request_span)
+        try:
+            await self.app(scope, receive, traced_send)
+        except BaseException as exc:
+            request_span.fail(exc)
+            raise
+        finally:
+            _reset(token)
+            self._finish(scope, request_span, state["status"])
+
+    def _finish(self, scope, request_span: Span, status: int):
+        if request_span.end_ns is not None:
+            return
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        method = scope.get("method", "GET")
+        request_span.name = f"{method} {route}"
+        request_span.set(**{"http.route": route, "http.status_code": status})
+        if status >= 500:
+            request_span.status = STATUS_ERROR
+        request_span.end()
+        HTTP_SECONDS.observe(request_span.duration, app=self.app_name, method=method, route=route, status=status)
+
+def metrics_response():
+    """Starlette response for a /metrics route."""
+    from starlette.responses import Response
+    return Response(render_latest(), media_type=CONTENT_TYPE)
+
+
+def instrument_flask(app, app_name: str = "flask"):
+    """Request spans and the duration histogram for a Flask app."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_span():
+        remote = parse_traceparent(request.headers.get("traceparent"))
+        g.request_span = Span(f"{request.method} {request.path}", kind=KIND_SERVER, **remote,
+                              **{"http.method": request.method, "http.target": request.path})
+        g.request_span_token = _current.set(g.request_span)
+
+    @app.after_request
+    def _record_status(response):
+        request_span = g.get("request_span")
+        if request_span is not None:
+            request_span.set(**{"http.status_code": response.status_code})
+        return response
+
+    @app.teardown_request
+    def _end_request_span(exc):
+        request_span = g.pop("request_span", None)
+        if request_span is None:
+            return
+        _reset(g.pop("request_span_token"))
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        status = request_span.attributes.get("http.status_code", 500)
+        request_span.name = f"{request.method} {route}"
+        request_span.set(**{"http.route": route})
+        if exc is not None:
+            request_span.fail(exc)
+        elif status >= 500:
+            request_span.status = STATUS_ERROR
+        request_span.end()
+        HTTP_SECONDS.observe(request_span.duration, app=app_name, method=request.method, route=route, status=status)